@@ -1,5 +1,6 @@
 """An AWS Python Pulumi program"""
 # Import libraries
+import json
 import pulumi
 from pulumi import Config
 import pulumi_aws as aws
@@ -76,38 +77,63 @@ lambda_function = aws.lambda_.Function(
         variables={
             "BUCKET_NAME": bucket.bucket,
             "GITHUB_TOKEN": config.require_secret("github_token"),
-            "SNS_TOPIC_ARN": notification_topic.arn
+            "SNS_TOPIC_ARN": notification_topic.arn,
+            # Coordinators wait this long for their workers' responses
+            "FUNCTION_TIMEOUT": "300"
         }
     )
 )
 
-# Create CloudWatch Event for periodic execution (optional)
-event_rule = aws.cloudwatch.EventRule(
-    "daily-report-rule",
-    name="daily-github-report",
-    description="Trigger daily GitHub report generation",
-    schedule_expression="cron(0 8 * * ? *)"  # 8:00 AM UTC every day
+# Allow the function to invoke itself so coordinator runs can fan out to workers
+lambda_invoke_policy = aws.iam.RolePolicy(
+    "lambda-invoke-policy",
+    role=lambda_role.id,
+    policy=pulumi.Output.json_dumps({
+        "Version": "2012-10-17",
+        "Statement": [{
+            "Effect": "Allow",
+            "Action": ["lambda:InvokeFunction"],
+            "Resource": [lambda_function.arn]
+        }]
+    })
 )
 
-event_target = aws.cloudwatch.EventTarget(
-    "lambda-event-target",
-    rule=event_rule.name,
-    arn=lambda_function.arn,
-    input=pulumi.Output.from_input({
-        "repo": "vec21/aws-challenge-automation",
-        "days": 1,
-        "analyze": True,
-        "state": "all"
-    }).apply(lambda x: pulumi.Output.json_dumps(x))
-)
+# Create CloudWatch Events for periodic execution: the plan written by `cli.py plan-schedule`
+# (config "schedule": path of its JSON file) or a single daily report
+schedule_file = config.get("schedule")
+if schedule_file:
+    with open(schedule_file) as f:
+        scheduled_events = json.load(f)
+else:
+    scheduled_events = [{
+        "hour": 8,  # 8:00 AM UTC every day
+        "event": {"repo": "vec21/aws-challenge-automation", "days": 1, "analyze": True, "state": "all",
+                  "skip_unchanged": True, "track_changes": True}
+    }]
 
-event_permission = aws.lambda_.Permission(
-    "event-lambda-permission",
-    action="lambda:InvokeFunction",
-    function=lambda_function.name,
-    principal="events.amazonaws.com",
-    source_arn=event_rule.arn
-)
+for index, scheduled in enumerate(scheduled_events):
+    suffix = f"-{index}" if schedule_file else ""
+    event_rule = aws.cloudwatch.EventRule(
+        f"daily-report-rule{suffix}",
+        name=f"daily-github-report{suffix}",
+        description="Trigger daily GitHub report generation",
+        schedule_expression=f"cron({scheduled.get('minute', 0)} {scheduled['hour']} * * ? *)"
+    )
+
+    event_target = aws.cloudwatch.EventTarget(
+        f"lambda-event-target{suffix}",
+        rule=event_rule.name,
+        arn=lambda_function.arn,
+        input=json.dumps(scheduled["event"])
+    )
+
+    event_permission = aws.lambda_.Permission(
+        f"event-lambda-permission{suffix}",
+        action="lambda:InvokeFunction",
+        function=lambda_function.name,
+        principal="events.amazonaws.com",
+        source_arn=event_rule.arn
+    )
 
 # Export
 pulumi.export("bucket_name", bucket.bucket)
@@ -0,0 +1,416 @@
+"""
+Local stand-in for the GitHub REST and GraphQL APIs.
+
+Serves the endpoints the review pipeline uses from synthetic data:
+
+    GET  /repos/{owner}/{repo}
+    GET  /repos/{owner}/{repo}/pulls?state=&page=&per_page=
+    GET  /repos/{owner}/{repo}/pulls/{number}   (JSON, or the unified diff with Accept: application/vnd.github.diff)
+    GET  /repos/{owner}/{repo}/pulls/{number}/files?page=&per_page=
+    GET  /rate_limit
+    POST /graphql   (repository.pullRequests connection, see graphql_pull_requests)
+
+Latency, the maximum page size, per-token primary rate limits, injected 403
+secondary-limit responses, injected 502 responses with an HTML body (as a
+proxy in front of the API sends them) and ETag/If-None-Match revalidation are
+configurable, so fetch concurrency and caching can be benchmarked without a
+network:
+
+    python -m benchmarks.fake_github --port 8000 --latency 0.05 --prs 500
+    python src/cli.py review-code --repo synthetic/repo0 --token test --github-base-url http://127.0.0.1:8000
+"""
+import argparse
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from benchmarks.synthetic import SyntheticGitHub
+
+SECONDARY_LIMIT_MESSAGE = (
+    "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."
+)
+
+def isoformat(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class FakeGitHubServer(ThreadingHTTPServer):
+    """
+    HTTP server answering like api.github.com for the synthetic repositories
+    synthetic/repo0 .. synthetic/repo{repos-1}.
+
+    Every PR is open, so state=closed listings are empty. Each token (the
+    Authorization header) gets its own primary rate limit of `rate_limit`
+    requests, restored every `reset_after` seconds; 304 responses do not count
+    against it, like on GitHub. With
+    `secondary_limit_every` = N, every Nth request is answered with a 403
+    secondary rate limit and a Retry-After header; with `server_error_every` = N,
+    every Nth request is answered with a 502 HTML page. PRs in `missing_pulls` are
+    listed but their details answer 404, like PRs deleted while a run lists them.
+    Patches of files with more than `max_patch_lines` changed lines are omitted,
+    as GitHub does.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), repos=3, prs_per_repo=100, files_per_pr=8, seed=0,
+                 latency=0.0, max_per_page=100, rate_limit=5000, secondary_limit_every=0, retry_after=1,
+                 max_patch_lines=1000, server_error_every=0, missing_pulls=(), reset_after=3600):
+        super().__init__(address, FakeGitHubHandler)
+        self.data = SyntheticGitHub(repos, prs_per_repo, files_per_pr, seed)
+        self.latency = latency
+        self.max_per_page = max_per_page
+        self.rate_limit = rate_limit
+        self.secondary_limit_every = secondary_limit_every
+        self.retry_after = retry_after
+        self.max_patch_lines = max_patch_lines
+        self.server_error_every = server_error_every
+        self.missing_pulls = set(missing_pulls)
+        self.reset_after = reset_after
+        self.reset_at = int(time.time()) + reset_after
+        self.stats = Counter()
+        self.used = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serves requests from a background thread and returns the server."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def has_repository(self, full_name):
+        return full_name in self.data.repository_names()
+
+    def count_request(self, token):
+        """
+        Counts a request and decides whether a limit rejects it.
+
+        Returns (status or None, remaining quota of the token).
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            if time.time() >= self.reset_at:
+                self.used.clear()
+                self.reset_at = int(time.time()) + self.reset_after
+            if self.secondary_limit_every and self.stats['requests'] % self.secondary_limit_every == 0:
+                self.stats['secondary_limited'] += 1
+                return 'secondary', self.rate_limit - self.used[token]
+            if self.server_error_every and self.stats['requests'] % self.server_error_every == 0:
+                self.stats['server_errors'] += 1
+                return 'server', self.rate_limit - self.used[token]
+            if self.used[token] >= self.rate_limit:
+                self.stats['rate_limited'] += 1
+                return 'primary', 0
+            self.used[token] += 1
+            return None, self.rate_limit - self.used[token]
+
+    def refund(self, token):
+        """Gives back the quota of a request answered with 304 Not Modified."""
+        with self._lock:
+            self.used[token] -= 1
+            return self.rate_limit - self.used[token]
+
+    # Payloads
+
+    def repository_json(self, full_name):
+        owner, name = full_name.split('/')
+        return {
+            'id': abs(hash(full_name)) % 10**8,
+            'name': name,
+            'full_name': full_name,
+            'owner': {'login': owner},
+            'url': f"{self.base_url}/repos/{full_name}",
+            'html_url': f"https://github.com/{full_name}",
+        }
+
+    def pull_json(self, full_name, number, complete=False):
+        pr = self.data.make_pull(full_name, number)
+        data = {
+            'number': number,
+            'title': pr.title,
+            'user': {'login': pr.user.login},
+            'created_at': isoformat(pr.created_at),
+            'updated_at': isoformat(pr.updated_at),
+            'html_url': pr.html_url,
+            'url': f"{self.base_url}/repos/{full_name}/pulls/{number}",
+            'state': pr.state,
+            'head': {'sha': pr.head_sha, 'ref': f"feature-{number}"},
+            'merged_at': None,
+        }
+        if complete:
+            data.update({
+                'comments': pr.comments,
+                'additions': pr.additions,
+                'deletions': pr.deletions,
+                'changed_files': pr.changed_files,
+                'merged': pr.merged,
+            })
+        return data
+
+    def files_json(self, full_name, number):
+        files = []
+        for file in self.data.make_pull(full_name, number).get_files():
+            data = {
+                'filename': file.filename,
+                'status': 'modified',
+                'additions': file.additions,
+                'deletions': file.deletions,
+                'changes': file.changes,
+            }
+            if file.changes <= self.max_patch_lines:
+                data['patch'] = file.patch
+            files.append(data)
+        return files
+
+    def diff_text(self, full_name, number):
+        """Returns the unified diff of a PR, including the patches too large for the files listing."""
+        parts = []
+        for file in self.data.make_pull(full_name, number).get_files():
+            parts.append(
+                f"diff --git a/{file.filename} b/{file.filename}\n"
+                f"index 0000001..0000002 100644\n"
+                f"--- a/{file.filename}\n"
+                f"+++ b/{file.filename}\n"
+                f"{file.patch}\n"
+            )
+        return ''.join(parts)
+
+    def pull_numbers(self, state):
+        if state == 'closed':
+            return []
+        # Newest first, like GitHub's default sort
+        return list(range(self.data.prs_per_repo, 0, -1))
+
+    def graphql_pull_requests(self, variables):
+        """
+        Answers a repository.pullRequests connection query.
+
+        Only the variables are interpreted (owner, name, states, first, after);
+        the selection set is ignored and every node has the same fields.
+        """
+        full_name = f"{variables.get('owner')}/{variables.get('name')}"
+        if not self.has_repository(full_name):
+            return {'data': {'repository': None}, 'errors': [{'type': 'NOT_FOUND', 'message': f"Could not resolve to a Repository with the name '{full_name}'."}]}
+
+        states = [s.lower() for s in variables.get('states') or ['OPEN']]
+        numbers = [] if states == ['closed'] else self.pull_numbers('open')
+        first = min(int(variables.get('first') or 30), 100)
+        start = int(base64.b64decode(variables['after']).decode()) if variables.get('after') else 0
+        page = numbers[start:start + first]
+        nodes = []
+        for number in page:
+            pr = self.pull_json(full_name, number, complete=True)
+            nodes.append({
+                'number': pr['number'],
+                'title': pr['title'],
+                'author': {'login': pr['user']['login']},
+                'createdAt': pr['created_at'],
+                'updatedAt': pr['updated_at'],
+                'url': pr['html_url'],
+                'state': pr['state'].upper(),
+                'merged': pr['merged'],
+                'additions': pr['additions'],
+                'deletions': pr['deletions'],
+                'changedFiles': pr['changed_files'],
+                'comments': {'totalCount': pr['comments']},
+                'headRefOid': pr['head']['sha'],
+            })
+        end = start + len(page)
+        return {'data': {'repository': {'pullRequests': {
+            'totalCount': len(numbers),
+            'pageInfo': {'hasNextPage': end < len(numbers), 'endCursor': base64.b64encode(str(end).encode()).decode()},
+            'nodes': nodes,
+        }}}}
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body in one write; small separate writes stall on delayed ACKs
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    ROUTES = [
+        (re.compile(r'^/repos/([^/]+/[^/]+)$'), 'repository'),
+        (re.compile(r'^/repos/([^/]+/[^/]+)/pulls$'), 'pulls'),
+        (re.compile(r'^/repos/([^/]+/[^/]+)/pulls/(\d+)$'), 'pull'),
+        (re.compile(r'^/repos/([^/]+/[^/]+)/pulls/(\d+)/files$'), 'files'),
+        (re.compile(r'^/rate_limit$'), 'rate_limit'),
+    ]
+
+    def log_message(self, format, *args):
+        # Keep benchmark and test output clean
+        pass
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def handle_request(self, method):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        token = self.headers.get('Authorization', '')
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0)) if method == 'POST' else b''
+
+        limited, remaining = server.count_request(token)
+        route = self.route_name(method, url.path)
+        if route == 'pull' and 'diff' in self.headers.get('Accept', ''):
+            route = 'diff'
+        server.stats[f"{method} {route}"] += 1
+        if limited == 'secondary':
+            return self.send_json(403, {'message': SECONDARY_LIMIT_MESSAGE}, remaining, {'Retry-After': str(server.retry_after)})
+        if limited == 'server':
+            page = "<html><head><title>502 Bad Gateway</title></head><body>Bad Gateway</body></html>"
+            return self.send_json(502, page, remaining, {'Content-Type': 'text/html'})
+        if limited == 'primary':
+            return self.send_json(403, {'message': 'API rate limit exceeded for token.'}, 0)
+
+        status, payload, headers = self.dispatch(method, url.path, query, body)
+        if status == 200:
+            etag = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest() + '"'
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                server.stats['not_modified'] += 1
+                return self.send_json(304, None, server.refund(token), headers)
+        self.send_json(status, payload, remaining, headers)
+
+    def route_name(self, method, path):
+        if method == 'POST':
+            return 'graphql' if path == '/graphql' else 'unknown'
+        for pattern, name in self.ROUTES:
+            if pattern.match(path):
+                return name
+        return 'unknown'
+
+    def dispatch(self, method, path, query, body):
+        server = self.server
+        if method == 'POST' and path == '/graphql':
+            request = json.loads(body or b'{}')
+            return 200, server.graphql_pull_requests(request.get('variables') or {}), {}
+
+        for pattern, name in self.ROUTES:
+            match = pattern.match(path)
+            if match and method == 'GET':
+                break
+        else:
+            return 404, {'message': 'Not Found'}, {}
+
+        if name == 'rate_limit':
+            token = self.headers.get('Authorization', '')
+            core = {'limit': server.rate_limit, 'remaining': server.rate_limit - server.used[token], 'reset': server.reset_at}
+            return 200, {'resources': {'core': core}, 'rate': core}, {}
+
+        full_name = match.group(1)
+        if not server.has_repository(full_name):
+            return 404, {'message': 'Not Found'}, {}
+        if name == 'repository':
+            return 200, server.repository_json(full_name), {}
+        if name == 'pull':
+            number = int(match.group(2))
+            if not 1 <= number <= server.data.prs_per_repo or number in server.missing_pulls:
+                return 404, {'message': 'Not Found'}, {}
+            if 'diff' in self.headers.get('Accept', ''):
+                return 200, server.diff_text(full_name, number), {'Content-Type': 'text/x-diff; charset=utf-8'}
+            return 200, server.pull_json(full_name, number, complete=True), {}
+        if name == 'pulls':
+            numbers = server.pull_numbers(query.get('state', 'open'))
+            return self.paginate(path, query, numbers, lambda number: server.pull_json(full_name, number))
+        files = server.files_json(full_name, int(match.group(2)))
+        return self.paginate(path, query, files, lambda file: file)
+
+    def paginate(self, path, query, items, render):
+        """Returns one page of items with a GitHub-style Link header."""
+        per_page = max(1, min(int(query.get('per_page', 30)), self.server.max_per_page))
+        page = max(1, int(query.get('page', 1)))
+        last_page = max(1, -(-len(items) // per_page))
+        payload = [render(item) for item in items[(page - 1) * per_page:page * per_page]]
+
+        def link(target, rel):
+            params = dict(query, page=target, per_page=per_page)
+            return f'<{self.server.base_url}{path}?{urlencode(params)}>; rel="{rel}"'
+
+        links = []
+        if page < last_page:
+            links.extend([link(page + 1, 'next'), link(last_page, 'last')])
+        if page > 1:
+            links.extend([link(1, 'first'), link(page - 1, 'prev')])
+        return 200, payload, {'Link': ', '.join(links)} if links else {}
+
+    def send_json(self, status, payload, remaining, headers=None):
+        """Sends the payload as JSON, or as is if it is text (headers must then set the Content-Type)."""
+        headers = dict(headers or {})
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+        else:
+            body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', headers.pop('Content-Type', 'application/json; charset=utf-8'))
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Limit', str(self.server.rate_limit))
+        self.send_header('X-RateLimit-Remaining', str(max(0, remaining)))
+        self.send_header('X-RateLimit-Reset', str(self.server.reset_at))
+        self.send_header('X-RateLimit-Resource', 'core')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local GitHub API stand-in with synthetic data.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--repos', type=int, default=3, help='Number of repositories (synthetic/repo0..)')
+    parser.add_argument('--prs', type=int, default=100, help='PRs per repository')
+    parser.add_argument('--files', type=int, default=8, help='Changed files per PR')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--max-per-page', type=int, default=100, help='Largest page size honoured')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='Requests allowed per token')
+    parser.add_argument('--secondary-limit-every', type=int, default=0, help='Answer every Nth request with a 403 secondary limit')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds of secondary limit responses')
+    parser.add_argument('--server-error-every', type=int, default=0, help='Answer every Nth request with a 502 HTML page')
+    args = parser.parse_args(argv)
+
+    server = FakeGitHubServer(
+        (args.host, args.port), args.repos, args.prs, args.files, args.seed, args.latency,
+        args.max_per_page, args.rate_limit, args.secondary_limit_every, args.retry_after,
+        server_error_every=args.server_error_every
+    )
+    print(f"Serving fake GitHub API at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Rendering benchmark of the PDF report on synthetic PR records.
+
+    python -m benchmarks.render --prs 5000
+    python -m benchmarks.render --prs 5000 --compare benchmarks/baselines/render-5k.json
+    python -m benchmarks.render --prs 5000 --save benchmarks/baselines/render-5k.json
+
+Only generate_pdf_report is timed: the records (with analysis results,
+including titles and issues that need escaping) are built upfront. Reports
+the wall time, the layout cost per PR, the peak resident memory and the size
+of the PDF. Comparing against a stored baseline exits with status 1 when the
+time per PR or the memory regressed beyond the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import cli  # noqa: E402
+from benchmarks.run import peak_rss, reset_peak_rss  # noqa: E402
+
+WORDS = ('fix', 'add', 'refactor', 'parser', 'cache', 'R&D', '<script>', 'retry', 'timeout', 'docs', 'CI', 'flaky')
+LANGUAGES = ('Python', 'JavaScript', 'TypeScript', 'Go', 'Markdown', 'YAML', 'Vendored', 'Generated')
+
+def make_records(count, repositories=5, seed=0):
+    """Returns `count` PR records spread over the repositories, half of them with analysis issues."""
+    rng = random.Random(seed)
+    now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    records = []
+    for index in range(count):
+        repo = f"synthetic/repo{index % repositories}"
+        number = count - index
+        created_at = now - timedelta(hours=rng.randrange(24 * 30))
+        issues = [f"TODOs found in src/module_{number}_{i}.py" for i in range(rng.randrange(3))]
+        if rng.random() < 0.2:
+            issues.append(f"File src/big_{number}.py has too many changes ({rng.randrange(501, 3000)})")
+        records.append({
+            'repo': repo,
+            'number': number,
+            'title': " ".join(rng.choice(WORDS) for _ in range(rng.randrange(3, 12))),
+            'user': f"user{rng.randrange(200)}",
+            'created_at': created_at,
+            'updated_at': created_at + timedelta(hours=rng.randrange(72)),
+            'head_sha': f"{rng.getrandbits(160):040x}",
+            'comments': rng.randrange(30),
+            'additions': rng.randrange(2000),
+            'deletions': rng.randrange(1000),
+            'changed_files': rng.randrange(1, 40),
+            'url': f"https://github.com/{repo}/pull/{number}",
+            'state': 'open',
+            'merged': False,
+            'analysis': {
+                'complexity': rng.randrange(11),
+                'issues': issues,
+                'languages': {language: rng.randrange(1, 500) for language in rng.sample(LANGUAGES, 3)},
+                'risk_score': len(issues),
+            },
+        })
+    return records
+
+def run_render_benchmark(prs=5000, seed=0, output_dir=None):
+    """Renders the report of `prs` synthetic records and returns the measurements."""
+    records = make_records(prs, seed=seed)
+    output_dir = output_dir or tempfile.mkdtemp(prefix='benchmark-')
+    output = os.path.join(output_dir, f"render_{prs}.pdf")
+
+    reset_peak_rss()
+    start = time.perf_counter()
+    cli.generate_pdf_report(['synthetic/repo0', 'synthetic/repo1'], records, output, 30, 'open')
+    wall_time = time.perf_counter() - start
+
+    return {
+        'prs': prs,
+        'python': platform.python_version(),
+        'wall_time': round(wall_time, 4),
+        'per_pr_ms': round(wall_time * 1000 / prs, 4),
+        'peak_memory': peak_rss(),
+        'report_size': os.path.getsize(output),
+    }
+
+def compare(result, baseline, tolerance=0.25):
+    """Returns the regressions of the time per PR and peak memory against baseline as readable strings."""
+    regressions = []
+    for metric in ('per_pr_ms', 'peak_memory'):
+        previous = baseline.get(metric)
+        if previous and result[metric] > previous * (1 + tolerance):
+            regressions.append(
+                f"{metric}: {result[metric]} vs baseline {previous} (+{(result[metric] / previous - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PDF rendering on synthetic PR records.")
+    parser.add_argument('--prs', type=int, default=5000, help='Number of PR records in the report')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic records')
+    parser.add_argument('--save', help='Write the results as a JSON baseline to this path')
+    parser.add_argument('--compare', help='Compare the results with this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative growth of time and memory')
+    args = parser.parse_args(argv)
+
+    result = run_render_benchmark(args.prs, args.seed)
+    print(json.dumps(result, indent=2))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+End-to-end benchmark of the review pipeline on synthetic GitHub data.
+
+    python -m benchmarks.run --scale 1k
+    python -m benchmarks.run --scale 1k --compare benchmarks/baselines/1k.json
+    python -m benchmarks.run --scale 1k --save benchmarks/baselines/1k.json
+    python -m benchmarks.run --scale 50k --repeat 1
+
+Reports wall time, throughput and peak resident memory per stage (fetch,
+analyze, render, upload) plus GitHub and S3 call counts. The peak of a stage
+is the resident set size high-water mark reset when the stage starts (Linux
+/proc/self/clear_refs; tracemalloc would slow rendering down several times
+and skew the timings). Where the peak cannot be reset, stage peaks are not
+reported. Analysis runs inside the fetch loop and shares its peak. The
+scale runs --repeat times (3 by default) and the best figure of every stage
+is kept, as single runs vary by a third on shared machines. Comparing against
+a stored baseline exits with status 1 when a metric regressed beyond the
+tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import cli  # noqa: E402
+from pipeline import RecordSpool  # noqa: E402
+from benchmarks.synthetic import SyntheticGitHub  # noqa: E402
+
+# name: (repositories, PRs per repository, files per PR)
+SCALES = {
+    '10': (1, 10, 5),
+    '1k': (10, 100, 8),
+    '50k': (50, 1000, 8),
+}
+
+# Metrics compared against baselines; higher is worse for all of them
+COMPARED_METRICS = ('wall_time', 'peak_memory')
+
+# Stage times below this many seconds are too noisy to compare
+MIN_COMPARED_TIME = 0.2
+
+class CountingS3Client:
+    """Fake S3 client counting calls and uploaded bytes."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.bytes_uploaded = 0
+
+    def upload_file(self, file_path, bucket, key):
+        self.calls['upload_file'] += 1
+        self.bytes_uploaded += os.path.getsize(file_path)
+
+    def put_object(self, Body=b'', **kwargs):
+        self.calls['put_object'] += 1
+        self.bytes_uploaded += len(Body)
+
+    def list_objects_v2(self, **kwargs):
+        self.calls['list_objects_v2'] += 1
+        return {}
+
+    def request_count(self):
+        return sum(self.calls.values())
+
+def reset_peak_rss():
+    """Resets the peak resident set size to the current one; returns False where the OS does not allow it."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss():
+    """Returns the peak resident set size in bytes since the last reset_peak_rss, or since the process started."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageRecorder:
+    """Measures wall time and peak memory of each stage."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, items):
+        reset = reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            peak = peak_rss() if reset else None
+            self.stages[name] = {
+                'wall_time': round(wall_time, 4),
+                'peak_memory': peak,
+                'items': items,
+                'throughput': round(items / wall_time, 2) if wall_time > 0 else None,
+            }
+
+def run_benchmark(scale, seed=0, output_dir=None):
+    """Runs fetch, analyze, render and upload on synthetic data and returns the measurements."""
+    repos, prs_per_repo, files_per_pr = SCALES[scale]
+    github = SyntheticGitHub(repos, prs_per_repo, files_per_pr, seed)
+    s3_client = CountingS3Client()
+    recorder = StageRecorder()
+    output_dir = output_dir or tempfile.mkdtemp(prefix='benchmark-')
+    repositories = github.repository_names()
+    total_prs = repos * prs_per_repo
+    days = 3650
+
+    # Analysis runs inside the fetch loop; time it separately through a wrapper
+    analyze_time = [0.0]
+    analyze_pull_request = cli.analyze_pull_request
+
+    def timed_analyze(repository, pr, files=None):
+        start = time.perf_counter()
+        try:
+            return analyze_pull_request(repository, pr, files)
+        finally:
+            analyze_time[0] += time.perf_counter() - start
+
+    # PyGithub (through the token pool's auth) is imported once per process; keep it out of the fetch timing
+    import github_auth  # noqa: F401
+
+    with patch.object(cli, '_github', github), \
+            patch.object(cli, 'analyze_pull_request', timed_analyze), \
+            patch.object(cli.time, 'sleep', lambda seconds: None), \
+            patch.object(cli.click, 'echo', lambda *args, **kwargs: None), \
+            patch('boto3.client', return_value=s3_client), \
+            RecordSpool(output_dir) as all_pr_data:
+        # Records are spooled to disk as they are fetched, as in review-code
+        with recorder.stage('fetch', total_prs):
+            all_pr_data.extend(cli.iter_repositories(repositories, 'token', days, 'open', prs_per_repo, analyze=True))
+
+        with recorder.stage('render', len(all_pr_data)):
+            pdf_path = cli.generate_pdf_report(
+                repositories, all_pr_data, os.path.join(output_dir, f"benchmark_{scale}.pdf"), days, 'open'
+            )
+
+        with recorder.stage('upload', 1):
+            cli.upload_to_s3(pdf_path, 'benchmark-bucket')
+
+    # Split the analysis time out of the fetch stage
+    fetch = recorder.stages['fetch']
+    recorder.stages['analyze'] = {
+        'wall_time': round(analyze_time[0], 4),
+        'peak_memory': fetch['peak_memory'],
+        'items': total_prs,
+        'throughput': round(total_prs / analyze_time[0], 2) if analyze_time[0] > 0 else None,
+    }
+    fetch['wall_time'] = round(fetch['wall_time'] - analyze_time[0], 4)
+    fetch['throughput'] = round(total_prs / fetch['wall_time'], 2) if fetch['wall_time'] > 0 else None
+    stages = {name: recorder.stages[name] for name in ('fetch', 'analyze', 'render', 'upload')}
+
+    wall_time = sum(stage['wall_time'] for stage in stages.values())
+    peaks = [stage['peak_memory'] for stage in stages.values()]
+    return {
+        'scale': scale,
+        'repositories': repos,
+        'prs': len(all_pr_data),
+        'files_per_pr': files_per_pr,
+        'python': platform.python_version(),
+        'wall_time': round(wall_time, 4),
+        'throughput': round(len(all_pr_data) / wall_time, 2) if wall_time > 0 else None,
+        'peak_memory': peak_rss() if None in peaks else max(peaks),
+        'stages': stages,
+        'github_calls': dict(github.calls),
+        'github_requests': github.request_count(),
+        's3_calls': dict(s3_client.calls),
+        's3_requests': s3_client.request_count(),
+        'bytes_uploaded': s3_client.bytes_uploaded,
+        'report_size': os.path.getsize(pdf_path),
+    }
+
+def best_of(results):
+    """
+    Combines repeated runs into one result with the lowest wall time and peak
+    memory of every stage, which is far less noisy than any single run.
+    """
+    best = dict(results[0], stages={})
+    for name, stage in results[0]['stages'].items():
+        runs = [result['stages'][name] for result in results]
+        wall_time = min(run['wall_time'] for run in runs)
+        peaks = [run['peak_memory'] for run in runs]
+        best['stages'][name] = dict(
+            stage, wall_time=wall_time, peak_memory=None if None in peaks else min(peaks),
+            throughput=round(stage['items'] / wall_time, 2) if wall_time > 0 else None,
+        )
+    best['wall_time'] = round(sum(stage['wall_time'] for stage in best['stages'].values()), 4)
+    best['throughput'] = round(best['prs'] / best['wall_time'], 2) if best['wall_time'] > 0 else None
+    best['peak_memory'] = min(result['peak_memory'] for result in results)
+    best['repeat'] = len(results)
+    return best
+
+def compare(result, baseline, tolerance=0.25):
+    """
+    Returns the regressions of result against baseline as readable strings.
+
+    Times and memory may grow by `tolerance` (a fraction) before they count as a
+    regression; request counts must not grow at all.
+    """
+    regressions = []
+
+    def check(label, current, previous, allowed):
+        if label.endswith('wall_time') and (previous or 0) < MIN_COMPARED_TIME:
+            return
+        if previous and current is not None and current > previous * (1 + allowed):
+            regressions.append(f"{label}: {current} vs baseline {previous} (+{(current / previous - 1) * 100:.0f}%)")
+
+    for metric in COMPARED_METRICS:
+        check(metric, result[metric], baseline.get(metric), tolerance)
+        for name, stage in result['stages'].items():
+            previous = baseline.get('stages', {}).get(name, {}).get(metric)
+            check(f"{name}.{metric}", stage[metric], previous, tolerance)
+    check('github_requests', result['github_requests'], baseline.get('github_requests'), 0)
+    check('s3_requests', result['s3_requests'], baseline.get('s3_requests'), 0)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the review pipeline on synthetic GitHub data.")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='10', help='Size of the synthetic data set')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data generator')
+    parser.add_argument('--save', help='Write the results as a JSON baseline to this path')
+    parser.add_argument('--compare', help='Compare the results with this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative growth of times and memory')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs to take the best times and memory of')
+    args = parser.parse_args(argv)
+
+    result = best_of([run_benchmark(args.scale, args.seed) for _ in range(max(1, args.repeat))])
+    print(json.dumps(result, indent=2))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
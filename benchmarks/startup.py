@@ -0,0 +1,84 @@
+"""
+Cold start benchmark of the Lambda handler import.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --compare benchmarks/baselines/startup.json
+    python -m benchmarks.startup --save benchmarks/baselines/startup.json
+
+Runs `python -X importtime -c "import handler"` in a fresh interpreter
+--repeat times (5 by default) and keeps the best cumulative import time of
+the handler module, which leaves out the interpreter's own startup, along
+with the number of modules the import loaded. Comparing against a stored
+baseline exits with status 1 when either grew beyond the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+def import_times(statement):
+    """Runs a statement under `python -X importtime` and returns {module: cumulative_us}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def run_startup_benchmark(module='handler', repeat=5):
+    """Imports `module` `repeat` times in fresh interpreters and returns the best measurements."""
+    runs = [import_times(f"import {module}") for _ in range(max(1, repeat))]
+    return {
+        'module': module,
+        'python': platform.python_version(),
+        'import_ms': round(min(times[module] for times in runs) / 1000, 2),
+        'modules': min(len(times) for times in runs),
+    }
+
+def compare(result, baseline, tolerance=0.5):
+    """Returns the regressions of the import time and module count against baseline as readable strings."""
+    regressions = []
+    for metric in ('import_ms', 'modules'):
+        previous = baseline.get(metric)
+        if previous and result[metric] > previous * (1 + tolerance):
+            regressions.append(
+                f"{metric}: {result[metric]} vs baseline {previous} (+{(result[metric] / previous - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the Lambda handler.")
+    parser.add_argument('--module', default='handler', help='Module to import')
+    parser.add_argument('--save', help='Write the results as a JSON baseline to this path')
+    parser.add_argument('--compare', help='Compare the results with this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative growth of time and modules')
+    parser.add_argument('--repeat', type=int, default=5, help='Imports to take the best time of')
+    args = parser.parse_args(argv)
+
+    result = run_startup_benchmark(args.module, args.repeat)
+    print(json.dumps(result, indent=2))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
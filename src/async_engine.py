@@ -0,0 +1,341 @@
+"""
+Asyncio fetch engine (review-code --engine async).
+
+PyGithub fetches one lazily loaded attribute at a time. This engine talks to
+the REST API directly through one pooled keep-alive aiohttp session and
+overlaps the requests: listing pages, PR details and file lists of all PRs of
+all repositories are fetched concurrently, bounded by `concurrency` requests
+in flight. It builds the same records as cli.collect_repository, in the same
+order, and hands the analysis to the same analyze_pull_request function
+(with full_diff, on the files parsed from each PR's diff as it streams in).
+
+aiohttp is imported when the engine runs, not at module import.
+"""
+import asyncio
+import click
+import json
+import math
+import re
+from datetime import datetime
+
+import telemetry
+from diffs import DIFF_MEDIA_TYPE, DiffParser
+from token_pool import TokenPool
+
+DEFAULT_BASE_URL = 'https://api.github.com'
+PER_PAGE = 100
+
+# Attempts of a request answered with a secondary rate limit or a server error
+MAX_ATTEMPTS = 4
+
+LINK_LAST = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+class GitHubError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status} {message}")
+        self.status = status
+
+class FetchedRepository:
+    def __init__(self, full_name):
+        self.full_name = full_name
+
+class FetchedFile:
+    def __init__(self, data):
+        self.filename = data['filename']
+        self.additions = data.get('additions', 0)
+        self.deletions = data.get('deletions', 0)
+        self.changes = data.get('changes', 0)
+        self.patch = data.get('patch')
+
+class FetchedPullRequest:
+    """A pull request whose files were fetched up front, shaped like PyGithub's for analyze_pull_request."""
+
+    def __init__(self, number, files):
+        self.number = number
+        self._files = files
+
+    def get_files(self):
+        return self._files
+
+class AsyncGitHubClient:
+    """Minimal GitHub REST client over one aiohttp session with bounded concurrency."""
+
+    def __init__(self, session, token=None, base_url=DEFAULT_BASE_URL, concurrency=16, deadline=None):
+        self.session = session
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.headers = {'Accept': 'application/vnd.github+json'}
+        self.pool = TokenPool.of(token)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        # PRs in progress; deadline checks happen when a PR gets a slot, not when it is queued
+        self.pull_slots = asyncio.Semaphore(concurrency)
+        self.deadline = deadline
+        self._reset_reported = None
+
+    def _acquire(self, headers):
+        """Picks the token of a request from the pool; returns (token state, request headers)."""
+        state = self.pool.acquire() if self.pool else None
+        return state, dict(headers, Authorization=f"token {state.token}") if state else headers
+
+    def _release(self, state, response, message=''):
+        """Hands the response back to the pool; True if the request should be sent again with another token."""
+        if state is None:
+            return False
+        if response is None:
+            return self.pool.release(state)
+        return self.pool.release(state, response.status, response.headers, message)
+
+    async def get(self, path, params=None):
+        """
+        Returns (JSON body, response headers), failing over to another token of
+        the pool on a rate limit and waiting out secondary rate limits. When every
+        token is rate limited, waits for the first one to reset if the deadline
+        leaves time for it.
+        """
+        attempt = 1
+        while True:
+            async with self.semaphore:
+                state, headers = self._acquire(self.headers)
+                response, message = None, ''
+                try:
+                    async with self.session.get(self.base_url + path, params=params, headers=headers) as response:
+                        telemetry.count('GitHubRequests')
+                        if response.status == 200:
+                            return await response.json(), response.headers
+                        # Proxies in front of the API answer errors like 502 with an HTML page
+                        text = await response.text()
+                        try:
+                            body = json.loads(text)
+                        except ValueError:
+                            body = None
+                        message = body.get('message', '') if isinstance(body, dict) else response.reason or ''
+                        retry_after = response.headers.get('Retry-After')
+                finally:
+                    failover = self._release(state, response, message)
+
+            if failover:
+                continue
+            secondary = response.status in (403, 429) and (retry_after or 'secondary rate limit' in message)
+            if attempt < MAX_ATTEMPTS and (secondary or response.status >= 500):
+                attempt += 1
+                await asyncio.sleep(float(retry_after) if retry_after else 2 ** (attempt - 1))
+                continue
+            primary = response.status in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0'
+            wait = self._reset_wait() if primary and attempt < MAX_ATTEMPTS else None
+            if wait is not None:
+                attempt += 1
+                await asyncio.sleep(wait)
+                continue
+            raise GitHubError(response.status, message)
+
+    def _reset_wait(self):
+        """
+        Seconds to wait for the first token of the pool to reset after every token
+        was rate limited (0 if one reset meanwhile), or None if the deadline leaves
+        no time for it.
+        """
+        if not self.pool:
+            return None
+        wait = self.pool.reset_in()
+        if self.deadline and not self.deadline.can_wait(wait):
+            return None
+        reset_at = min(state.blocked_until for state in self.pool.tokens)
+        if wait and reset_at != self._reset_reported:
+            self._reset_reported = reset_at
+            click.echo(f"GitHub rate limit reached on every token, waiting {math.ceil(wait)}s for it to reset")
+        return wait
+
+    async def get_diff(self, path):
+        """
+        Returns the DiffFiles of a PR's diff, parsed while the response streams in,
+        or None if the diff is not available.
+        """
+        while True:
+            parser = DiffParser()
+            files = []
+            async with self.semaphore:
+                state, headers = self._acquire(dict(self.headers, Accept=DIFF_MEDIA_TYPE))
+                response = None
+                try:
+                    async with self.session.get(self.base_url + path, headers=headers) as response:
+                        telemetry.count('GitHubRequests')
+                        if response.status != 200:
+                            files = None
+                        else:
+                            pending = b''
+                            async for chunk in response.content.iter_chunked(64 * 1024):
+                                pending += chunk
+                                *lines, pending = pending.split(b'\n')
+                                for line in lines:
+                                    completed = parser.feed(line.decode('utf-8', errors='replace'))
+                                    if completed:
+                                        files.append(completed)
+                            if pending:
+                                parser.feed(pending.decode('utf-8', errors='replace'))
+                finally:
+                    failover = self._release(state, response)
+            if failover:
+                continue
+            if files is None:
+                return None
+            last = parser.close()
+            return files + [last] if last else files
+
+    async def get_page(self, path, params, page):
+        return await self.get(path, dict(params, page=page, per_page=PER_PAGE))
+
+    async def get_all(self, path, params=None):
+        """Fetches every page of a listing, the pages after the first concurrently."""
+        params = params or {}
+        first, headers = await self.get_page(path, params, 1)
+        match = LINK_LAST.search(headers.get('Link', ''))
+        last_page = int(match.group(1)) if match else 1
+        pages = await asyncio.gather(*(self.get_page(path, params, page) for page in range(2, last_page + 1)))
+        return first + [item for data, _ in pages for item in data]
+
+class RepositoryCollector:
+    """Collects the PR records of one repository."""
+
+    def __init__(self, client, repo_name, since_date, state, limit, analyzer=None, deadline=None, full_diff=False):
+        self.client = client
+        self.repo_name = repo_name
+        self.since_date = since_date
+        self.state = state
+        self.limit = limit
+        self.analyzer = analyzer
+        self.deadline = deadline
+        self.full_diff = full_diff
+        self._analysis_skip_reported = False
+
+    async def list_pulls(self):
+        """
+        Returns the listed PRs to process: newest first, created since since_date,
+        at most `limit`. Pages are fetched in concurrent batches of as many pages as
+        the limit still needs; the listing is sorted by creation date, so it stops at
+        the first PR older than since_date.
+        """
+        path = f"/repos/{self.repo_name}/pulls"
+        params = {'state': self.state}
+        listed, headers = await self.client.get_page(path, params, 1)
+        match = LINK_LAST.search(headers.get('Link', ''))
+        last_page = int(match.group(1)) if match else 1
+        # The server may cap the page size below PER_PAGE
+        page_size = max(1, len(listed))
+
+        selected = []
+        next_page = 2
+        while True:
+            for pull in listed:
+                if len(selected) >= self.limit:
+                    return selected
+                if parse_datetime(pull['created_at']) < self.since_date:
+                    return selected
+                selected.append(pull)
+            if next_page > last_page or len(selected) >= self.limit:
+                return selected
+            batch_size = math.ceil((self.limit - len(selected)) / page_size)
+            batch = range(next_page, min(last_page, next_page + batch_size - 1) + 1)
+            pages = await asyncio.gather(*(self.client.get_page(path, params, page) for page in batch))
+            listed = [pull for data, _ in pages for pull in data]
+            next_page = batch[-1] + 1
+
+    async def collect_pull(self, pull):
+        """
+        Fetches the details (and files, for the analysis) of one listed PR and builds
+        its record; None if the PR is skipped or could not be fetched.
+        """
+        async with self.client.pull_slots:
+            try:
+                return await self._collect_pull(pull)
+            except Exception as e:
+                click.echo(f"Error processing PR #{pull['number']} of {self.repo_name}: {str(e)}", err=True)
+                return None
+
+    async def _collect_pull(self, pull):
+        deadline = self.deadline
+        if deadline and (deadline.truncated or not deadline.can_fetch()):
+            if not deadline.truncated:
+                click.echo(f"Time limit approaching, stopping before PR #{pull['number']}")
+                deadline.truncate()
+            return None
+
+        analyze = self.analyzer is not None and not (deadline and not deadline.can_analyze())
+        path = f"/repos/{self.repo_name}/pulls/{pull['number']}"
+        if analyze and self.full_diff:
+            (details, _), files = await asyncio.gather(self.client.get(path), self.client.get_diff(path))
+            if files is None:
+                click.echo(f"Diff of PR #{pull['number']} not available, using the file list", err=True)
+                files = [FetchedFile(data) for data in await self.client.get_all(path + '/files')]
+        elif analyze:
+            (details, _), listed = await asyncio.gather(self.client.get(path), self.client.get_all(path + '/files'))
+            files = [FetchedFile(data) for data in listed]
+        else:
+            details, _ = await self.client.get(path)
+
+        record = {
+            'repo': self.repo_name,
+            'number': pull['number'],
+            'title': pull['title'],
+            'user': pull['user']['login'],
+            'created_at': parse_datetime(pull['created_at']),
+            'updated_at': parse_datetime(pull['updated_at']),
+            'head_sha': pull['head']['sha'],
+            'comments': details['comments'],
+            'additions': details['additions'],
+            'deletions': details['deletions'],
+            'changed_files': details['changed_files'],
+            'url': pull['html_url'],
+            'state': pull['state'],
+            'merged': details.get('merged', False),
+            'analysis': {}
+        }
+        if analyze:
+            with telemetry.stage('analyze'):
+                record['analysis'] = self.analyzer(
+                    FetchedRepository(self.repo_name), FetchedPullRequest(pull['number'], files), files
+                )
+            telemetry.count('PullRequestsAnalyzed')
+        elif self.analyzer is not None and not self._analysis_skip_reported:
+            self._analysis_skip_reported = True
+            click.echo("Time limit approaching, skipping code analysis for the remaining PRs")
+        if deadline:
+            deadline.collected(analyze or self.analyzer is None)
+        return record
+
+    async def collect(self):
+        click.echo(f"Reviewing repository {self.repo_name}")
+        if self.deadline and self.deadline.truncated:
+            click.echo(f"Time limit reached, skipping repository {self.repo_name}")
+            return []
+        try:
+            await self.client.get(f"/repos/{self.repo_name}")
+            pulls = await self.list_pulls()
+            click.echo(f"Processing {len(pulls)} pull requests with state '{self.state}' from {self.repo_name}")
+            records = await asyncio.gather(*(self.collect_pull(pull) for pull in pulls))
+            return [record for record in records if record is not None]
+        except Exception as e:
+            click.echo(f"Error processing repository {self.repo_name}: {str(e)}", err=True)
+            return []
+
+async def collect_repositories_async(repositories, token, since_date, state='open', limit=100, analyzer=None,
+                                     deadline=None, base_url=None, concurrency=16, full_diff=False):
+    """Collects the PR records of all repositories concurrently, in repository order."""
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        client = AsyncGitHubClient(session, token, base_url, concurrency, deadline)
+        results = await asyncio.gather(*(
+            RepositoryCollector(client, repo_name, since_date, state, limit, analyzer, deadline, full_diff).collect()
+            for repo_name in repositories
+        ))
+    return [record for records in results for record in records]
+
+def collect_repositories(repositories, token, since_date, state='open', limit=100, analyzer=None, deadline=None,
+                         base_url=None, concurrency=16, full_diff=False):
+    """Runs collect_repositories_async to completion."""
+    return asyncio.run(collect_repositories_async(
+        repositories, token, since_date, state, limit, analyzer, deadline, base_url, concurrency, full_diff
+    ))
@@ -0,0 +1,227 @@
+"""
+PR-level change index of the reports, and the deltas between runs.
+
+Every run that tracks changes stores a compact index of its PRs, keyed by
+"repo#number", with each PR's state, updated_at, head SHA and analysis summary
+(risk score and issues). The runs of the same repositories and state share a
+manifest listing the runs.
+
+Writing a run compares its index with the previous one, which costs one pass
+over the PRs, and stores the run's changelog next to its index: the entries
+before and after the run of the keys that changed. The delta between any two
+runs is built from the changelogs of the runs in between (a key's entry before
+its first change and after its last one), without reading the indexes, so it
+takes time linear in the number of changed PRs rather than in the size of the
+reports.
+
+The indexes are kept under indexes/<name>/ in the bucket, or in
+.change-index/<name>/ next to a local report.
+"""
+import os
+from datetime import datetime, timezone
+
+from storage import store_at, store_name
+
+INDEX_VERSION = 2
+
+# Runs listed in a manifest; deltas can be computed between any two of them
+MANIFEST_RUNS = 400
+
+# Delta categories, in the order they are reported, with their labels
+CATEGORIES = ('new', 'merged', 'closed', 'reopened', 'updated', 'removed')
+LABELS = {
+    'new': 'New', 'merged': 'Merged', 'closed': 'Closed', 'reopened': 'Reopened', 'updated': 'Updated',
+    'removed': 'No longer listed', 'new_issues': 'With new issues',
+}
+
+def entry_key(record):
+    return f"{record['repo']}#{record['number']}"
+
+def index_entry(record):
+    """The compact index entry of a PR record."""
+    analysis = record.get('analysis') or {}
+    updated_at = record.get('updated_at')
+    return {
+        'title': record['title'],
+        'url': record.get('url'),
+        'state': record['state'],
+        'merged': bool(record.get('merged')),
+        'updated_at': updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at,
+        'head_sha': record.get('head_sha'),
+        'risk_score': analysis.get('risk_score'),
+        'issues': list(analysis.get('issues', [])),
+    }
+
+def build_index(records):
+    """Returns the index entries of the records by key."""
+    return {entry_key(record): index_entry(record) for record in records}
+
+def changed_keys(before, after):
+    """Returns the keys whose entries differ between two indexes, including added and removed ones."""
+    keys = [key for key, entry in after.items() if before.get(key) != entry]
+    keys.extend(key for key in before if key not in after)
+    return keys
+
+def compute_delta(before, after, keys):
+    """
+    Classifies the given keys (those that may have changed) between two indexes:
+    {'new': [...], 'merged': [...], ..., 'new_issues': [...]}. Keys whose entries
+    are equal in both indexes are left out.
+    """
+    delta = {category: [] for category in CATEGORIES}
+    delta['new_issues'] = []
+    for key in sorted(set(keys)):
+        old, new = before.get(key), after.get(key)
+        if old == new:
+            continue
+        if new is None:
+            category = 'removed'
+        elif old is None:
+            category = 'new'
+        elif new['merged'] and not old['merged']:
+            category = 'merged'
+        elif new['state'] == 'closed' and old['state'] != 'closed':
+            category = 'closed'
+        elif new['state'] != 'closed' and old['state'] == 'closed':
+            category = 'reopened'
+        else:
+            category = 'updated'
+        current = new or old
+        repo, _, number = key.rpartition('#')
+        summary = {'repo': repo, 'number': int(number), 'title': current['title'], 'url': current['url'],
+                   'state': 'merged' if current['merged'] else current['state']}
+        delta[category].append(summary)
+        if new is not None:
+            known = set(old['issues']) if old else set()
+            issues = [issue for issue in new['issues'] if issue not in known]
+            if issues:
+                delta['new_issues'].append(dict(summary, issues=issues))
+    return delta
+
+def delta_counts(delta):
+    """Returns the number of PRs per category (and with new issues) of a delta."""
+    return {category: len(delta[category]) for category in CATEGORIES + ('new_issues',)}
+
+def summarize(delta):
+    """One line with the counts of a delta, e.g. "New: 3, Merged: 1, ..."."""
+    return ", ".join(f"{LABELS[category]}: {count}" for category, count in delta_counts(delta).items())
+
+def index_location(repositories, state, bucket='', directory='.'):
+    """Returns the directory (or s3:// prefix) of the change index of the repositories and state."""
+    name = os.path.splitext(store_name(repositories, state))[0]
+    if bucket:
+        return f"s3://{bucket}/indexes/{name}"
+    return os.path.join(directory, '.change-index', name)
+
+class ChangeIndex:
+    """The run indexes and the manifest of the reports on some repositories and state."""
+
+    def __init__(self, location):
+        self.location = location
+        self._manifest = None
+        # (run id, entries) of the last run read by compare
+        self._previous = (None, None)
+
+    @classmethod
+    def at(cls, repositories, state, bucket='', directory='.'):
+        return cls(index_location(repositories, state, bucket, directory))
+
+    def _store(self, name):
+        if self.location.startswith('s3://'):
+            return store_at(f"{self.location}/{name}.json")
+        return store_at(os.path.join(self.location, f"{name}.json"))
+
+    def runs(self):
+        """Returns the manifest: [{'run', 'published_at', 'prs', 'changed'}], oldest first."""
+        if self._manifest is None:
+            data = self._store('manifest').load()
+            self._manifest = data['runs'] if data and data.get('version') == INDEX_VERSION else []
+        return self._manifest
+
+    def load(self, run_id):
+        """Returns the index entries of a run."""
+        data = self._store(run_id).load()
+        if data is None:
+            raise ValueError(f"No change index of run {run_id} at {self.location}")
+        return data['entries']
+
+    def changelog(self, run_id):
+        """Returns the entries before and after a run of the keys it changed: {'before': {...}, 'after': {...}}."""
+        data = self._store(f"{run_id}.changes").load()
+        if data is None:
+            raise ValueError(f"No changelog of run {run_id} at {self.location}")
+        return data
+
+    def compare(self, records):
+        """
+        Builds the index of this run's records and its delta since the last run.
+        Returns (entries, delta); delta is None on the first run.
+        """
+        entries = build_index(records)
+        runs = self.runs()
+        if not runs:
+            return entries, None
+        previous = runs[-1]
+        before = self.load(previous['run'])
+        # Kept for the changelog written by save
+        self._previous = (previous['run'], before)
+        delta = compute_delta(before, entries, changed_keys(before, entries))
+        delta.update({'from': previous['run'], 'from_published_at': previous['published_at']})
+        return entries, delta
+
+    def save(self, entries, run_id=None):
+        """
+        Stores the index of a run and its changelog since the last run, and adds
+        the run to the manifest with the number of keys it changed (every key on
+        the first run); returns the run id.
+        """
+        now = datetime.now(timezone.utc)
+        run_id = run_id or now.strftime('%Y%m%dT%H%M%S.%fZ')
+        runs = self.runs()
+        self._store(run_id).save({'version': INDEX_VERSION, 'run': run_id, 'entries': entries})
+        if runs:
+            last = runs[-1]['run']
+            previous_run, before = self._previous
+            if previous_run != last:
+                before = self.load(last)
+            keys = changed_keys(before, entries)
+            self._store(f"{run_id}.changes").save({
+                'version': INDEX_VERSION, 'run': run_id,
+                'before': {key: before.get(key) for key in keys}, 'after': {key: entries.get(key) for key in keys},
+            })
+        changed = len(keys) if runs else len(entries)
+        runs = runs + [{'run': run_id, 'published_at': now.isoformat(), 'prs': len(entries), 'changed': changed}]
+        self._manifest = runs[-MANIFEST_RUNS:]
+        self._store('manifest').save({'version': INDEX_VERSION, 'runs': self._manifest})
+        return run_id
+
+    def delta(self, from_run=None, to_run=None):
+        """
+        Returns the delta between two runs of the manifest (by default the last
+        two), from the changelogs of the runs after from_run up to to_run.
+        """
+        runs = self.runs()
+        ids = [run['run'] for run in runs]
+        to_position = self._position(ids, to_run) if to_run else len(ids) - 1
+        from_position = self._position(ids, from_run) if from_run else to_position - 1
+        if from_position < 0:
+            raise ValueError(f"Fewer than two runs indexed at {self.location}")
+        if from_position >= to_position:
+            raise ValueError(f"Run {ids[from_position]} is not older than run {ids[to_position]}")
+        before, after = {}, {}
+        for run_id in ids[from_position + 1:to_position + 1]:
+            changes = self.changelog(run_id)
+            for key, entry in changes['before'].items():
+                before.setdefault(key, entry)
+            after.update(changes['after'])
+        delta = compute_delta(before, after, after.keys())
+        delta.update({
+            'from': ids[from_position], 'from_published_at': runs[from_position]['published_at'],
+            'to': ids[to_position], 'to_published_at': runs[to_position]['published_at'],
+        })
+        return delta
+
+    def _position(self, ids, run_id):
+        if run_id not in ids:
+            raise ValueError(f"Run {run_id} is not indexed at {self.location}")
+        return ids.index(run_id)
@@ -0,0 +1,113 @@
+import click
+from datetime import datetime, timezone
+
+CHECKPOINT_VERSION = 2
+
+class RunCheckpoint:
+    """
+    Tracks the progress of a review run so it can be resumed after a failure.
+
+    The checkpoint document holds the repositories already finished, the number
+    of PRs collected per repository and, for the repository in progress, the
+    number of the last PR collected. GitHub lists PRs newest first, so resuming
+    skips every PR numbered at or above that cursor.
+
+    The PR records (with their analysis results) are not kept in memory nor in
+    the document: every save appends the records collected since the last one
+    as a new NDJSON part next to the document (<checkpoint>.part-<n>.ndjson),
+    so each save writes only the new records.
+    """
+
+    def __init__(self, store, options, every=25):
+        self.store = store
+        self.options = options
+        self.every = max(1, every)
+        self.completed_repos = []
+        self.cursors = {}
+        self.counts = {}
+        self.parts = []
+        self._pending = []
+
+    @classmethod
+    def open(cls, store, options, every=25, resume=False):
+        """Creates a checkpoint for a run, loading the saved progress when resuming."""
+        checkpoint = cls(store, options, every)
+        if not resume:
+            return checkpoint
+
+        data = store.load()
+        if data is None:
+            click.echo(f"No checkpoint found at {store}, starting from the beginning")
+        elif data.get('version') != CHECKPOINT_VERSION or data.get('options') != options:
+            click.echo(f"Checkpoint at {store} was written with different options, starting from the beginning")
+        else:
+            checkpoint.completed_repos = data['completed_repos']
+            checkpoint.cursors = data['cursors']
+            checkpoint.counts = data['counts']
+            checkpoint.parts = data['parts']
+            click.echo(f"Resuming from checkpoint {store} ({checkpoint.record_count()} PRs already collected)")
+        return checkpoint
+
+    def record_count(self):
+        return sum(self.counts.values())
+
+    def count(self, repo_name):
+        """Returns the number of PRs collected for the repository."""
+        return self.counts.get(repo_name, 0)
+
+    def is_completed(self, repo_name):
+        return repo_name in self.completed_repos
+
+    def last_number(self, repo_name):
+        """Returns the number of the last PR collected for the repository, if any."""
+        return self.cursors.get(repo_name)
+
+    def records_for(self, repo_name):
+        """Yields the PR records collected for the repository, read back from the saved parts."""
+        for part in self.parts:
+            if repo_name in part['repos']:
+                yield from (r for r in self.store.sibling(part['suffix']).load_records() if r['repo'] == repo_name)
+        yield from (r for r in list(self._pending) if r['repo'] == repo_name)
+
+    def record(self, repo_name, pr_info):
+        """Adds a collected PR record, saving the checkpoint every `every` records."""
+        self._pending.append(pr_info)
+        self.counts[repo_name] = self.counts.get(repo_name, 0) + 1
+        self.cursors[repo_name] = pr_info['number']
+        if len(self._pending) >= self.every:
+            self.save()
+
+    def complete(self, repo_name):
+        """Marks a repository as fully collected and saves the checkpoint."""
+        if repo_name not in self.completed_repos:
+            self.completed_repos.append(repo_name)
+        self.save()
+
+    def save(self):
+        """Appends the records collected since the last save as a new part, then saves the document."""
+        # The part is written before the document that lists it, so a crash in between only leaves
+        # an unlisted part, which the next save of the same run overwrites
+        if self._pending:
+            suffix = f".part-{len(self.parts)}.ndjson"
+            self.store.sibling(suffix).save_records(self._pending)
+            self.parts.append({'suffix': suffix, 'repos': sorted({r['repo'] for r in self._pending})})
+            self._pending = []
+        self.store.save({
+            'version': CHECKPOINT_VERSION,
+            'options': self.options,
+            'saved_at': datetime.now(timezone.utc).isoformat(),
+            'completed_repos': self.completed_repos,
+            'cursors': self.cursors,
+            'counts': self.counts,
+            'parts': self.parts,
+        })
+
+    def finish(self, repositories):
+        """Deletes the checkpoint once every repository is done, otherwise keeps it for --resume."""
+        if all(self.is_completed(repo_name) for repo_name in repositories):
+            for part in self.parts:
+                self.store.sibling(part['suffix']).delete()
+            self.store.delete()
+        else:
+            self.save()
+            click.echo(f"Checkpoint saved to {self.store}; rerun with --resume to continue")
@@ -1,14 +1,46 @@
 import click
+import functools
+import itertools
 import os
-import boto3
+import shutil
+import tempfile
 import time
 from datetime import datetime, timedelta, timezone
-from github import Github
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+
+import languages
+import telemetry
+from diffs import DiffFile, MARKERS
+from pipeline import RecordSpool, StreamedList, bounded
+from token_pool import TokenPool
+
+# boto3, PyGithub and ReportLab are imported inside the functions that use them,
+# so a Lambda cold start only pays for the dependencies a run actually reaches.
+
+def _github(*args, **kwargs):
+    """Creates a PyGithub client, importing PyGithub on first use."""
+    from github import Github
+    return Github(*args, **kwargs)
+
+def github_client(token, base_url=None, deadline=None):
+    """
+    Connects to GitHub, or to the API at base_url (GitHub Enterprise or a local
+    fake server); GITHUB_BASE_URL is used when no base_url is given.
+    
+    `token` is a comma-separated list of tokens or a TokenPool; the requests are
+    spread over the tokens by remaining quota. With a deadline, a rate limit is
+    not waited for when its reset would leave no time to fetch and publish.
+    """
+    kwargs = {'per_page': 30}  # Reduce the number of items per page
+    base_url = base_url or os.environ.get('GITHUB_BASE_URL')
+    if base_url:
+        kwargs['base_url'] = base_url.rstrip('/')
+    tokens = TokenPool.of(token)
+    if not tokens:
+        return _github(**kwargs)
+    
+    # Routes every request to the token with the most quota and counts them for the run telemetry
+    from github_auth import PooledToken, PoolRetry
+    return _github(auth=PooledToken(tokens), retry=PoolRetry(tokens, deadline), **kwargs)
 
 @click.group()
 def cli():
@@ -17,7 +49,7 @@ def cli():
 
 @cli.command()
 @click.option('--repo', required=True, help='GitHub repository (user/repo) or comma-separated list')
-@click.option('--token', default=lambda: os.environ.get("GITHUB_TOKEN"), help='GitHub token (or set GITHUB_TOKEN as environment variable)')
+@click.option('--token', default=lambda: os.environ.get("GITHUB_TOKEN"), help='GitHub token, or comma-separated tokens to pool (or set GITHUB_TOKEN as environment variable)')
 @click.option('--bucket', default='', help='S3 bucket name for report storage')
 @click.option('--days', default=32, type=int, help='Number of days to look back for PRs')
 @click.option('--output', default='report.pdf', help='Output PDF filename')
@@ -26,114 +58,488 @@ def cli():
 @click.option('--notify', is_flag=True, help='Send email notification when the report is ready')
 @click.option('--email', help='Email for notifications')
 @click.option('--limit', default=100, type=int, help='Limit of PRs to be processed per repository')
-def review_code(repo, token, bucket, days, output, state='open', analyze=False, notify=False, email=None, limit=100):
+@click.option('--workers', default=1, type=int, help='Number of parallel worker processes for multi-repository runs')
+@click.option('--checkpoint', 'checkpoint_location', help='Local path or s3://bucket/key where progress is checkpointed')
+@click.option('--checkpoint-every', default=25, type=int, help='Number of collected PRs between checkpoints')
+@click.option('--resume', is_flag=True, help='Continue from the last checkpoint (requires --checkpoint)')
+@click.option('--time-budget', type=float, help='Seconds the run may take; the report is truncated to finish in time')
+@click.option('--github-base-url', default=lambda: os.environ.get("GITHUB_BASE_URL"), help='GitHub API URL (or set GITHUB_BASE_URL), e.g. for GitHub Enterprise or a local fake server')
+@click.option('--metrics-file', help='Append the run metrics (stage durations, API calls) to this JSON lines file')
+@click.option('--profile', is_flag=True, help='Profile CPU and memory per stage and write the profiles next to the report')
+@click.option('--engine', default='sync', type=click.Choice(['sync', 'async']), help='Fetch engine: PyGithub (sync) or concurrent aiohttp (async)')
+@click.option('--concurrency', default=16, type=int, help='Maximum GitHub requests in flight with --engine async')
+@click.option('--full-diff', is_flag=True, help='Analyze each PR from its whole diff (one request, large patches included)')
+@click.option('--skip-unchanged', is_flag=True, help='Skip rendering, upload and notification when no PR changed since the last report')
+@click.option('--track-changes', is_flag=True, help='Index the PRs of the run and report what changed since the last indexed run')
+def review_code(repo, token, bucket, days, output, state='open', analyze=False, notify=False, email=None, limit=100, workers=1,
+                checkpoint_location=None, checkpoint_every=25, resume=False, time_budget=None, github_base_url=None,
+                metrics_file=None, profile=False, engine='sync', concurrency=16, full_diff=False, skip_unchanged=False,
+                track_changes=False):
     """Reviews pull requests from a GitHub repository and generates a PDF report."""
     
     # Check if it's a list of repositories
     repositories = [r.strip() for r in repo.split(',')]
-    all_pr_data = []
     
-    # Connect to GitHub
+    if resume and not checkpoint_location:
+        raise click.UsageError("--resume requires --checkpoint")
+    if checkpoint_location and workers > 1:
+        raise click.UsageError("--checkpoint cannot be combined with --workers")
+    if time_budget is not None and workers > 1:
+        raise click.UsageError("--time-budget cannot be combined with --workers")
+    if checkpoint_location and engine == 'async':
+        raise click.UsageError("--checkpoint cannot be combined with --engine async")
+    
+    if metrics_file:
+        telemetry.start()
+    
+    profiler = None
+    if profile:
+        from profiling import StageProfiler
+        profiler = telemetry.current().profiler = StageProfiler()
+    
+    report_path = output
+    s3_url = None
     try:
-        g = Github(token, per_page=30)  # Reduce the number of items per page
+        deadline = None
+        if time_budget is not None:
+            from deadline import Deadline
+            deadline = Deadline(time_budget)
+        elif workers > 1 and len(repositories) > 1:
+            # No time limit: only records the shards that failed, so the report is marked partial
+            from deadline import Deadline
+            deadline = Deadline(float('inf'))
         
-        # Cutoff date for filtering PRs
-        since_date = datetime.now(timezone.utc) - timedelta(days=days)
+        checkpoint = None
+        if checkpoint_location:
+            from checkpoint import RunCheckpoint
+            from storage import store_at
+            options = {'repositories': repositories, 'state': state, 'days': days, 'analyze': analyze, 'limit': limit}
+            checkpoint = RunCheckpoint.open(store_at(checkpoint_location), options, checkpoint_every, resume)
         
-        for repo_name in repositories:
-            click.echo(f"Reviewing repository {repo_name}")
-            
-            try:
-                repository = g.get_repo(repo_name)
-                click.echo(f"Connected to repository: {repository.full_name}")
-                
-                # Get pull requests with the specified state
-                pulls = repository.get_pulls(state=state)
-                total_pulls = pulls.totalCount
-                click.echo(f"Found {total_pulls} pull requests with state '{state}'")
-                
-                # Limit the number of PRs processed
-                pr_count = 0
-                click.echo(f"Processing up to {limit} pull requests...")
-                
-                # Prepare data for the report
-                repo_pr_data = []
-                for pr in pulls:
-                    # Limit the number of PRs processed
-                    if pr_count >= limit:
-                        click.echo(f"Limit of {limit} PRs reached. Use --limit to increase.")
-                        break
-                    
-                    # Filter by date if necessary
-                    if pr.created_at < since_date:
-                        continue
-                    
-                    pr_count += 1
-                    click.echo(f"Processing PR #{pr.number} ({pr_count}/{min(total_pulls, limit)})")
-                    
-                    pr_info = {
-                        'repo': repo_name,
-                        'number': pr.number,
-                        'title': pr.title,
-                        'user': pr.user.login,
-                        'created_at': pr.created_at,
-                        'updated_at': pr.updated_at,
-                        'comments': pr.comments,
-                        'additions': pr.additions,
-                        'deletions': pr.deletions,
-                        'changed_files': pr.changed_files,
-                        'url': pr.html_url,
-                        'state': pr.state,
-                        'merged': pr.merged if hasattr(pr, 'merged') else False,
-                        'analysis': {}
-                    }
-                    
-                    # Perform code analysis if requested
-                    if analyze:
-                        pr_info['analysis'] = analyze_pull_request(repository, pr)
-                        # Small pause to avoid rate limit
-                        time.sleep(0.5)
-                    
-                    repo_pr_data.append(pr_info)
-                
-                all_pr_data.extend(repo_pr_data)
-                
-            except Exception as e:
-                click.echo(f"Error processing repository {repo_name}: {str(e)}", err=True)
+        if workers > 1 and len(repositories) > 1:
+            records = collect_sharded(repositories, token, days, state, limit, analyze, workers, github_base_url,
+                                      engine, concurrency, full_diff, deadline)
+        else:
+            # Records are fetched and analyzed in a background thread, a bounded queue ahead of the spool
+            records = bounded(iter_repositories(
+                repositories, token, days, state, limit, analyze, checkpoint, deadline, github_base_url, engine, concurrency,
+                full_diff
+            ))
+        
+        # The records go to disk as they arrive; the report reads them back from there
+        with RecordSpool() as all_pr_data:
+            all_pr_data.extend(records)
                 
-        if not all_pr_data:
-            click.echo(f"No pull requests with state '{state}' found in the last {days} days.")
-            return
+            # A truncated run publishes whatever it collected, even if that is nothing
+            if not all_pr_data and not (deadline and deadline.truncated):
+                click.echo(f"No pull requests with state '{state}' found in the last {days} days.")
+            else:
+                result = publish_report(repositories, all_pr_data, output, days, state, bucket, notify, email, deadline,
+                                        skip_unchanged=skip_unchanged, track_changes=track_changes,
+                                        options=report_options(analyze, full_diff, limit))
+                report_path, s3_url = result['pdf_path'], result['s3_url']
         
-        # Generate filename with repository and state information
-        if len(repositories) == 1:
-            repo_short = repositories[0].split('/')[1] if '/' in repositories[0] else repositories[0]
-        else:
-            repo_short = "multi-repos"
+        if checkpoint:
+            checkpoint.finish(repositories)
+            
+    except Exception as e:
+        click.echo(f"Error processing pull requests: {str(e)}", err=True)
+    
+    if profiler:
+        telemetry.current().profiler = None
+        save_profile(profiler, report_path, bucket, s3_url)
+    
+    if metrics_file:
+        telemetry.emit(metrics_file)
+        click.echo(f"Metrics written to {metrics_file}")
+
+@cli.command('plan-schedule')
+@click.option('--inventory', required=True, help='JSON list of repositories: {"repo", "priority", "size", ...}')
+@click.option('--history', multiple=True, help='Metrics JSON lines of past runs to estimate the API cost from (repeatable)')
+@click.option('--tokens', default=lambda: len(TokenPool.of(os.environ.get("GITHUB_TOKEN")) or [None]), type=int,
+              help='Number of GitHub tokens whose hourly quota is shared (default: the tokens in GITHUB_TOKEN)')
+@click.option('--concurrency', default=10, type=int, help='Lambda invocations that may run at the same time')
+@click.option('--timeout', default=300, type=int, help='Lambda timeout in seconds')
+@click.option('--output', default='schedule.json', help='File the hourly handler events are written to')
+def plan_schedule(inventory, history, tokens, concurrency, timeout, output):
+    """Plans the day's review runs of a repository inventory within the rate limit and Lambda concurrency."""
+    import json
+    import scheduler
+
+    cost_model = scheduler.CostModel.from_metrics_files(history) if history else scheduler.CostModel()
+    day = scheduler.plan(scheduler.load_inventory(inventory), cost_model, tokens, concurrency, timeout)
+    click.echo(day.summary())
 
-        if output == 'report.pdf':  # If the user didn't specify a custom name
-            output = f"{repo_short}_{state}.pdf"
+    with open(output, 'w') as f:
+        json.dump(day.events(), f, indent=2)
+    click.echo(f"{len(day.events())} invocations written to {output}")
 
-        # Generate PDF report
-        pdf_path = generate_pdf_report(repositories, all_pr_data, output, days, state)
-        click.echo(f"PDF report generated: {pdf_path}")
+@cli.command('diff')
+@click.option('--repo', required=True, help='GitHub repository (user/repo) or comma-separated list, as in review-code')
+@click.option('--state', default='open', type=click.Choice(['open', 'closed', 'all']), help='State of PRs of the reports')
+@click.option('--bucket', default='', help='S3 bucket of the reports (default: the reports in --directory)')
+@click.option('--directory', default='.', help='Directory of the local reports')
+@click.option('--from', 'from_run', help='Run to compare from (default: the run before --to)')
+@click.option('--to', 'to_run', help='Run to compare to (default: the last run)')
+@click.option('--list', 'list_runs', is_flag=True, help='List the indexed runs instead')
+@click.option('--output', help='Write the delta as JSON to this file')
+def diff(repo, state, bucket, directory, from_run, to_run, list_runs, output):
+    """Shows what changed between two runs of review-code --track-changes: new, merged and closed PRs, new issues."""
+    import json
+    from change_index import CATEGORIES, LABELS, ChangeIndex, summarize
+
+    repositories = [r.strip() for r in repo.split(',')]
+    index = ChangeIndex.at(repositories, state, bucket, directory)
+    if list_runs:
+        for run in index.runs():
+            click.echo(f"{run['run']}  {run['prs']} PRs, {run['changed']} changed")
+        return
+
+    try:
+        delta = index.delta(from_run, to_run)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Changes from run {delta['from']} to run {delta['to']}: {summarize(delta)}")
+    for category in CATEGORIES:
+        for pr in delta[category]:
+            click.echo(f"  {LABELS[category]}: [{pr['repo']}] PR #{pr['number']}: {pr['title']}")
+    for pr in delta['new_issues']:
+        for issue in pr['issues']:
+            click.echo(f"  New issue in [{pr['repo']}] PR #{pr['number']}: {issue}")
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(delta, f, indent=2)
+        click.echo(f"Delta written to {output}")
+
+def save_profile(profiler, report_path, bucket='', s3_url=None):
+    """Writes the stage profiles next to the report and, if it was uploaded, next to the S3 report too."""
+    directory = os.path.dirname(os.path.abspath(report_path))
+    prefix = os.path.splitext(os.path.basename(report_path))[0]
+    paths = profiler.write(directory, prefix)
+    click.echo(f"Profile summary written to {paths[0]}")
+    
+    if bucket and s3_url:
+        import boto3
+        s3_client = boto3.client('s3')
+        key_base = os.path.splitext(s3_url.split('.amazonaws.com/', 1)[1])[0]
+        for path in paths:
+            key = key_base + path[len(os.path.join(directory, prefix)):]
+            s3_client.upload_file(path, bucket, key)
+            telemetry.count('S3Calls')
+        click.echo(f"Profiles uploaded to s3://{bucket}/{key_base}.*")
+    return paths
+
+def save_delta(delta, report_path, bucket='', s3_url=None):
+    """Writes the delta since the last run next to the report and, if it was uploaded, next to the S3 report too."""
+    import json
+    from change_index import summarize
+    
+    path = os.path.splitext(report_path)[0] + '.delta.json'
+    with open(path, 'w') as f:
+        json.dump(delta, f, indent=2)
+    click.echo(f"Changes since the last run ({summarize(delta)}) written to {path}")
+    
+    if bucket and s3_url:
+        import boto3
+        key = os.path.splitext(s3_url.split('.amazonaws.com/', 1)[1])[0] + '.delta.json'
+        boto3.client('s3').upload_file(path, bucket, key)
+        telemetry.count('S3Calls')
+        telemetry.count('BytesUploaded', os.path.getsize(path))
+        click.echo(f"Changes uploaded to s3://{bucket}/{key}")
+    return path
+
+def collect_repositories(repositories, token, days, state='open', limit=100, analyze=False, checkpoint=None, deadline=None,
+                         base_url=None, engine='sync', concurrency=16, full_diff=False):
+    """Fetches the PR records of the given repositories into a list (see iter_repositories)."""
+    return list(iter_repositories(
+        repositories, token, days, state, limit, analyze, checkpoint, deadline, base_url, engine, concurrency, full_diff
+    ))
+
+def iter_repositories(repositories, token, days, state='open', limit=100, analyze=False, checkpoint=None, deadline=None,
+                      base_url=None, engine='sync', concurrency=16, full_diff=False):
+    """Yields the PR records of the given repositories as they are collected (all at once with the async engine)."""
+    tokens = TokenPool.of(token)
+    
+    # Cutoff date for filtering PRs
+    since_date = datetime.now(timezone.utc) - timedelta(days=days)
+    
+    pr_count = 0
+    if engine == 'async':
+        import async_engine
+        with telemetry.stage('fetch'):
+            all_pr_data = async_engine.collect_repositories(
+                repositories, tokens, since_date, state, limit, analyze_pull_request if analyze else None, deadline,
+                base_url or os.environ.get('GITHUB_BASE_URL'), concurrency, full_diff
+            )
+        telemetry.count('Repositories', len(repositories))
+        telemetry.count('PullRequests', len(all_pr_data))
+        if tokens:
+            tokens.report()
+        yield from all_pr_data
+        return
+    
+    # Connect to GitHub
+    g = github_client(tokens, base_url, deadline)
+    diff_client = None
+    if analyze and full_diff:
+        from diffs import DiffClient
+        diff_client = DiffClient(tokens, base_url)
+    
+    try:
+        with telemetry.stage('fetch'):
+            for repo_name in repositories:
+                for record in iter_repository(
+                    g, repo_name, since_date, state, limit, analyze, checkpoint, deadline, diff_client
+                ):
+                    pr_count += 1
+                    yield record
+    finally:
+        if diff_client:
+            diff_client.close()
+    
+    telemetry.count('Repositories', len(repositories))
+    telemetry.count('PullRequests', pr_count)
+    if tokens:
+        tokens.report()
+
+def collect_sharded(repositories, token, days, state='open', limit=100, analyze=False, workers=2, base_url=None,
+                    engine='sync', concurrency=16, full_diff=False, deadline=None):
+    """
+    Fetches the PR records of the given repositories in parallel worker processes;
+    shards that fail are recorded on the deadline, if any.
+    """
+    from fanout import LocalShardStore, run_local, split_shards
+    
+    shards = split_shards(repositories, workers)
+    click.echo(f"Splitting {len(repositories)} repositories into {len(shards)} shards")
+    
+    store = LocalShardStore(tempfile.mkdtemp(prefix='review-shards-'))
+    collect = functools.partial(collect_repositories, token=token, days=days, state=state, limit=limit, analyze=analyze,
+                                base_url=base_url, engine=engine, concurrency=concurrency, full_diff=full_diff)
+    try:
+        with telemetry.stage('fetch'):
+            all_pr_data = run_local(shards, collect, store, deadline=deadline)
+        telemetry.count('Repositories', len(repositories))
+        telemetry.count('PullRequests', len(all_pr_data))
+        return all_pr_data
+    finally:
+        shutil.rmtree(store.directory, ignore_errors=True)
+
+def iter_repository(g, repo_name, since_date, state='open', limit=100, analyze=False, checkpoint=None, deadline=None,
+                    diff_client=None):
+    """Yields the PR records of one repository as they are collected, saving them to the checkpoint if given."""
+    click.echo(f"Reviewing repository {repo_name}")
+    
+    if checkpoint and checkpoint.is_completed(repo_name):
+        click.echo(f"Repository {repo_name} already collected in checkpoint")
+        yield from checkpoint.records_for(repo_name)
+        return
+    
+    if deadline and deadline.truncated:
+        click.echo(f"Time limit reached, skipping repository {repo_name}")
+        return
+    
+    try:
+        repository = g.get_repo(repo_name)
+        click.echo(f"Connected to repository: {repository.full_name}")
+        
+        # Get pull requests with the specified state
+        pulls = repository.get_pulls(state=state)
+        total_pulls = pulls.totalCount
+        click.echo(f"Found {total_pulls} pull requests with state '{state}'")
         
-        # Upload to S3 if bucket is provided
-        s3_url = None
-        if bucket:
-            s3_url = upload_to_s3(pdf_path, bucket)
-            click.echo(f"Report uploaded to S3: {s3_url}")
+        # Start from the checkpointed records if any, read back from the checkpoint's parts
+        last_number = checkpoint.last_number(repo_name) if checkpoint else None
+        if checkpoint:
+            yield from checkpoint.records_for(repo_name)
+        
+        # Limit the number of PRs processed
+        pr_count = checkpoint.count(repo_name) if checkpoint else 0
+        click.echo(f"Processing up to {limit} pull requests...")
+        if last_number is not None:
+            click.echo(f"Resuming after PR #{last_number} ({pr_count} already collected)")
+        
+        for pr in pulls:
+            # Limit the number of PRs processed
+            if pr_count >= limit:
+                click.echo(f"Limit of {limit} PRs reached. Use --limit to increase.")
+                break
+            
+            # Skip PRs collected before the checkpoint (PRs are listed newest first)
+            if last_number is not None and pr.number >= last_number:
+                continue
+            
+            # Filter by date if necessary
+            if pr.created_at < since_date:
+                continue
             
-        # Send email notification if requested
-        if notify and email:
-            send_notification(email, repositories, pdf_path, s3_url)
-            click.echo(f"Notification sent to: {email}")
+            # Stop fetching while there is still time to publish the report
+            if deadline and not deadline.can_fetch():
+                click.echo(f"Time limit approaching, stopping before PR #{pr.number}")
+                deadline.truncate()
+                break
             
+            pr_count += 1
+            click.echo(f"Processing PR #{pr.number} ({pr_count}/{min(total_pulls, limit)})")
+            
+            pr_info = {
+                'repo': repo_name,
+                'number': pr.number,
+                'title': pr.title,
+                'user': pr.user.login,
+                'created_at': pr.created_at,
+                'updated_at': pr.updated_at,
+                'head_sha': pr.head.sha,
+                'comments': pr.comments,
+                'additions': pr.additions,
+                'deletions': pr.deletions,
+                'changed_files': pr.changed_files,
+                'url': pr.html_url,
+                'state': pr.state,
+                'merged': pr.merged if hasattr(pr, 'merged') else False,
+                'analysis': {}
+            }
+            
+            # Perform code analysis if requested and there is time for it
+            analyzed = False
+            if analyze and deadline and not deadline.can_analyze():
+                if not deadline.analysis_skipped:
+                    click.echo("Time limit approaching, skipping code analysis for the remaining PRs")
+            elif analyze:
+                with telemetry.stage('analyze'):
+                    files = diff_client.files(repo_name, pr.number) if diff_client else None
+                    pr_info['analysis'] = analyze_pull_request(repository, pr, files)
+                telemetry.count('PullRequestsAnalyzed')
+                analyzed = True
+                # Small pause to avoid rate limit
+                time.sleep(0.5)
+            
+            if checkpoint:
+                checkpoint.record(repo_name, pr_info)
+            if deadline:
+                deadline.collected(analyzed or not analyze)
+            yield pr_info
+        
+        if checkpoint:
+            if deadline and deadline.truncated:
+                checkpoint.save()
+            else:
+                checkpoint.complete(repo_name)
+        
     except Exception as e:
-        click.echo(f"Error processing pull requests: {str(e)}", err=True)
+        click.echo(f"Error processing repository {repo_name}: {str(e)}", err=True)
+        if checkpoint:
+            checkpoint.save()
+
+def report_options(analyze=False, full_diff=False, limit=100):
+    """The run options that change what a report contains, besides its repositories, days and state."""
+    return {'analyze': analyze, 'full_diff': full_diff, 'limit': limit}
+
+def publish_report(repositories, all_pr_data, output, days, state='open', bucket='', notify=False, email=None, deadline=None,
+                   dispatcher=None, skip_unchanged=False, track_changes=False, options=None):
+    """
+    Renders the PDF report, uploads it and sends the notification. Returns the PDF path and S3 URL.
+    Unchanged reports are skipped (see fingerprints) and changes since the last run tracked (see change_index).
+    """
+    # Generate filename with repository and state information
+    if len(repositories) == 1:
+        repo_short = repositories[0].split('/')[1] if '/' in repositories[0] else repositories[0]
+    else:
+        repo_short = "multi-repos"
 
-def analyze_pull_request(repository, pr):
-    """Performs basic code analysis on the pull request."""
+    if output == 'report.pdf':  # If the user didn't specify a custom name
+        output = f"{repo_short}_{state}.pdf"
+
+    note = deadline.summary() if deadline else None
+    
+    # A partial report is neither skipped nor remembered, so the next complete run publishes in full
+    published = None
+    if skip_unchanged and not note:
+        from fingerprints import PublishedReport, report_fingerprint
+        report_options = dict(options or {}, repositories=repositories, days=days, state=state, track_changes=track_changes)
+        fingerprint = report_fingerprint(all_pr_data, report_options, ANALYSIS_VERSION)
+        published = PublishedReport.at(repositories, state, bucket, os.path.dirname(os.path.abspath(output)))
+        try:
+            last = published.unchanged(fingerprint)
+        except Exception as e:
+            click.echo(f"Error reading the fingerprint of the last report: {str(e)}", err=True)
+            last = None
+        if last:
+            telemetry.count('ReportsUnchanged')
+            click.echo(f"Report unchanged since {last['published_at']}: {last['s3_url'] or last['pdf_path']}")
+            return {'pdf_path': last['pdf_path'], 's3_url': last['s3_url'], 'unchanged': True}
+    
+    # Compare the PRs with the last indexed run
+    changes = tracked = None
+    if track_changes and not note:
+        from change_index import ChangeIndex
+        tracked = ChangeIndex.at(repositories, state, bucket, os.path.dirname(os.path.abspath(output)))
+        try:
+            entries, changes = tracked.compare(all_pr_data)
+        except Exception as e:
+            click.echo(f"Error reading the change index: {str(e)}", err=True)
+            tracked = None
+    
+    # Generate PDF report
+    with telemetry.stage('render'):
+        pdf_path = generate_pdf_report(repositories, all_pr_data, output, days, state, note, changes)
+    telemetry.gauge('ReportBytes', os.path.getsize(pdf_path))
+    click.echo(f"PDF report generated: {pdf_path}")
+    if note:
+        click.echo(note)
+    
+    # Upload to S3 if bucket is provided
+    s3_url = None
+    completed = True
+    if bucket:
+        update_index = deadline is None or deadline.can_run('index')
+        with telemetry.stage('upload'):
+            s3_url = upload_to_s3(pdf_path, bucket, update_index)
+        click.echo(f"Report uploaded to S3: {s3_url}")
+        if not update_index:
+            click.echo("Time limit approaching, web interface not updated")
+        completed = s3_url is not None and update_index
+        
+    # Send email notification if requested
+    if notify and email and deadline and not deadline.can_run('notify'):
+        click.echo("Time limit approaching, notification not sent")
+        completed = False
+    elif notify and email and dispatcher:
+        dispatcher.add(email, repositories, pdf_path, s3_url, note)
+        click.echo(f"Notification queued for: {email}")
+    elif notify and email:
+        send_notification(email, repositories, pdf_path, s3_url)
+        click.echo(f"Notification sent to: {email}")
+    
+    # Index the PRs of a report that was published, for the deltas of later runs
+    if tracked and (s3_url or not bucket):
+        try:
+            run_id = tracked.save(entries)
+            click.echo(f"PRs indexed as run {run_id}")
+            if changes:
+                save_delta(dict(changes, to=run_id), pdf_path, bucket, s3_url)
+        except Exception as e:
+            click.echo(f"Error saving the change index: {str(e)}", err=True)
+    
+    # Only a report that was fully published (uploaded, indexed, notified) is skipped by later runs
+    if published and completed:
+        try:
+            published.record(fingerprint, os.path.abspath(pdf_path), s3_url)
+        except Exception as e:
+            click.echo(f"Error saving the fingerprint of the report: {str(e)}", err=True)
+    
+    return {'pdf_path': pdf_path, 's3_url': s3_url, 'unchanged': False}
+
+# Version of the analysis rules (analyze_pull_request and the language index); bump it when
+# they change what they report, so that reports on unchanged PRs are published again
+ANALYSIS_VERSION = 2
+
+def analyze_pull_request(repository, pr, files=None):
+    """
+    Performs basic code analysis on the pull request, from its changed files or
+    from the given ones (e.g. the DiffFiles parsed from the PR's diff).
+    """
     analysis = {
         'complexity': 0,
         'issues': [],
@@ -143,19 +549,25 @@ def analyze_pull_request(repository, pr):
     
     try:
         # Get changed files
-        files = pr.get_files()
+        if files is None:
+            files = pr.get_files()
         
-        # Analyze each file
+        # Analyze each file (counted on the way, as files may be a one-pass stream)
+        file_count = 0
         for file in files:
-            # Identify language by file name
-            extension = os.path.splitext(file.filename)[1].lower()
-            language = get_language_from_extension(extension)
+            file_count += 1
+            # Identify language by file path (vendored and generated files are counted apart)
+            language = languages.classify(file.filename)
             
             # Count lines by language
             if language in analysis['languages']:
                 analysis['languages'][language] += file.changes
             else:
                 analysis['languages'][language] = file.changes
+            
+            # Vendored and generated files are not reviewed, so they raise no issues and no risk
+            if language in (languages.VENDORED, languages.GENERATED):
+                continue
                 
             # Check size of changes
             if file.changes > 500:
@@ -163,81 +575,80 @@ def analyze_pull_request(repository, pr):
                 analysis['risk_score'] += 1
                 
             # Check code patterns (simplified)
-            if file.patch:
-                if "TODO" in file.patch:
-                    analysis['issues'].append(f"TODOs found in {file.filename}")
-                if "FIXME" in file.patch:
-                    analysis['issues'].append(f"FIXMEs found in {file.filename}")
-                    analysis['risk_score'] += 1
+            markers = patch_markers(file)
+            if "TODO" in markers:
+                analysis['issues'].append(f"TODOs found in {file.filename}")
+            if "FIXME" in markers:
+                analysis['issues'].append(f"FIXMEs found in {file.filename}")
+                analysis['risk_score'] += 1
                     
         # Calculate complexity based on number of files and changes
-        analysis['complexity'] = min(10, len(list(files)) // 2)
+        analysis['complexity'] = min(10, file_count // 2)
         
     except Exception as e:
         analysis['issues'].append(f"Analysis error: {str(e)}")
         
     return analysis
 
+def patch_markers(file):
+    """Returns the markers (TODO, FIXME) in the patch of a changed file; diff files were scanned while parsing."""
+    if isinstance(file, DiffFile):
+        return file.markers
+    if not file.patch:
+        return set()
+    return {marker for marker in MARKERS if marker in file.patch}
+
 def get_language_from_extension(extension):
     """Returns the language based on the file extension."""
-    language_map = {
-        '.py': 'Python',
-        '.js': 'JavaScript',
-        '.ts': 'TypeScript',
-        '.java': 'Java',
-        '.cs': 'C#',
-        '.go': 'Go',
-        '.rb': 'Ruby',
-        '.php': 'PHP',
-        '.html': 'HTML',
-        '.css': 'CSS',
-        '.md': 'Markdown',
-        '.json': 'JSON',
-        '.yml': 'YAML',
-        '.yaml': 'YAML',
-        '.xml': 'XML',
-        '.sh': 'Shell',
-        '.bat': 'Batch',
-        '.ps1': 'PowerShell'
-    }
-    return language_map.get(extension, 'Other')
+    return languages.language_of_extension(extension)
+
+# PRs listed per category in the changes section of the report; the delta JSON lists them all
+MAX_LISTED_CHANGES = 25
+
+def generate_pdf_report(repositories, pr_data, output_filename, days_filter, state, note=None, changes=None):
+    """
+    Generates a PDF report with pull request data, optionally flagged with a partial-report note
+    and with a section on the changes since the last run (a change_index delta).
+    
+    pr_data is a list of PR records or a RecordSpool; it is read once per section and
+    the PR details are built while the PDF is written, so a spooled report is not
+    held in memory.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.units import inch
+    import rendering
 
-def generate_pdf_report(repositories, pr_data, output_filename, days_filter, state):
-    """Generates a PDF report with pull request data."""
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # Create PDF document
     doc = SimpleDocTemplate(output_filename, pagesize=letter)
-    styles = getSampleStyleSheet()
+    styles = rendering.styles()
     elements = []
     
-    # Title
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=16,
-        alignment=1,
-        spaceAfter=12
-    )
-    
     repo_names = ", ".join(repositories) if len(repositories) <= 3 else f"{len(repositories)} repositories"
-    elements.append(Paragraph(f"Pull Request Report - {repo_names}", title_style))
+    elements.append(Paragraph(f"Pull Request Report - {repo_names}", styles["ReportTitle"]))
     elements.append(Paragraph(f"Generated on: {now}", styles["Normal"]))
     elements.append(Paragraph(f"Period: last {days_filter} days", styles["Normal"]))
     elements.append(Paragraph(f"State: {state}", styles["Normal"]))
+    if note:
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph(note, styles["Note"]))
     elements.append(Spacer(1, 0.25*inch))
     
     # Summary
     elements.append(Paragraph(f"Total Pull Requests: {len(pr_data)}", styles["Heading2"]))
     
-    # Summary by repository
-    repo_counts = {}
-    for pr in pr_data:
-        repo_name = pr['repo']
-        if repo_name in repo_counts:
-            repo_counts[repo_name] += 1
-        else:
-            repo_counts[repo_name] = 1
+    # Summary by repository (kept up to date by a spool as the records were written)
+    repo_counts = getattr(pr_data, 'repo_counts', None)
+    if repo_counts is None:
+        repo_counts = {}
+        for pr in pr_data:
+            repo_name = pr['repo']
+            if repo_name in repo_counts:
+                repo_counts[repo_name] += 1
+            else:
+                repo_counts[repo_name] = 1
     
     if len(repo_counts) > 1:
         elements.append(Spacer(1, 0.1*inch))
@@ -245,92 +656,50 @@ def generate_pdf_report(repositories, pr_data, output_filename, days_filter, sta
         for repo_name, count in repo_counts.items():
             elements.append(Paragraph(f"• {repo_name}: {count} PRs", styles["Normal"]))
     
+    # Changes since the last run
+    if changes:
+        from xml.sax.saxutils import escape
+        from change_index import LABELS, summarize
+        
+        published_at = datetime.fromisoformat(changes['from_published_at']).strftime("%Y-%m-%d %H:%M")
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph(f"Changes since the last run ({published_at} UTC)", styles["Heading3"]))
+        elements.append(Paragraph(summarize(changes), styles["Normal"]))
+        for category in ('new', 'merged', 'closed', 'reopened', 'removed', 'new_issues'):
+            listed = changes[category][:MAX_LISTED_CHANGES]
+            for pr in listed:
+                line = f"• {LABELS[category]}: [{pr['repo']}] PR #{pr['number']}: {escape(pr['title'])}"
+                if category == 'new_issues':
+                    line += " - " + escape("; ".join(pr['issues']))
+                elements.append(Paragraph(line, styles["Normal"]))
+            if len(changes[category]) > len(listed):
+                more = len(changes[category]) - len(listed)
+                elements.append(Paragraph(f"• {LABELS[category]}: {more} more PRs", styles["Normal"]))
+    
     elements.append(Spacer(1, 0.2*inch))
     
     # PR table
     if pr_data:
-        # Table header
-        table_data = [["Repo", "#", "Title", "Author", "State", "Created on", "Files", "+/-"]]
-        
-        # Table data
-        for pr in pr_data:
-            created_date = pr['created_at'].strftime("%Y-%m-%d")
-            changes = f"{pr['additions']}/{pr['deletions']}"
-            repo_short = pr['repo'].split('/')[1] if '/' in pr['repo'] else pr['repo']
-            
-            # Determine state for display
-            pr_state = pr['state']
-            if pr.get('merged', False):
-                pr_state = "merged"
-                
-            table_data.append([
-                repo_short,
-                str(pr['number']),
-                pr['title'][:40] + ('...' if len(pr['title']) > 40 else ''),
-                pr['user'],
-                pr_state,
-                created_date,
-                str(pr['changed_files']),
-                changes
-            ])
-        
-        # Create table
-        table = Table(table_data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(table)
+        elements.append(rendering.summary_table([rendering.summary_row(pr) for pr in pr_data]))
         
         # Details of each PR
         elements.append(Spacer(1, 0.2*inch))
         elements.append(Paragraph("Pull Request Details", styles["Heading2"]))
         
-        for pr in pr_data:
-            elements.append(Spacer(1, 0.1*inch))
-            elements.append(Paragraph(f"[{pr['repo']}] PR #{pr['number']}: {pr['title']}", styles["Heading3"]))
-            elements.append(Paragraph(f"Author: {pr['user']}", styles["Normal"]))
-            elements.append(Paragraph(f"State: {pr['state']}{' (merged)' if pr.get('merged', False) else ''}", styles["Normal"]))
-            elements.append(Paragraph(f"Created on: {pr['created_at'].strftime('%Y-%m-%d %H:%M:%S')}", styles["Normal"]))
-            elements.append(Paragraph(f"Last updated: {pr['updated_at'].strftime('%Y-%m-%d %H:%M:%S')}", styles["Normal"]))
-            elements.append(Paragraph(f"Comments: {pr['comments']}", styles["Normal"]))
-            elements.append(Paragraph(f"Changed files: {pr['changed_files']}", styles["Normal"]))
-            elements.append(Paragraph(f"Additions/Deletions: +{pr['additions']}/-{pr['deletions']}", styles["Normal"]))
-            elements.append(Paragraph(f"URL: {pr['url']}", styles["Normal"]))
-            
-            # Add analysis results if available
-            if pr.get('analysis') and (pr['analysis'].get('issues') or pr['analysis'].get('languages')):
-                elements.append(Paragraph("Code Analysis:", styles["Heading4"]))
-                
-                if 'languages' in pr['analysis'] and pr['analysis']['languages']:
-                    lang_text = ", ".join([f"{lang}: {lines}" for lang, lines in pr['analysis']['languages'].items()])
-                    elements.append(Paragraph(f"Languages: {lang_text}", styles["Normal"]))
-                
-                if 'complexity' in pr['analysis']:
-                    elements.append(Paragraph(f"Estimated complexity: {pr['analysis']['complexity']}/10", styles["Normal"]))
-                
-                if 'risk_score' in pr['analysis']:
-                    elements.append(Paragraph(f"Risk score: {pr['analysis']['risk_score']}", styles["Normal"]))
-                
-                if pr['analysis'].get('issues'):
-                    elements.append(Paragraph("Identified issues:", styles["Normal"]))
-                    for issue in pr['analysis']['issues']:
-                        elements.append(Paragraph(f"• {issue}", styles["Normal"]))
-            
-            elements.append(Spacer(1, 0.1*inch))
+        # Built as ReportLab reaches them, one block per PR
+        def details():
+            for pr in pr_data:
+                yield rendering.pr_details(pr, space_before=0.1*inch)
+                yield Spacer(1, 0.1*inch)
     
     # Build the PDF
-    doc.build(elements)
+    doc.build(StreamedList(itertools.chain(elements, details())) if pr_data else elements)
     return output_filename
 
-def upload_to_s3(file_path, bucket_name):
-    """Uploads the PDF file to an S3 bucket."""
+def upload_to_s3(file_path, bucket_name, update_index=True):
+    """Uploads the PDF file to an S3 bucket and, unless disabled, updates the web interface."""
     try:
+        import boto3
         s3_client = boto3.client('s3')
         
         # Get the base filename without extension
@@ -346,16 +715,20 @@ def upload_to_s3(file_path, bucket_name):
         object_key = f"reports/{date_str}/{unique_file_name}"
         
         s3_client.upload_file(file_path, bucket_name, object_key)
+        telemetry.count('S3Calls')
+        telemetry.count('BytesUploaded', os.path.getsize(file_path))
         
         # Generate public URL if the bucket has public access
         url = f"https://{bucket_name}.s3.amazonaws.com/{object_key}"
         
         # Update the web interface
-        try:
-            from web_interface import generate_index_html
-            generate_index_html(bucket_name)
-        except Exception as e:
-            print(f"Error updating web interface: {str(e)}")
+        if update_index:
+            try:
+                from web_interface import generate_index_html
+                with telemetry.stage('index'):
+                    generate_index_html(bucket_name)
+            except Exception as e:
+                print(f"Error updating web interface: {str(e)}")
         
         return url
     except Exception as e:
@@ -364,45 +737,11 @@ def upload_to_s3(file_path, bucket_name):
 
 def send_notification(email, repositories, report_path, s3_url=None):
     """Sends an email notification when the report is ready."""
-    try:
-        # Use SNS to send email
-        sns_client = boto3.client('sns')
-        
-        # Create SNS topic if it doesn't exist
-        topic_name = "github-report-notifications"
-        topic_response = sns_client.create_topic(Name=topic_name)
-        topic_arn = topic_response['TopicArn']
-        
-        # Subscribe email to the topic if not already subscribed
-        sns_client.subscribe(
-            TopicArn=topic_arn,
-            Protocol='email',
-            Endpoint=email
-        )
-        
-        # Prepare message
-        repo_names = ", ".join(repositories) if len(repositories) <= 3 else f"{len(repositories)} repositories"
-        subject = f"Pull Request Report - {repo_names}"
-        
-        message = f"The Pull Request report for {repo_names} is ready.\n\n"
-        if s3_url:
-            message += f"You can access it at: {s3_url}\n\n"
-        else:
-            message += f"The report was generated as {os.path.basename(report_path)}.\n\n"
-            
-        message += "This is an automated email, please do not reply."
-        
-        # Send notification
-        sns_client.publish(
-            TopicArn=topic_arn,
-            Subject=subject,
-            Message=message
-        )
-        
-        return True
-    except Exception as e:
-        click.echo(f"Error sending notification: {str(e)}", err=True)
-        return False
+    from notifications import NotificationDispatcher
+    
+    dispatcher = NotificationDispatcher()
+    dispatcher.add(email, repositories, report_path, s3_url)
+    return dispatcher.flush()
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
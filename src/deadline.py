@@ -0,0 +1,116 @@
+import time
+
+# Seconds kept free before the hard Lambda timeout so the handler can still return
+SAFETY_MARGIN = 10.0
+
+# Estimated seconds each stage needs: (fixed cost, cost per PR in the report)
+STAGE_BUDGETS = {
+    'fetch': (0.0, 1.0),
+    'analyze': (0.0, 2.0),
+    'render': (3.0, 0.02),
+    'upload': (5.0, 0.0),
+    'index': (10.0, 0.0),
+    'notify': (3.0, 0.0),
+}
+
+# Stages that run after fetching, in order; upload is the one that publishes the report
+PUBLISH_STAGES = ('render', 'upload', 'index', 'notify')
+REQUIRED_STAGES = ('render', 'upload')
+
+class Deadline:
+    """
+    Time budget of a review run.
+
+    Every stage has an estimated cost in STAGE_BUDGETS. Before fetching or analyzing
+    another PR the pipeline checks that enough time is left to still render and
+    upload the report afterwards. When time runs short it first skips analysis for
+    the remaining PRs, then stops fetching and marks the report as truncated.
+    Optional stages (index regeneration, notification) are skipped last. Shards
+    whose workers failed are recorded too, as their PRs are missing from the report.
+    """
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+        self.pr_count = 0
+        self.truncated = False
+        self.analysis_skipped = 0
+        self.failed_shards = []
+        self.skipped_stages = []
+
+    @classmethod
+    def from_context(cls, context, safety_margin=SAFETY_MARGIN):
+        """Creates the deadline from a Lambda context's remaining execution time."""
+        remaining = context.get_remaining_time_in_millis() / 1000.0
+        return cls(max(0.0, remaining - safety_margin))
+
+    def for_report(self):
+        """
+        Returns a deadline with the same time limit and its own counters, for one of
+        several reports rendered in the same run.
+        """
+        deadline = Deadline(0, self.clock)
+        deadline.expires_at = self.expires_at
+        return deadline
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self.clock())
+
+    def budget(self, stage, pr_count=None):
+        """Returns the seconds the stage is expected to take for the given number of PRs."""
+        fixed, per_pr = STAGE_BUDGETS[stage]
+        return fixed + per_pr * (self.pr_count if pr_count is None else pr_count)
+
+    def publish_reserve(self, pr_count=None, stages=REQUIRED_STAGES):
+        """Returns the seconds that must stay free to publish a report of pr_count PRs."""
+        return sum(self.budget(stage, pr_count) for stage in stages)
+
+    def can_fetch(self):
+        """Whether one more PR can be fetched and the report still be published in time."""
+        pr_count = self.pr_count + 1
+        return self.remaining() >= self.budget('fetch', 1) + self.publish_reserve(pr_count)
+
+    def can_analyze(self):
+        """Whether one more PR can be fetched and analyzed and the report still be published in time."""
+        pr_count = self.pr_count + 1
+        needed = self.budget('fetch', 1) + self.budget('analyze', 1) + self.publish_reserve(pr_count)
+        return self.remaining() >= needed
+
+    def can_wait(self, seconds):
+        """Whether the run can wait `seconds` (for a rate limit to reset) and still fetch one more PR in time."""
+        pr_count = self.pr_count + 1
+        return self.remaining() - seconds >= self.budget('fetch', 1) + self.publish_reserve(pr_count)
+
+    def can_run(self, stage):
+        """Whether an optional publishing stage fits in the remaining time."""
+        if self.remaining() >= self.budget(stage):
+            return True
+        self.skipped_stages.append(stage)
+        return False
+
+    def collected(self, analyzed=True):
+        """Records that a PR was added to the report."""
+        self.pr_count += 1
+        if not analyzed:
+            self.analysis_skipped += 1
+
+    def truncate(self):
+        self.truncated = True
+
+    def shard_failed(self, shard_id):
+        """Records that the records of a shard are missing from the report."""
+        self.failed_shards.append(shard_id)
+
+    def summary(self):
+        """Returns a note describing how the run was degraded, or None if it was not."""
+        notes = []
+        if self.truncated:
+            notes.append(f"stopped after {self.pr_count} PRs because the time limit was reached")
+        if self.analysis_skipped:
+            notes.append(f"code analysis skipped for {self.analysis_skipped} PRs")
+        if self.failed_shards:
+            shards = ", ".join(str(shard_id) for shard_id in self.failed_shards)
+            notes.append(f"PRs of failed shards ({shards}) missing")
+        if not notes:
+            return None
+        return "Partial report: " + "; ".join(notes) + "."
@@ -0,0 +1,204 @@
+"""
+Whole-PR unified diffs (review-code --full-diff).
+
+GitHub lists the changed files of a PR 30 (at most 100) per page and omits
+the patch of large files, so TODO/FIXME markers in big changes go unnoticed.
+A PR's diff (media type application/vnd.github.diff) holds every file in one
+response. DiffParser reads it line by line, file by file and hunk by hunk,
+keeping only per-file counters, so a huge diff never sits in memory whole.
+"""
+import click
+import os
+import re
+
+import telemetry
+from token_pool import TokenPool
+
+DEFAULT_BASE_URL = 'https://api.github.com'
+DIFF_MEDIA_TYPE = 'application/vnd.github.diff'
+
+# Markers looked for in the patch lines, like analyze_pull_request does in file.patch
+MARKERS = ('TODO', 'FIXME')
+
+HUNK_HEADER = re.compile(r'^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@')
+
+class DiffFile:
+    """A changed file of a diff: its path, line counts and the markers found in its hunks."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.previous_filename = None
+        self.status = 'modified'
+        self.additions = 0
+        self.deletions = 0
+        self.hunks = 0
+        self.markers = set()
+
+    @property
+    def changes(self):
+        return self.additions + self.deletions
+
+    def __repr__(self):
+        return f"DiffFile({self.filename!r}, +{self.additions}, -{self.deletions})"
+
+def _strip_path(path, prefix):
+    path = path.split('\t')[0].strip()
+    if len(path) > 1 and path[0] == path[-1] == '"':
+        path = path[1:-1]
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+class DiffParser:
+    """
+    Incremental unified diff parser: feed() it the lines of a `git diff` and it
+    returns each DiffFile once the file's last line has been read.
+
+    Hunk line counts from the @@ headers tell content lines apart from the next
+    file's headers, so a removed line starting with "--" is not taken for a
+    "--- a/path" header.
+    """
+
+    def __init__(self, markers=MARKERS):
+        self.markers = markers
+        self.file = None
+        self._old_lines = 0
+        self._new_lines = 0
+
+    def _scan(self, line):
+        for marker in self.markers:
+            if marker in line:
+                self.file.markers.add(marker)
+
+    def feed(self, line):
+        """Consumes one line (without or with its newline); returns the DiffFile it completed, if any."""
+        line = line.rstrip('\r\n')
+        file = self.file
+
+        if file and (self._old_lines > 0 or self._new_lines > 0):
+            tag = line[:1]
+            if tag == '+':
+                file.additions += 1
+                self._new_lines -= 1
+            elif tag == '-':
+                file.deletions += 1
+                self._old_lines -= 1
+            elif tag == '\\':
+                # "\ No newline at end of file"
+                return None
+            else:
+                self._old_lines -= 1
+                self._new_lines -= 1
+            self._scan(line)
+            return None
+
+        if line.startswith('diff --git '):
+            completed = self.file
+            paths = line[len('diff --git '):]
+            # Best guess until the ---/+++ or rename lines name the file unambiguously
+            self.file = DiffFile(_strip_path(paths.rsplit(' b/', 1)[-1], ''))
+            return completed
+        if file is None:
+            return None
+
+        hunk = HUNK_HEADER.match(line)
+        if hunk:
+            file.hunks += 1
+            self._old_lines = int(hunk.group(1)) if hunk.group(1) is not None else 1
+            self._new_lines = int(hunk.group(2)) if hunk.group(2) is not None else 1
+            self._scan(line)
+        elif line.startswith('+++ '):
+            path = line[4:]
+            if path.strip() != '/dev/null':
+                file.filename = _strip_path(path, 'b/')
+        elif line.startswith('--- '):
+            path = line[4:]
+            if path.strip() != '/dev/null':
+                file.filename = _strip_path(path, 'a/')
+        elif line.startswith('new file mode'):
+            file.status = 'added'
+        elif line.startswith('deleted file mode'):
+            file.status = 'removed'
+        elif line.startswith('rename from '):
+            file.status = 'renamed'
+            file.previous_filename = line[len('rename from '):]
+        elif line.startswith('rename to '):
+            file.filename = line[len('rename to '):]
+        return None
+
+    def close(self):
+        """Returns the last file of the diff."""
+        completed, self.file = self.file, None
+        return completed
+
+def iter_lines(chunks):
+    """Splits a stream of byte chunks into lines, at line feeds only (code may contain other line breaks)."""
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        yield from lines
+    if pending:
+        yield pending
+
+def parse_unified_diff(lines):
+    """Yields the DiffFile of every file in the diff lines, as soon as each one is complete."""
+    parser = DiffParser()
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        completed = parser.feed(line)
+        if completed:
+            yield completed
+    last = parser.close()
+    if last:
+        yield last
+
+def diff_url(base_url, repo_name, number):
+    base_url = (base_url or os.environ.get('GITHUB_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+    return f"{base_url}/repos/{repo_name}/pulls/{number}"
+
+class DiffClient:
+    """Fetches PR diffs, one request per PR, over a keep-alive HTTP session."""
+
+    def __init__(self, token, base_url=None):
+        import requests
+        self.base_url = base_url
+        self.pool = TokenPool.of(token)
+        self.session = requests.Session()
+        self.session.headers['Accept'] = DIFF_MEDIA_TYPE
+
+    def _get(self, url):
+        """Sends the request with the pool's token, again with another token if it was rate limited."""
+        while True:
+            state = self.pool.acquire() if self.pool else None
+            headers = {'Authorization': f"token {state.token}"} if state else {}
+            try:
+                response = self.session.get(url, headers=headers, stream=True)
+            except Exception:
+                if state:
+                    self.pool.release(state)
+                raise
+            telemetry.count('GitHubRequests')
+            if not (state and self.pool.release(state, response.status_code, response.headers)):
+                return response
+            response.close()
+
+    def files(self, repo_name, number):
+        """
+        Requests the diff of a PR and returns a generator of its DiffFiles parsed
+        from the response stream, or None (after saying why) if the diff is not
+        available, e.g. because GitHub refuses diffs that are too large.
+        """
+        try:
+            response = self._get(diff_url(self.base_url, repo_name, number))
+            response.raise_for_status()
+        except Exception as e:
+            click.echo(f"Diff of PR #{number} not available ({str(e)}), using the file list", err=True)
+            return None
+        return self._stream(response)
+
+    def _stream(self, response):
+        with response:
+            yield from parse_unified_diff(iter_lines(response.iter_content(chunk_size=64 * 1024)))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,205 @@
+import click
+import io
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+import telemetry
+from records import read_ndjson, write_ndjson
+
+# Seconds a worker invocation may run: Lambda's maximum timeout, unless the caller knows the function's
+WORKER_TIMEOUT = 900
+
+# Seconds the coordinator waits for a worker's response beyond the worker's timeout
+INVOKE_MARGIN = 10
+
+def split_shards(repositories, shard_count):
+    """Splits the repositories into at most shard_count contiguous shards of near-equal size."""
+    shard_count = max(1, min(shard_count, len(repositories)))
+    size, extra = divmod(len(repositories), shard_count)
+    shards = []
+    start = 0
+    for shard_id in range(shard_count):
+        end = start + size + (1 if shard_id < extra else 0)
+        shards.append(repositories[start:end])
+        start = end
+    return shards
+
+class LocalShardStore:
+    """Stores intermediate shard results as NDJSON files in a local directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, shard_id):
+        return os.path.join(self.directory, f"shard-{shard_id}.ndjson")
+
+    def put(self, shard_id, records):
+        with open(self.path(shard_id), 'w') as f:
+            return write_ndjson(records, f)
+
+    def get(self, shard_id):
+        with open(self.path(shard_id)) as f:
+            return list(read_ndjson(f))
+
+    def delete(self, shard_ids):
+        for shard_id in shard_ids:
+            if os.path.exists(self.path(shard_id)):
+                os.remove(self.path(shard_id))
+
+class S3ShardStore:
+    """Stores intermediate shard results as NDJSON objects under runs/<run_id>/ in S3."""
+
+    def __init__(self, bucket_name, run_id):
+        self.bucket_name = bucket_name
+        self.run_id = run_id
+
+    def key(self, shard_id):
+        return f"runs/{self.run_id}/shard-{shard_id}.ndjson"
+
+    def put(self, shard_id, records):
+        import boto3
+        buffer = io.StringIO()
+        count = write_ndjson(records, buffer)
+        body = buffer.getvalue().encode('utf-8')
+        boto3.client('s3').put_object(
+            Bucket=self.bucket_name,
+            Key=self.key(shard_id),
+            Body=body,
+            ContentType='application/x-ndjson'
+        )
+        telemetry.count('S3Calls')
+        telemetry.count('BytesUploaded', len(body))
+        return count
+
+    def get(self, shard_id):
+        import boto3
+        response = boto3.client('s3').get_object(Bucket=self.bucket_name, Key=self.key(shard_id))
+        telemetry.count('S3Calls')
+        return list(read_ndjson(response['Body'].iter_lines()))
+
+    def delete(self, shard_ids):
+        """Deletes the objects of the given shards (missing ones are ignored)."""
+        import boto3
+        keys = [{'Key': self.key(shard_id)} for shard_id in shard_ids]
+        client = boto3.client('s3')
+        # DeleteObjects takes at most 1000 keys per request
+        for start in range(0, len(keys), 1000):
+            client.delete_objects(Bucket=self.bucket_name, Delete={'Objects': keys[start:start + 1000], 'Quiet': True})
+            telemetry.count('S3Calls')
+
+def _run_local_shard(collect, store, shard_id, repositories):
+    """Process pool entry point: collects one shard and stores its records."""
+    return store.put(shard_id, collect(repositories))
+
+def run_local(shards, collect, store, max_workers=None, deadline=None):
+    """
+    Runs each shard in a local process pool.
+
+    collect(repositories) must be a picklable top-level function returning the PR
+    records for the given repositories. Returns the merged records in shard order;
+    failed shards are recorded on the deadline, if any, so the report is marked partial.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers or len(shards)) as executor:
+        futures = [
+            executor.submit(_run_local_shard, collect, store, shard_id, repositories)
+            for shard_id, repositories in enumerate(shards)
+        ]
+        completed = _wait_for_shards(futures, deadline)
+    return merge_shards(store, completed)
+
+def run_lambda(shards, function_name, base_event, store, deadline=None, timeout=WORKER_TIMEOUT):
+    """
+    Invokes one worker Lambda per shard and waits for all of them.
+
+    Each worker receives base_event plus mode=worker, its shard id and repositories,
+    and writes its records to the shared S3 store. Returns the merged records; the
+    shard objects are deleted once they are merged.
+
+    Workers are invoked synchronously, once each: the client waits up to the
+    worker's timeout (seconds) for the response and never retries, as a retried
+    invocation would start a second worker writing the same shard.
+
+    With a deadline, workers get a time budget that leaves the coordinator enough
+    time to publish, and report back whether they had to truncate their shard.
+    The coordinator stops waiting at the end of that budget, so a hung worker
+    cannot outlive it. Failed and late shards are recorded on the deadline so the
+    report is marked partial.
+    """
+    import boto3
+    from botocore.config import Config
+
+    read_timeout = timeout + INVOKE_MARGIN
+    reserve = 0.0
+    if deadline:
+        # Upper bound of the merged report size, used to reserve rendering time
+        max_prs = base_event.get('limit', 100) * sum(len(repositories) for repositories in shards)
+        reserve = deadline.publish_reserve(max_prs)
+        budget = max(0.0, deadline.remaining() - reserve)
+        base_event = dict(base_event, time_budget=budget)
+        read_timeout = max(1, min(read_timeout, math.ceil(budget)))
+    lambda_client = boto3.client('lambda', config=Config(read_timeout=read_timeout, retries={'max_attempts': 0}))
+
+    def invoke(shard_id, repositories):
+        event = dict(base_event, mode='worker', run_id=store.run_id, shard=shard_id, repo=",".join(repositories))
+        response = lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType='RequestResponse',
+            Payload=json.dumps(event).encode('utf-8')
+        )
+        if response.get('FunctionError'):
+            raise RuntimeError(f"Worker for shard {shard_id} failed: {response['Payload'].read().decode('utf-8')}")
+        return json.loads(json.loads(response['Payload'].read())['body'])
+
+    executor = ThreadPoolExecutor(max_workers=len(shards))
+    try:
+        futures = [executor.submit(invoke, shard_id, repositories) for shard_id, repositories in enumerate(shards)]
+        completed = _wait_for_shards(futures, deadline, reserve)
+        all_pr_data = merge_shards(store, completed)
+    finally:
+        # Invocations still running are abandoned; their shards are not merged
+        executor.shutdown(wait=False)
+        try:
+            store.delete(range(len(shards)))
+        except Exception as e:
+            click.echo(f"Error deleting the shards of run {store.run_id}: {str(e)}", err=True)
+
+    if deadline:
+        for shard_id in completed:
+            result = futures[shard_id].result()
+            if result.get('truncated'):
+                deadline.truncate()
+            deadline.analysis_skipped += result.get('analysis_skipped', 0)
+        deadline.pr_count = len(all_pr_data)
+    return all_pr_data
+
+def _wait_for_shards(futures, deadline=None, reserve=0.0):
+    """
+    Waits for every shard, with a deadline until `reserve` seconds are left, and
+    returns the ids of those that finished successfully; the failed and unfinished
+    ones are recorded on the deadline, if any.
+    """
+    completed = []
+    for shard_id, future in enumerate(futures):
+        wait = deadline.remaining() - reserve if deadline else math.inf
+        try:
+            future.result(timeout=None if math.isinf(wait) else max(0.0, wait))
+            completed.append(shard_id)
+        except FuturesTimeout:
+            click.echo(f"Shard {shard_id} did not finish in time", err=True)
+            if deadline:
+                deadline.shard_failed(shard_id)
+        except Exception as e:
+            click.echo(f"Error processing shard {shard_id}: {str(e)}", err=True)
+            if deadline:
+                deadline.shard_failed(shard_id)
+    return completed
+
+def merge_shards(store, shard_ids):
+    """Reads back the given shards and returns all their records in shard order."""
+    all_pr_data = []
+    for shard_id in shard_ids:
+        all_pr_data.extend(store.get(shard_id))
+    return all_pr_data
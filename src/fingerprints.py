@@ -0,0 +1,72 @@
+"""
+Change detection for published reports.
+
+A report is a function of its inputs: the PRs in scope (number, updated_at,
+head SHA and analysis results), the version of the analysis rules and the
+options that change the report (days, analysis, full diff, limit, change
+tracking). publish_report hashes them into a fingerprint
+and keeps the fingerprint of the last report published for the same
+repositories and state, in the bucket (fingerprints/) or next to the report.
+When a run finds the same fingerprint, nothing changed since that report and
+rendering, upload, index update and notification are skipped.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+from storage import store_at, store_name
+
+FINGERPRINT_VERSION = 2
+
+def report_fingerprint(records, options, rules_version):
+    """Returns the SHA-256 of the report inputs; the order of the records does not matter."""
+    pulls = sorted(
+        (record['repo'], record['number'], _isoformat(record.get('updated_at')), record.get('head_sha'),
+         json.dumps(record.get('analysis') or {}, sort_keys=True))
+        for record in records
+    )
+    inputs = {'version': FINGERPRINT_VERSION, 'rules': rules_version, 'options': options, 'pulls': pulls}
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def fingerprint_location(repositories, state, bucket='', directory='.'):
+    """Returns where the fingerprint of the reports on the repositories and state is kept."""
+    name = store_name(repositories, state)
+    if bucket:
+        return f"s3://{bucket}/fingerprints/{name}"
+    return os.path.join(directory, '.fingerprints', name)
+
+class PublishedReport:
+    """The fingerprint, PDF path and S3 URL of the last report published for a key."""
+
+    def __init__(self, store):
+        self.store = store
+
+    @classmethod
+    def at(cls, repositories, state, bucket='', directory='.'):
+        return cls(store_at(fingerprint_location(repositories, state, bucket, directory)))
+
+    def unchanged(self, fingerprint):
+        """
+        Returns the last published report ({'fingerprint', 'pdf_path', 's3_url',
+        'published_at'}) if it has the given fingerprint and can still be found,
+        otherwise None.
+        """
+        last = self.store.load()
+        if not last or last.get('fingerprint') != fingerprint:
+            return None
+        # Without a bucket the report is only on disk, and may have been removed since
+        if not last.get('s3_url') and not os.path.exists(last.get('pdf_path') or ''):
+            return None
+        return last
+
+    def record(self, fingerprint, pdf_path, s3_url=None):
+        self.store.save({
+            'fingerprint': fingerprint,
+            'pdf_path': pdf_path,
+            's3_url': s3_url,
+            'published_at': datetime.now(timezone.utc).isoformat(),
+        })
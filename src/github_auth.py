@@ -0,0 +1,93 @@
+"""
+PyGithub authentication from a token pool, recording API usage.
+
+Imported by cli.github_client only, as it loads PyGithub.
+"""
+from github import Auth
+from github.GithubRetry import GithubRetry
+from github.Requester import WithRequester
+
+import telemetry
+
+class PooledToken(Auth.Auth, WithRequester["PooledToken"]):
+    """
+    Token authentication taking the token of every request from a TokenPool
+    and counting the GitHub requests it authenticates.
+
+    PyGithub reads the token once for every request it sends, so each request
+    gets the token with the most quota left (retries inside urllib3 reuse it
+    and are not counted). The requester's requestJson, which every REST call
+    goes through, is wrapped to hand each response back to the pool and to
+    send a request that hit a token's rate limit again with another token.
+    """
+
+    def __init__(self, pool):
+        super().__init__()
+        self.pool = pool
+        self.current = None
+
+    @property
+    def token_type(self):
+        return 'token'
+
+    @property
+    def token(self):
+        telemetry.count('GitHubRequests')
+        if self.current:
+            # The previous request did not go through requestJson
+            self.pool.release(self.current)
+        self.current = self.pool.acquire()
+        return self.current.token
+
+    @property
+    def _masked_token(self):
+        return 'token *****'
+
+    def withRequester(self, requester):
+        super().withRequester(requester)
+        request_json = requester.requestJson
+
+        def failover(*args, **kwargs):
+            while True:
+                try:
+                    status, headers, output = request_json(*args, **kwargs)
+                except Exception:
+                    self._release()
+                    raise
+                message = output if isinstance(output, str) else ''
+                if not self._release(status, headers, message):
+                    return status, headers, output
+
+        requester.requestJson = failover
+        return self
+
+    def _release(self, *response):
+        state, self.current = self.current, None
+        return bool(state) and self.pool.release(state, *response)
+
+class PoolRetry(GithubRetry):
+    """
+    GithubRetry that leaves rate limited responses to PooledToken, which fails
+    over to another token, instead of waiting for the limit to reset, as long
+    as the pool has another token available. With a deadline, it does not wait
+    for a reset that would leave no time to fetch and publish.
+    """
+
+    def __init__(self, pool=None, deadline=None, **kwargs):
+        self.pool = pool
+        self.deadline = deadline
+        super().__init__(**kwargs)
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.pool = self.pool
+        retry.deadline = self.deadline
+        return retry
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code in (403, 429) and self.pool is not None:
+            if self.pool.can_fail_over():
+                return False
+            if self.deadline and not self.deadline.can_wait(self.pool.reset_in()):
+                return False
+        return super().is_retry(method, status_code, has_retry_after)
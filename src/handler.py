@@ -1,6 +1,13 @@
+import click
 import json
 import os
-from cli import review_code
+from cli import review_code, collect_repositories, collect_sharded, iter_repositories, publish_report, report_options
+import telemetry
+from deadline import Deadline
+from pipeline import RecordSpool, bounded
+
+# Number of worker invocations used by coordinator mode when the event sets none
+DEFAULT_SHARDS = 10
 
 def handler(event, context):
     """
@@ -13,7 +20,40 @@ def handler(event, context):
     - notify: Whether to send email notification (true/false)
     - email: Email for notification (required if notify=true)
     - state: State of PRs to be analyzed (open, closed, all)
+    - limit: Limit of PRs to be processed per repository (default: 100)
+    - mode: 'single' (default), 'coordinator' to split the repositories into
+      shards processed by worker invocations, or 'worker' (used internally)
+    - shards: Number of shards in coordinator mode (default: 10)
+    - checkpoint: Whether to checkpoint progress under checkpoints/ in the bucket (true/false)
+    - resume: Whether to continue from the last checkpoint of the same run (true/false)
+    - reports: Optional list of report requests (each with its own repo, state, days...)
+      rendered in one invocation; their notifications are merged into one digest email
+    - profile: Whether to profile CPU and memory per stage; the profiles are uploaded
+      next to the report (true/false, single mode)
+    - engine: 'sync' (default, PyGithub) or 'async' to fetch PRs concurrently
+      (not combined with checkpoint)
+    - full_diff: Whether to analyze each PR from its whole diff, fetched in one request (true/false)
+    - skip_unchanged: Whether to skip rendering, upload and notification when no PR changed
+      since the last report on the same repositories and state (true/false)
+    - track_changes: Whether to index the PRs of the run and publish what changed since the
+      last indexed run, in the report and as <report>.delta.json (true/false)
+
+    The run is budgeted against the invocation's remaining time: when it runs
+    short, analysis is skipped and then a partial report is published before
+    the Lambda timeout.
+
+    Each invocation prints its metrics (stage durations, GitHub/S3/SNS calls) as
+    one CloudWatch Embedded Metric Format line.
     """
+    mode = event.get('mode', 'single')
+    telemetry.start(dict(telemetry.default_dimensions(), Mode=mode))
+    try:
+        return process_event(event, context)
+    finally:
+        telemetry.emit()
+
+def process_event(event, context):
+    """Runs the review requested by a Lambda event."""
     # Get parameters from the event
     repo = event.get('repo', 'vec21/aws-challenge-automation')
     days = event.get('days', 7)
@@ -21,6 +61,8 @@ def handler(event, context):
     notify = event.get('notify', False)
     email = event.get('email')
     state = event.get('state', 'open')
+    limit = event.get('limit', 100)
+    mode = event.get('mode', 'single')
     
     # Get GitHub token from environment variables
     token = os.getenv('GITHUB_TOKEN')
@@ -30,24 +72,67 @@ def handler(event, context):
     # Get bucket name from environment variables
     bucket = os.getenv('BUCKET_NAME')
     
+    if mode == 'worker':
+        return run_worker(event, context, token, bucket)
+    
     # Generate output filename
     timestamp = context.aws_request_id if context else 'local'
     output = f"/tmp/report-{timestamp}.pdf"
     
-    # Prepare arguments for the CLI
-    args = ['--repo', repo, '--token', token, '--days', str(days), '--output', output, '--state', state]
+    if 'reports' in event:
+        results = run_batch(event, context, token, bucket, timestamp)
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'Reviews completed successfully',
+                'reports': [result['s3_url'] or result['pdf_path'] for result in results]
+            })
+        }
+    
+    if mode == 'coordinator':
+        run_coordinator(event, context, token, bucket, output)
+    else:
+        # Prepare arguments for the CLI
+        args = ['--repo', repo, '--token', token, '--days', str(days), '--output', output, '--state', state,
+                '--limit', str(limit)]
+    
+        if bucket:
+            args.extend(['--bucket', bucket])
+    
+        if analyze:
+            args.append('--analyze')
+    
+        if notify and email:
+            args.extend(['--notify', '--email', email])
+    
+        if event.get('checkpoint') or event.get('resume'):
+            from storage import store_name
+            name = store_name([r.strip() for r in repo.split(',')], state)
+            location = f"s3://{bucket}/checkpoints/{name}" if bucket else f"/tmp/checkpoints/{name}"
+            args.extend(['--checkpoint', location])
+            if event.get('resume'):
+                args.append('--resume')
+    
+        if event.get('profile'):
+            args.append('--profile')
     
-    if bucket:
-        args.extend(['--bucket', bucket])
+        if event.get('engine'):
+            args.extend(['--engine', event['engine']])
     
-    if analyze:
-        args.append('--analyze')
+        if event.get('full_diff'):
+            args.append('--full-diff')
     
-    if notify and email:
-        args.extend(['--notify', '--email', email])
+        if event.get('skip_unchanged'):
+            args.append('--skip-unchanged')
     
-    # Execute code review
-    review_code(args)
+        if event.get('track_changes'):
+            args.append('--track-changes')
+    
+        if context:
+            args.extend(['--time-budget', str(Deadline.from_context(context).remaining())])
+    
+        # Execute code review (without click's sys.exit at the end)
+        review_code.main(args, standalone_mode=False)
     
     # Build response
     response = {
@@ -59,4 +144,128 @@ def handler(event, context):
         })
     }
     
-    return response
\ No newline at end of file
+    return response
+
+def run_coordinator(event, context, token, bucket, output):
+    """
+    Splits the repositories into shards, runs them in parallel and renders one report.
+
+    In AWS every shard runs in its own worker invocation of this function and hands
+    its PR records back as NDJSON in S3; outside AWS a local process pool is used.
+    """
+    from fanout import WORKER_TIMEOUT, S3ShardStore, run_lambda, split_shards
+
+    repositories = [r.strip() for r in event.get('repo', '').split(',') if r.strip()]
+    days = event.get('days', 7)
+    state = event.get('state', 'open')
+    limit = event.get('limit', 100)
+    analyze = event.get('analyze', False)
+    shard_count = int(event.get('shards', DEFAULT_SHARDS))
+    engine = event.get('engine', 'sync')
+    full_diff = event.get('full_diff', False)
+
+    if context:
+        if not bucket:
+            raise ValueError("BUCKET_NAME environment variable is required in coordinator mode")
+        deadline = Deadline.from_context(context)
+        store = S3ShardStore(bucket, context.aws_request_id)
+        base_event = {
+            'days': days, 'state': state, 'limit': limit, 'analyze': analyze, 'engine': engine, 'full_diff': full_diff
+        }
+        shards = split_shards(repositories, shard_count)
+        timeout = int(os.environ.get('FUNCTION_TIMEOUT', WORKER_TIMEOUT))
+        with telemetry.stage('fetch'):
+            all_pr_data = run_lambda(shards, context.function_name, base_event, store, deadline, timeout)
+        telemetry.count('Repositories', len(repositories))
+        telemetry.count('PullRequests', len(all_pr_data))
+    else:
+        # No time limit: only records the shards that failed, so the report is marked partial
+        deadline = Deadline(float('inf'))
+        all_pr_data = collect_sharded(
+            repositories, token, days, state, limit, analyze, shard_count, engine=engine, full_diff=full_diff,
+            deadline=deadline
+        )
+
+    if not all_pr_data:
+        click.echo(f"No pull requests with state '{state}' found in the last {days} days.")
+        return None
+
+    notify = event.get('notify', False)
+    email = event.get('email')
+    return publish_report(repositories, all_pr_data, output, days, state, bucket, notify, email, deadline,
+                          skip_unchanged=event.get('skip_unchanged', False),
+                          track_changes=event.get('track_changes', False),
+                          options=report_options(analyze, full_diff, limit))
+
+def run_batch(event, context, token, bucket, timestamp):
+    """Renders one report per request in event['reports'] and sends a single digest notification."""
+    from notifications import NotificationDispatcher
+
+    # The reports share the invocation's time limit; each counts its own PRs and notes
+    run_deadline = Deadline.from_context(context) if context else None
+    dispatcher = NotificationDispatcher()
+    defaults = {key: value for key, value in event.items() if key != 'reports'}
+    results = []
+
+    for index, request in enumerate(event['reports']):
+        request = dict(defaults, **request)
+        repositories = [r.strip() for r in request.get('repo', '').split(',') if r.strip()]
+        days = request.get('days', 7)
+        state = request.get('state', 'open')
+        deadline = run_deadline.for_report() if run_deadline else None
+        records = bounded(iter_repositories(
+            repositories, token, days, state, request.get('limit', 100), request.get('analyze', False),
+            deadline=deadline, engine=request.get('engine', 'sync'), full_diff=request.get('full_diff', False)
+        ))
+
+        with RecordSpool() as all_pr_data:
+            all_pr_data.extend(records)
+
+            # Out of time: only publish an (empty, partial) report if nothing was published yet
+            if not all_pr_data and not (deadline and deadline.truncated and not results):
+                click.echo(f"No pull requests with state '{state}' found in the last {days} days for {request.get('repo')}.")
+                continue
+
+            output = f"/tmp/report-{timestamp}-{index}.pdf"
+            results.append(publish_report(
+                repositories, all_pr_data, output, days, state, bucket,
+                request.get('notify', False), request.get('email'), deadline, dispatcher,
+                request.get('skip_unchanged', False), request.get('track_changes', False),
+                report_options(request.get('analyze', False), request.get('full_diff', False), request.get('limit', 100))
+            ))
+
+    dispatcher.flush()
+    return results
+
+def run_worker(event, context, token, bucket):
+    """Collects the PR records of one shard and stores them for the coordinator."""
+    from fanout import S3ShardStore
+
+    # Stop early enough for the coordinator to render and upload the merged report
+    deadline = None
+    if context:
+        deadline = Deadline.from_context(context)
+    if 'time_budget' in event:
+        time_budget = event['time_budget']
+        deadline = Deadline(min(time_budget, deadline.remaining()) if deadline else time_budget)
+
+    repositories = [r.strip() for r in event['repo'].split(',') if r.strip()]
+    records = collect_repositories(
+        repositories, token, event.get('days', 7), event.get('state', 'open'),
+        event.get('limit', 100), event.get('analyze', False), deadline=deadline, engine=event.get('engine', 'sync'),
+        full_diff=event.get('full_diff', False)
+    )
+    store = S3ShardStore(bucket, event['run_id'])
+    count = store.put(event['shard'], records)
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Shard collected successfully',
+            'shard': event['shard'],
+            'records': count,
+            'key': store.key(event['shard']),
+            'truncated': deadline.truncated if deadline else False,
+            'analysis_skipped': deadline.analysis_skipped if deadline else 0
+        })
+    }
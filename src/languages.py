@@ -0,0 +1,492 @@
+"""
+Language classification of changed files.
+
+analyze_pull_request counts the changed lines of a PR per language. A file is
+classified, in this order, as:
+
+1. Vendored, when a directory of its path holds third-party code
+   (vendor/, node_modules/, ...);
+2. Generated, when its name marks it as generated (lock files, minified
+   bundles, protobuf stubs, *.generated.*, ...);
+3. the language of its exact file name (Dockerfile, Makefile, Gemfile, ...);
+4. the language of its longest known suffix, so compound suffixes such as
+   .d.ts or .tar.gz win over their last extension;
+5. Other.
+
+The tables are turned into dictionaries and regular expressions once, at
+import, and classify() is memoized, so the files of large PRs (where the same
+paths and names come back in every PR) cost a dictionary lookup each.
+"""
+import functools
+import re
+
+OTHER = 'Other'
+VENDORED = 'Vendored'
+GENERATED = 'Generated'
+
+# Languages and file types by suffix (matched case-insensitively)
+LANGUAGES = {
+    'ABAP': ('.abap',),
+    'ActionScript': ('.as',),
+    'Ada': ('.ada', '.adb', '.ads'),
+    'Agda': ('.agda',),
+    'AMPL': ('.ampl', '.mod'),
+    'ANTLR': ('.g4',),
+    'Apex': ('.cls', '.trigger'),
+    'APL': ('.apl', '.dyalog'),
+    'AppleScript': ('.applescript', '.scpt'),
+    'Arduino': ('.ino',),
+    'AsciiDoc': ('.adoc', '.asciidoc'),
+    'ASP.NET': ('.aspx', '.ascx', '.asax', '.ashx', '.asmx'),
+    'Assembly': ('.asm', '.s', '.nasm'),
+    'Astro': ('.astro',),
+    'AutoHotkey': ('.ahk',),
+    'AutoIt': ('.au3',),
+    'Awk': ('.awk',),
+    'Ballerina': ('.bal',),
+    'Batch': ('.bat', '.cmd'),
+    'Bicep': ('.bicep',),
+    'BibTeX': ('.bib',),
+    'Bison': ('.bison',),
+    'BitBake': ('.bb', '.bbappend'),
+    'Blade': ('.blade.php',),
+    'Boo': ('.boo',),
+    'Brainfuck': ('.bf',),
+    'C': ('.c', '.h'),
+    'C#': ('.cs', '.csx'),
+    'C++': ('.cpp', '.cc', '.cxx', '.c++', '.hpp', '.hh', '.hxx', '.h++', '.ipp', '.tpp', '.inl'),
+    'Cabal': ('.cabal',),
+    "Cap'n Proto": ('.capnp',),
+    'Carbon': ('.carbon',),
+    'Ceylon': ('.ceylon',),
+    'Chapel': ('.chpl',),
+    'Cirru': ('.cirru',),
+    'Clarion': ('.clw',),
+    'Clean': ('.icl', '.dcl'),
+    'Clojure': ('.clj', '.cljs', '.cljc', '.edn'),
+    'CMake': ('.cmake',),
+    'COBOL': ('.cob', '.cbl', '.cpy'),
+    'CodeQL': ('.ql', '.qll'),
+    'CoffeeScript': ('.coffee', '.litcoffee'),
+    'ColdFusion': ('.cfm', '.cfc'),
+    'Common Lisp': ('.lisp', '.lsp', '.cl', '.asd'),
+    'Crystal': ('.cr',),
+    'CSON': ('.cson',),
+    'CSS': ('.css',),
+    'CSV': ('.csv',),
+    'Cuda': ('.cu', '.cuh'),
+    'Cue': ('.cue',),
+    'Cython': ('.pyx', '.pxd', '.pxi'),
+    'D': ('.d', '.di'),
+    'Dafny': ('.dfy',),
+    'Dart': ('.dart',),
+    'DataWeave': ('.dwl',),
+    'Dhall': ('.dhall',),
+    'Diff': ('.diff', '.patch'),
+    'Django': ('.jinja', '.jinja2', '.j2'),
+    'DM': ('.dm',),
+    'Dockerfile': ('.dockerfile',),
+    'Dotenv': ('.env',),
+    'DTrace': ('.dtrace',),
+    'Dylan': ('.dylan',),
+    'EBNF': ('.ebnf',),
+    'ECL': ('.ecl',),
+    'EditorConfig': ('.editorconfig',),
+    'Eiffel': ('.e',),
+    'EJS': ('.ejs',),
+    'Elixir': ('.ex', '.exs'),
+    'Elm': ('.elm',),
+    'Emacs Lisp': ('.el', '.elc'),
+    'Erlang': ('.erl', '.hrl'),
+    'F#': ('.fs', '.fsi', '.fsx'),
+    'Factor': ('.factor',),
+    'Fancy': ('.fy',),
+    'Fantom': ('.fan',),
+    'Fennel': ('.fnl',),
+    'Fish': ('.fish',),
+    'Fluent': ('.ftl',),
+    'Forth': ('.fth', '.4th', '.forth'),
+    'Fortran': ('.f', '.for', '.f77', '.f90', '.f95', '.f03', '.f08'),
+    'FreeMarker': ('.ftlh',),
+    'Futhark': ('.fut',),
+    'G-code': ('.gcode', '.nc'),
+    'Game Maker Language': ('.gml',),
+    'GAP': ('.gap', '.gi'),
+    'GDScript': ('.gd',),
+    'Genie': ('.gs',),
+    'Gettext Catalog': ('.po', '.pot'),
+    'Gherkin': ('.feature',),
+    'Git Attributes': ('.gitattributes',),
+    'Git Config': ('.gitmodules',),
+    'Gleam': ('.gleam',),
+    'GLSL': ('.glsl', '.vert', '.frag', '.geom', '.comp', '.tesc', '.tese'),
+    'Gnuplot': ('.gp', '.gnuplot', '.plt'),
+    'Go': ('.go',),
+    'Golo': ('.golo',),
+    'Gosu': ('.gsx',),
+    'Grace': ('.grace',),
+    'Gradle': ('.gradle', '.gradle.kts'),
+    'GraphQL': ('.graphql', '.gql', '.graphqls'),
+    'Graphviz (DOT)': ('.dot', '.gv'),
+    'Groovy': ('.groovy', '.gvy', '.gy'),
+    'Hack': ('.hack', '.hhi'),
+    'Haml': ('.haml',),
+    'Handlebars': ('.hbs', '.handlebars'),
+    'Harbour': ('.hb',),
+    'Haskell': ('.hs', '.lhs', '.hs-boot'),
+    'Haxe': ('.hx', '.hxsl'),
+    'HCL': ('.hcl',),
+    'HLSL': ('.hlsl', '.fx', '.fxh'),
+    'HolyC': ('.hc',),
+    'HTML': ('.html', '.htm', '.xhtml'),
+    'HTML+ERB': ('.html.erb', '.erb'),
+    'HTTP': ('.http',),
+    'Hy': ('.hy',),
+    'IDL': ('.pro',),
+    'Idris': ('.idr', '.lidr'),
+    'Image': ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tif', '.tiff', '.psd', '.heic'),
+    'Ini': ('.ini', '.cfg', '.prefs'),
+    'Inno Setup': ('.iss',),
+    'Io': ('.io',),
+    'Ioke': ('.ik',),
+    'Isabelle': ('.thy',),
+    'J': ('.ijs',),
+    'Janet': ('.janet',),
+    'Jasmin': ('.j',),
+    'Java': ('.java', '.jav'),
+    'Java Properties': ('.properties',),
+    'Java Server Pages': ('.jsp', '.jspf', '.tag'),
+    'JavaScript': ('.js', '.mjs', '.cjs', '.jsm', '.es6'),
+    'JFlex': ('.flex', '.jflex'),
+    'Jolie': ('.ol', '.iol'),
+    'JSON': ('.json', '.geojson', '.webmanifest', '.har'),
+    'JSON with Comments': ('.jsonc', '.code-workspace'),
+    'JSON5': ('.json5',),
+    'JSONiq': ('.jq',),
+    'Jsonnet': ('.jsonnet', '.libsonnet'),
+    'JSX': ('.jsx',),
+    'Julia': ('.jl',),
+    'Jupyter Notebook': ('.ipynb',),
+    'Kotlin': ('.kt', '.kts', '.ktm'),
+    'KRL': ('.krl',),
+    'LabVIEW': ('.lvproj', '.lvlib'),
+    'Lasso': ('.lasso',),
+    'Latte': ('.latte',),
+    'Lean': ('.lean',),
+    'Less': ('.less',),
+    'Lex': ('.l', '.lex'),
+    'LilyPond': ('.ly', '.ily'),
+    'Linker Script': ('.ld', '.lds'),
+    'Liquid': ('.liquid',),
+    'LiveScript': ('.ls',),
+    'LLVM': ('.ll',),
+    'Logos': ('.xm', '.xi'),
+    'Logtalk': ('.lgt', '.logtalk'),
+    'LOLCODE': ('.lol',),
+    'LookML': ('.lkml', '.lookml'),
+    'Lua': ('.lua', '.luau', '.rockspec'),
+    'M4': ('.m4',),
+    'Makefile': ('.mk', '.mak', '.make'),
+    'Mako': ('.mako', '.mao'),
+    'Markdown': ('.md', '.markdown', '.mdown', '.mkd', '.mkdn', '.ronn'),
+    'Marko': ('.marko',),
+    'Mathematica': ('.nb', '.wl', '.wls', '.mt'),
+    'MATLAB': ('.mlx', '.mlapp'),
+    'Max': ('.maxpat', '.maxhelp'),
+    'MDX': ('.mdx',),
+    'Mercury': ('.moo',),
+    'Meson': ('.meson',),
+    'Metal': ('.metal',),
+    'MiniZinc': ('.mzn', '.dzn'),
+    'Mirah': ('.druby', '.mirah'),
+    'Modelica': ('.mo',),
+    'Modula-3': ('.i3', '.m3', '.ig', '.mg'),
+    'Monkey': ('.monkey', '.monkey2'),
+    'Move': ('.move',),
+    'MoonScript': ('.moon',),
+    'MQL5': ('.mq5', '.mqh'),
+    'MUF': ('.muf',),
+    'Mustache': ('.mustache',),
+    'Nearley': ('.ne', '.nearley'),
+    'Nemerle': ('.n',),
+    'NetLogo': ('.nlogo',),
+    'NewLisp': ('.nl',),
+    'Nginx': ('.nginx', '.nginxconf'),
+    'Nim': ('.nim', '.nims', '.nimble'),
+    'Ninja': ('.ninja',),
+    'Nit': ('.nit',),
+    'Nix': ('.nix',),
+    'NSIS': ('.nsi', '.nsh'),
+    'Nu': ('.nu',),
+    'Nunjucks': ('.njk', '.nunjucks'),
+    'Objective-C': ('.m',),
+    'Objective-C++': ('.mm',),
+    'Objective-J': ('.sj',),
+    'OCaml': ('.ml', '.mli', '.mll', '.mly'),
+    'Odin': ('.odin',),
+    'ooc': ('.ooc',),
+    'Opa': ('.opa',),
+    'OpenCL': ('.opencl',),
+    'OpenEdge ABL': ('.p', '.w'),
+    'OpenSCAD': ('.scad',),
+    'Org': ('.org',),
+    'Oz': ('.oz',),
+    'P4': ('.p4',),
+    'Pan': ('.pan',),
+    'Parrot': ('.parrot', '.pasm', '.pir'),
+    'Pascal': ('.pas', '.dfm', '.dpr', '.lpr'),
+    'Pawn': ('.pwn',),
+    'PDF': ('.pdf',),
+    'PEG.js': ('.pegjs', '.peggy'),
+    'Perl': ('.pl', '.pm', '.t', '.pod', '.psgi'),
+    'PHP': ('.php', '.phtml', '.php3', '.php4', '.php5', '.phps', '.phpt'),
+    'Pig': ('.pig',),
+    'Pike': ('.pike', '.pmod'),
+    'PLpgSQL': ('.pgsql',),
+    'PLSQL': ('.pls', '.pck', '.pkb', '.pks', '.plb', '.plsql'),
+    'Pony': ('.pony',),
+    'PostCSS': ('.pcss', '.postcss'),
+    'PostScript': ('.ps', '.eps'),
+    'PowerShell': ('.ps1', '.psm1', '.psd1'),
+    'Prisma': ('.prisma',),
+    'Processing': ('.pde',),
+    'Prolog': ('.prolog', '.yap'),
+    'Protocol Buffer': ('.proto',),
+    'Pug': ('.pug', '.jade'),
+    'Puppet': ('.pp',),
+    'PureBasic': ('.pb', '.pbi'),
+    'PureScript': ('.purs',),
+    'Python': ('.py', '.pyw', '.pyi', '.py3', '.pyde', '.gyp', '.gypi'),
+    'Q#': ('.qs',),
+    'QML': ('.qml', '.qbs'),
+    'R': ('.r', '.rd', '.rsx'),
+    'Racket': ('.rkt', '.rktd', '.rktl', '.scrbl'),
+    'Ragel': ('.rl',),
+    'Raku': ('.raku', '.rakumod', '.p6', '.pm6', '.pl6'),
+    'RAML': ('.raml',),
+    'Razor': ('.cshtml', '.razor'),
+    'ReasonML': ('.re', '.rei'),
+    'Rebol': ('.reb', '.rebol'),
+    'Red': ('.red', '.reds'),
+    'Regular Expression': ('.regexp', '.regex'),
+    'reStructuredText': ('.rst', '.rest'),
+    'Rexx': ('.rexx', '.rex'),
+    'Ring': ('.ring',),
+    'RMarkdown': ('.rmd', '.qmd'),
+    'RobotFramework': ('.robot',),
+    'Roff': ('.roff', '.man', '.1', '.2', '.3', '.5', '.7', '.8'),
+    'RPC': ('.x',),
+    'RPM Spec': ('.spec',),
+    'Ruby': ('.rb', '.rbw', '.rake', '.gemspec', '.podspec', '.ru', '.jbuilder', '.thor'),
+    'Rust': ('.rs',),
+    'SAS': ('.sas',),
+    'Sass': ('.sass',),
+    'Scala': ('.scala', '.sc', '.sbt'),
+    'Scheme': ('.scm', '.ss', '.sld', '.sls', '.sps'),
+    'Scilab': ('.sci', '.sce'),
+    'SCSS': ('.scss',),
+    'sed': ('.sed',),
+    'Shell': ('.sh', '.bash', '.zsh', '.ksh', '.csh', '.tcsh', '.command'),
+    'ShellSession': ('.sh-session',),
+    'Slim': ('.slim',),
+    'Smali': ('.smali',),
+    'Smalltalk': ('.st',),
+    'Smarty': ('.tpl',),
+    'Smithy': ('.smithy',),
+    'Solidity': ('.sol',),
+    'SourcePawn': ('.sp',),
+    'SPARQL': ('.sparql', '.rq'),
+    'SQF': ('.sqf', '.hqf'),
+    'SQL': ('.sql', '.ddl', '.dml', '.prc', '.tab', '.udf', '.viw'),
+    'Squirrel': ('.nut',),
+    'Stan': ('.stan',),
+    'Standard ML': ('.sml', '.sig', '.fun'),
+    'Starlark': ('.star', '.sky', '.bzl', '.bazel'),
+    'Stata': ('.do', '.ado', '.doh', '.ihlp', '.matah', '.sthlp'),
+    'Stylus': ('.styl',),
+    'SubRip Text': ('.srt',),
+    'SuperCollider': ('.scd',),
+    'Svelte': ('.svelte',),
+    'SVG': ('.svg',),
+    'Swift': ('.swift',),
+    'SWIG': ('.swg', '.i'),
+    'SystemVerilog': ('.sv', '.svh'),
+    'Tcl': ('.tcl', '.tm', '.tk', '.itcl'),
+    'Terraform': ('.tf', '.tfvars', '.tftpl'),
+    'TeX': ('.tex', '.sty', '.dtx', '.ins', '.ltx', '.toc', '.bbx', '.cbx', '.lbx'),
+    'Text': ('.txt', '.text'),
+    'Textile': ('.textile',),
+    'Thrift': ('.thrift',),
+    'TLA': ('.tla',),
+    'TOML': ('.toml',),
+    'TSQL': ('.tsql',),
+    'TSV': ('.tsv',),
+    'TSX': ('.tsx',),
+    'Turtle': ('.ttl',),
+    'Twig': ('.twig',),
+    'TXL': ('.txl',),
+    'TypeScript': ('.ts', '.mts', '.cts', '.d.ts', '.d.mts', '.d.cts'),
+    'Unity3D Asset': ('.unity', '.prefab', '.mat', '.asset', '.anim', '.meta'),
+    'Uno': ('.uno',),
+    'UnrealScript': ('.uc',),
+    'Vala': ('.vala', '.vapi'),
+    'VBA': ('.bas', '.vba', '.frm'),
+    'VBScript': ('.vbs',),
+    'VCL': ('.vcl',),
+    'Verilog': ('.v', '.vh', '.veo'),
+    'VHDL': ('.vhd', '.vhdl', '.vho', '.vht', '.vhw'),
+    'Vim Script': ('.vim', '.vmb'),
+    'Visual Basic .NET': ('.vb', '.vbhtml'),
+    'Volt': ('.volt',),
+    'Vue': ('.vue',),
+    'Vyper': ('.vy',),
+    'WebAssembly': ('.wat', '.wast', '.wasm'),
+    'WebIDL': ('.webidl',),
+    'WGSL': ('.wgsl',),
+    'Wollok': ('.wlk',),
+    'X10': ('.x10',),
+    'Xojo': ('.xojo_code', '.xojo_window'),
+    'XML': ('.xml', '.xsd', '.xsl', '.xslt', '.plist', '.csproj', '.vbproj', '.vcxproj', '.fsproj', '.props',
+            '.targets', '.resx', '.xaml', '.wsdl', '.nuspec', '.config', '.storyboard', '.xib', '.kml', '.rss',
+            '.atom', '.pom'),
+    'XProc': ('.xpl', '.xproc'),
+    'XQuery': ('.xquery', '.xq', '.xql', '.xqm', '.xqy'),
+    'Xtend': ('.xtend',),
+    'Yacc': ('.y', '.yacc', '.yy'),
+    'YAML': ('.yml', '.yaml', '.yaml-tmlanguage', '.syntax'),
+    'YANG': ('.yang',),
+    'YARA': ('.yar', '.yara'),
+    'Zeek': ('.zeek', '.bro'),
+    'ZenScript': ('.zs',),
+    'Zephir': ('.zep',),
+    'Zig': ('.zig', '.zon'),
+    'ZIL': ('.zil', '.mud'),
+    'Archive': ('.zip', '.tar', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar', '.war', '.whl', '.tar.gz',
+                '.tar.bz2', '.tar.xz', '.tar.zst', '.zst'),
+    'Binary': ('.exe', '.dll', '.so', '.dylib', '.a', '.o', '.obj', '.lib', '.class', '.pyc', '.pyo', '.bin', '.dat'),
+    'Font': ('.ttf', '.otf', '.woff', '.woff2', '.eot'),
+}
+
+# Languages by exact file name
+FILENAMES = {
+    'Dockerfile': 'Dockerfile', 'Containerfile': 'Dockerfile',
+    'Makefile': 'Makefile', 'makefile': 'Makefile', 'GNUmakefile': 'Makefile', 'Kbuild': 'Makefile',
+    'CMakeLists.txt': 'CMake',
+    'BUILD': 'Starlark', 'BUILD.bazel': 'Starlark', 'WORKSPACE': 'Starlark', 'WORKSPACE.bazel': 'Starlark',
+    'Tiltfile': 'Starlark',
+    'Gemfile': 'Ruby', 'Rakefile': 'Ruby', 'Guardfile': 'Ruby', 'Podfile': 'Ruby', 'Fastfile': 'Ruby',
+    'Appfile': 'Ruby', 'Brewfile': 'Ruby', 'Vagrantfile': 'Ruby', 'Capfile': 'Ruby', 'Dangerfile': 'Ruby',
+    'config.ru': 'Ruby', '.irbrc': 'Ruby', '.pryrc': 'Ruby',
+    'Jenkinsfile': 'Groovy',
+    'Justfile': 'Just', 'justfile': 'Just',
+    'Procfile': 'Procfile',
+    'Pipfile': 'TOML', 'Cargo.toml': 'TOML', 'pyproject.toml': 'TOML',
+    'SConstruct': 'Python', 'SConscript': 'Python', 'wscript': 'Python',
+    'meson.build': 'Meson', 'meson_options.txt': 'Meson',
+    'build.ninja': 'Ninja',
+    'nginx.conf': 'Nginx',
+    'requirements.txt': 'Pip Requirements',
+    '.bashrc': 'Shell', '.bash_profile': 'Shell', '.zshrc': 'Shell', '.profile': 'Shell', 'PKGBUILD': 'Shell',
+    'APKBUILD': 'Shell',
+    '.vimrc': 'Vim Script', '_vimrc': 'Vim Script', '.gvimrc': 'Vim Script',
+    '.emacs': 'Emacs Lisp', '.spacemacs': 'Emacs Lisp',
+    '.gitignore': 'Ignore List', '.dockerignore': 'Ignore List', '.npmignore': 'Ignore List',
+    '.eslintignore': 'Ignore List', '.prettierignore': 'Ignore List',
+    '.gitattributes': 'Git Attributes', '.gitconfig': 'Git Config',
+    '.editorconfig': 'EditorConfig',
+    '.env': 'Dotenv', '.env.example': 'Dotenv',
+    '.babelrc': 'JSON with Comments', '.eslintrc': 'JSON with Comments', 'tsconfig.json': 'JSON with Comments',
+    'jsconfig.json': 'JSON with Comments',
+    '.prettierrc': 'JSON', '.htmlhintrc': 'JSON',
+    '.htaccess': 'ApacheConf', 'httpd.conf': 'ApacheConf',
+    'LICENSE': 'Text', 'COPYING': 'Text', 'NOTICE': 'Text', 'AUTHORS': 'Text', 'CODEOWNERS': 'CODEOWNERS',
+    'OWNERS': 'Text',
+    'go.mod': 'Go Module', 'go.work': 'Go Module',
+    'mix.lock': 'Elixir',
+    'Snakefile': 'Snakemake',
+    'Earthfile': 'Earthly',
+    'Caddyfile': 'Caddyfile',
+}
+
+# Directories holding third-party code, anywhere in a path
+VENDORED_DIRECTORIES = (
+    'vendor', 'vendors', 'node_modules', 'bower_components', 'jspm_packages', 'third_party', 'third-party',
+    'thirdparty', 'external', 'extern', 'deps', 'Pods', 'Carthage', '.yarn', 'site-packages', 'dist-packages',
+    '.venv', 'venv', 'virtualenv', '__vendor__', 'Godeps',
+)
+
+# Generated files by name
+GENERATED_NAMES = (
+    'package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock', 'pnpm-lock.yaml', 'bun.lockb', 'composer.lock',
+    'Gemfile.lock', 'Podfile.lock', 'Cargo.lock', 'poetry.lock', 'Pipfile.lock', 'pdm.lock', 'uv.lock',
+    'go.sum', 'flake.lock', 'packages.lock.json', 'gradle-wrapper.properties', 'Package.resolved',
+)
+
+# Generated files by pattern of their name
+GENERATED_PATTERNS = (
+    r'.*\.min\.(js|css)',
+    r'.*[.-]bundle\.js',
+    r'.*\.(js|css)\.map',
+    r'.*\.pb\.(go|cc|h|swift)',
+    r'.*_pb2(_grpc)?\.pyi?',
+    r'.*_pb\.(js|d\.ts)',
+    r'.*_grpc_pb\.(js|d\.ts)',
+    r'.*\.pb\.gw\.go',
+    r'.*_generated\.\w+',
+    r'.*\.generated\.\w+',
+    r'.*\.g\.(dart|cs|i\.cs)',
+    r'.*\.designer\.(cs|vb)',
+    r'.*\.freezed\.dart',
+    r'zz_generated\..*\.go',
+    r'.*\.lock',
+)
+
+# Files under these directories are generated (build output, snapshots)
+GENERATED_DIRECTORIES = ('generated', '__generated__', 'gen-src', '__snapshots__')
+
+def _suffix_index():
+    index = {}
+    for language, suffixes in LANGUAGES.items():
+        for suffix in suffixes:
+            index.setdefault(suffix, language)
+    return index
+
+SUFFIXES = _suffix_index()
+_VENDORED = frozenset(VENDORED_DIRECTORIES)
+_GENERATED_DIRECTORIES = frozenset(GENERATED_DIRECTORIES)
+_GENERATED_NAMES = frozenset(GENERATED_NAMES)
+_GENERATED_PATTERN = re.compile('|'.join(f"(?:{pattern})" for pattern in GENERATED_PATTERNS), re.IGNORECASE)
+
+@functools.lru_cache(maxsize=16384)
+def language_of_name(name):
+    """Returns the language of a file name (without directories): exact name first, then longest suffix."""
+    if name in FILENAMES:
+        return FILENAMES[name]
+    if name.startswith(('Dockerfile.', 'Containerfile.')):
+        return 'Dockerfile'
+    lowered = name.lower()
+    if lowered in SUFFIXES:
+        # Dotfiles such as .editorconfig
+        return SUFFIXES[lowered]
+    # Suffixes from the longest (".d.ts" of "index.d.ts") to the last extension; a leading dot is no suffix
+    start = lowered.find('.', 1)
+    while start != -1:
+        language = SUFFIXES.get(lowered[start:])
+        if language:
+            return language
+        start = lowered.find('.', start + 1)
+    return OTHER
+
+@functools.lru_cache(maxsize=65536)
+def classify(path):
+    """Returns the language of a changed file's path, or Vendored, Generated or Other."""
+    *directories, name = path.replace('\\', '/').split('/')
+    if _VENDORED.intersection(directories):
+        return VENDORED
+    if name in _GENERATED_NAMES or _GENERATED_PATTERN.fullmatch(name) or _GENERATED_DIRECTORIES.intersection(directories):
+        return GENERATED
+    return language_of_name(name)
+
+def language_of_extension(extension):
+    """Returns the language of a file extension such as ".py"."""
+    return SUFFIXES.get(extension.lower(), OTHER) if extension else OTHER
@@ -0,0 +1,141 @@
+import click
+import os
+
+import telemetry
+
+TOPIC_NAME = "github-report-notifications"
+
+# SNS rejects subjects longer than 100 characters
+MAX_SUBJECT_LENGTH = 100
+
+# Topic ARN and subscribed emails, cached for the lifetime of the process so warm
+# Lambda containers skip the SNS control-plane calls entirely
+_topic_arn = None
+_subscriptions = None
+
+def reset_cache():
+    """Forgets the cached topic ARN and subscription registry."""
+    global _topic_arn, _subscriptions
+    _topic_arn = None
+    _subscriptions = None
+
+def describe_repositories(repositories):
+    return ", ".join(repositories) if len(repositories) <= 3 else f"{len(repositories)} repositories"
+
+class NotificationDispatcher:
+    """
+    Collects finished reports and publishes them as a single SNS message.
+
+    The topic ARN comes from SNS_TOPIC_ARN (provisioned by Pulumi) or is created
+    once and cached. Emails are only subscribed if the topic does not list them
+    already, so repeated runs do not re-send confirmation requests. Reports added
+    twice (same URL or file) are only listed once in the digest.
+    """
+
+    def __init__(self, sns_client=None):
+        self._sns_client = sns_client
+        self.emails = []
+        self.reports = []
+        self._report_keys = set()
+
+    @property
+    def sns_client(self):
+        if self._sns_client is None:
+            import boto3
+            self._sns_client = boto3.client('sns')
+        return self._sns_client
+
+    def topic_arn(self):
+        """Returns the notification topic ARN, resolving it on first use."""
+        global _topic_arn
+        if _topic_arn is None:
+            _topic_arn = os.environ.get('SNS_TOPIC_ARN') or None
+        if _topic_arn is None:
+            _topic_arn = self.sns_client.create_topic(Name=TOPIC_NAME)['TopicArn']
+            telemetry.count('SNSCalls')
+        return _topic_arn
+
+    def subscribed_emails(self):
+        """Returns the emails subscribed to the topic, listing them on first use."""
+        global _subscriptions
+        if _subscriptions is None:
+            emails = set()
+            try:
+                paginator = self.sns_client.get_paginator('list_subscriptions_by_topic')
+                for page in paginator.paginate(TopicArn=self.topic_arn()):
+                    telemetry.count('SNSCalls')
+                    for subscription in page.get('Subscriptions', []):
+                        if subscription.get('Protocol') == 'email':
+                            emails.add(subscription['Endpoint'].lower())
+            except Exception as e:
+                click.echo(f"Could not list subscriptions: {str(e)}", err=True)
+            _subscriptions = emails
+        return _subscriptions
+
+    def subscribe(self, email):
+        """Subscribes the email to the topic unless it is already subscribed."""
+        subscribed = self.subscribed_emails()
+        if email.lower() in subscribed:
+            return False
+        self.sns_client.subscribe(TopicArn=self.topic_arn(), Protocol='email', Endpoint=email)
+        telemetry.count('SNSCalls')
+        subscribed.add(email.lower())
+        return True
+
+    def add(self, email, repositories, report_path, s3_url=None, note=None):
+        """Queues a finished report for the next digest."""
+        if email and email not in self.emails:
+            self.emails.append(email)
+        key = s3_url or os.path.basename(report_path)
+        if key in self._report_keys:
+            return False
+        self._report_keys.add(key)
+        self.reports.append({'repositories': list(repositories), 'report_path': report_path, 's3_url': s3_url, 'note': note})
+        return True
+
+    def build_message(self):
+        """Returns the subject and body of the digest for the queued reports."""
+        if len(self.reports) == 1:
+            report = self.reports[0]
+            repo_names = describe_repositories(report['repositories'])
+            subject = f"Pull Request Report - {repo_names}"
+            message = f"The Pull Request report for {repo_names} is ready.\n\n"
+            message += self._describe_location(report) + "\n\n"
+            if report['note']:
+                message += f"{report['note']}\n\n"
+        else:
+            subject = f"Pull Request Reports - {len(self.reports)} reports ready"
+            message = "The following Pull Request reports are ready:\n\n"
+            for report in self.reports:
+                message += f"- {describe_repositories(report['repositories'])}: {self._describe_location(report)}\n"
+                if report['note']:
+                    message += f"  {report['note']}\n"
+            message += "\n"
+
+        message += "This is an automated email, please do not reply."
+        return subject[:MAX_SUBJECT_LENGTH], message
+
+    def _describe_location(self, report):
+        if report['s3_url']:
+            return f"You can access it at: {report['s3_url']}"
+        return f"The report was generated as {os.path.basename(report['report_path'])}."
+
+    def flush(self):
+        """Publishes the queued reports as one message. Returns True on success."""
+        if not self.reports:
+            return True
+        try:
+            with telemetry.stage('notify'):
+                for email in self.emails:
+                    self.subscribe(email)
+
+                subject, message = self.build_message()
+                self.sns_client.publish(TopicArn=self.topic_arn(), Subject=subject, Message=message)
+                telemetry.count('SNSCalls')
+
+            self.reports = []
+            self._report_keys = set()
+            return True
+        except Exception as e:
+            click.echo(f"Error sending notification: {str(e)}", err=True)
+            return False
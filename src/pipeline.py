@@ -0,0 +1,156 @@
+"""
+Streaming of PR records from fetch to output.
+
+review-code used to hold every PR record in lists until the report was
+rendered. The records now flow through a chain of generators instead:
+
+    iter_repositories (fetch, analyze)  ->  bounded queue  ->  RecordSpool  ->  report
+
+- bounded() runs the fetching generator in a producer thread and hands its
+  records over through a queue of at most `maxsize` records; the producer
+  blocks when the consumer falls behind (backpressure), so at most that
+  many records are in flight.
+- RecordSpool writes the records to a temporary NDJSON file as they arrive
+  and keeps only the aggregates of the report summary (PR count, PRs per
+  repository). The report reads the records back from disk, once per
+  section, instead of from memory.
+- StreamedList lets ReportLab consume the report's flowables as they are
+  built from the spool, a window at a time.
+"""
+import os
+import queue
+import tempfile
+import threading
+from collections import Counter
+
+from records import read_ndjson, write_ndjson
+
+# Records in flight between the fetching thread and the writer
+DEFAULT_QUEUE_SIZE = 32
+
+# Seconds between checks of a blocked producer for a consumer that went away
+_PUT_TIMEOUT = 0.1
+
+_DONE = object()
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+def bounded(iterable, maxsize=DEFAULT_QUEUE_SIZE):
+    """
+    Yields the items of `iterable`, produced in a background thread at most
+    `maxsize` items ahead of the consumer. Errors of the producer are raised
+    in the consumer; closing the generator stops the producer.
+    """
+    items = queue.Queue(maxsize)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+        else:
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, name='record-producer', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
+
+class RecordSpool:
+    """
+    PR records written to a temporary NDJSON file as they arrive, iterable
+    (any number of times) in the order they were written. Only the PR count
+    and the PRs per repository are kept in memory.
+    """
+
+    def __init__(self, directory=None):
+        fd, self.path = tempfile.mkstemp(prefix='review-records-', suffix='.ndjson', dir=directory)
+        self._file = os.fdopen(fd, 'w')
+        self.repo_counts = Counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return sum(self.repo_counts.values())
+
+    def __iter__(self):
+        self._file.flush()
+        with open(self.path) as f:
+            yield from read_ndjson(f)
+
+    def write(self, record):
+        write_ndjson([record], self._file)
+        self.repo_counts[record['repo']] += 1
+
+    def extend(self, records):
+        """Writes the records as they come and returns how many were written."""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def close(self):
+        """Deletes the spool file."""
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class StreamedList(list):
+    """
+    A list that is filled from an iterator as it is read, keeping `window`
+    items ahead. ReportLab's doc.build() consumes its flowables from the front
+    of a list (len, [0], del [0], inserts of split parts), so the flowables
+    of a long report can be built while the PDF is written instead of all
+    upfront.
+    """
+
+    def __init__(self, iterable, window=64):
+        super().__init__()
+        self._pending = iter(iterable)
+        self.window = window
+
+    def _fill(self):
+        while self._pending is not None and list.__len__(self) < self.window:
+            try:
+                self.append(next(self._pending))
+            except StopIteration:
+                self._pending = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
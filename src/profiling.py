@@ -0,0 +1,139 @@
+"""
+CPU and memory profiling of the pipeline stages (review-code --profile).
+
+A StageProfiler is attached to the run telemetry, so every telemetry stage
+(fetch, analyze, render, upload, index, notify) is also run under cProfile
+and tracemalloc. Nested stages are profiled separately: while analyze runs,
+the fetch profile is paused, so the fetch profile shows pagination and API
+calls and the analyze profile shows patch scanning.
+
+Profiling slows the run down considerably (tracemalloc traces every
+allocation); use it to find hot spots, not to measure production timings.
+"""
+import cProfile
+import io
+import linecache
+import os
+import pstats
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+# Frames kept per traced allocation
+TRACEMALLOC_FRAMES = 1
+
+def format_size(size):
+    return f"{size / (1024 * 1024):+.2f} MiB" if abs(size) >= 1024 * 1024 else f"{size / 1024:+.1f} KiB"
+
+class StageProfiler:
+    """
+    Collects a cProfile profile, the peak traced memory and the net allocations
+    per stage, and writes them as .prof dumps plus a text summary.
+
+    Allocation snapshots are only taken around outermost stages, as they are
+    expensive; the allocations of nested stages are included in their parent's.
+    """
+
+    def __init__(self, top=20):
+        self.top = top
+        self.stages = {}
+        self._stack = []
+        self._started_tracing = False
+
+    def _record(self, name):
+        if name not in self.stages:
+            self.stages[name] = {
+                'profile': cProfile.Profile(),
+                'calls': 0,
+                'wall_time': 0.0,
+                'peak_memory': 0,
+                'allocations': Counter(),
+                'blocks': Counter(),
+            }
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name):
+        """Profiles the block as (part of) stage `name`."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracing = True
+
+        record = self._record(name)
+        outer = self._stack[-1] if self._stack else None
+        if outer:
+            outer['record']['profile'].disable()
+            outer['peak'] = max(outer['peak'], tracemalloc.get_traced_memory()[1])
+        before = tracemalloc.take_snapshot() if outer is None else None
+        frame = {'record': record, 'peak': 0}
+        self._stack.append(frame)
+
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        record['profile'].enable()
+        try:
+            yield
+        finally:
+            record['profile'].disable()
+            record['calls'] += 1
+            record['wall_time'] += time.perf_counter() - start
+            frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            record['peak_memory'] = max(record['peak_memory'], frame['peak'])
+            self._stack.pop()
+
+            if before is not None:
+                for diff in tracemalloc.take_snapshot().compare_to(before, 'lineno'):
+                    location = diff.traceback[0]
+                    record['allocations'][(location.filename, location.lineno)] += diff.size_diff
+                    record['blocks'][(location.filename, location.lineno)] += diff.count_diff
+            if outer:
+                outer['peak'] = max(outer['peak'], frame['peak'])
+                outer['record']['profile'].enable()
+
+    def close(self):
+        """Stops tracemalloc if this profiler started it."""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+
+    def summary(self):
+        """Returns the text summary: stage table, then top functions and allocations per stage."""
+        out = io.StringIO()
+        out.write(f"{'Stage':<10} {'Calls':>7} {'Time (s)':>10} {'Peak traced memory':>20}\n")
+        for name, record in self.stages.items():
+            out.write(f"{name:<10} {record['calls']:>7} {record['wall_time']:>10.3f} "
+                      f"{record['peak_memory'] / (1024 * 1024):>16.2f} MiB\n")
+
+        for name, record in self.stages.items():
+            out.write(f"\n=== {name}: top {self.top} functions by cumulative time ===\n")
+            stats = pstats.Stats(record['profile'], stream=out)
+            stats.strip_dirs().sort_stats('cumulative').print_stats(self.top)
+
+            if record['allocations']:
+                out.write(f"=== {name}: top {self.top} allocations (net growth) ===\n")
+                for (filename, lineno), size in record['allocations'].most_common(self.top):
+                    if size <= 0:
+                        break
+                    line = linecache.getline(filename, lineno).strip()
+                    out.write(f"{format_size(size):>14} {record['blocks'][(filename, lineno)]:>8} blocks  "
+                              f"{filename}:{lineno}  {line}\n")
+        return out.getvalue()
+
+    def write(self, directory, prefix):
+        """
+        Writes <prefix>.<stage>.prof (pstats/snakeviz dumps) and <prefix>.profile.txt
+        to the directory and returns their paths, the summary first.
+        """
+        self.close()
+        base = os.path.join(directory, prefix)
+        summary_path = f"{base}.profile.txt"
+        with open(summary_path, 'w') as f:
+            f.write(self.summary())
+
+        paths = [summary_path]
+        for name, record in self.stages.items():
+            path = f"{base}.{name}.prof"
+            record['profile'].dump_stats(path)
+            paths.append(path)
+        return paths
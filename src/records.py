@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+
+# Fields of a PR record that hold datetimes and need converting to/from JSON
+DATETIME_FIELDS = ('created_at', 'updated_at')
+
+def record_to_json(record):
+    """Converts a PR record into a JSON-serializable dictionary."""
+    data = dict(record)
+    for field in DATETIME_FIELDS:
+        if isinstance(data.get(field), datetime):
+            data[field] = data[field].isoformat()
+    return data
+
+def record_from_json(data):
+    """Rebuilds a PR record from its JSON representation."""
+    record = dict(data)
+    for field in DATETIME_FIELDS:
+        if isinstance(record.get(field), str):
+            record[field] = datetime.fromisoformat(record[field])
+    return record
+
+def write_ndjson(records, file_obj):
+    """Writes PR records as newline-delimited JSON and returns how many were written."""
+    count = 0
+    for record in records:
+        file_obj.write(json.dumps(record_to_json(record)) + "\n")
+        count += 1
+    return count
+
+def read_ndjson(file_obj):
+    """Yields PR records from a newline-delimited JSON stream."""
+    for line in file_obj:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if line.strip():
+            yield record_from_json(json.loads(line))
@@ -0,0 +1,231 @@
+"""
+Reusable ReportLab styles and templates of the PDF report.
+
+generate_pdf_report used to rebuild the sample stylesheet and its own
+paragraph styles on every call, lay out the summary table as one Table with
+style commands spanning all of its rows, and create about ten Paragraphs per
+PR for the details, each parsing its text as markup. Those costs grow with
+the size of the report:
+
+- styles() builds the stylesheet once per process.
+- summary_table() builds a LongTable with fixed row heights (its cells hold
+  one line of text), so ReportLab does not measure every row again each time
+  it splits the table at a page break. The header commands are a template
+  built once; the body commands cover chunks of TABLE_CHUNK_ROWS rows, so
+  each page of the split table only carries the commands of its own chunks.
+- pr_details() returns the details of a PR as one TextBlock: the text is
+  drawn as is, never parsed as markup (titles like "Fix <script> & R&D" need
+  no escaping), and is laid out with the font metrics only.
+
+The report imports this module (and so ReportLab) when it is rendered.
+"""
+import functools
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable, LongTable
+
+SUMMARY_COLUMNS = ("Repo", "#", "Title", "Author", "State", "Created on", "Files", "+/-")
+
+# Characters of a title in the summary table
+SUMMARY_TITLE_LENGTH = 40
+
+# Rows of the summary table that share their style commands
+TABLE_CHUNK_ROWS = 500
+
+# Summary table cells hold one line: ReportLab's 12pt cell leading plus 3pt padding
+# above and below, and 12pt bottom padding in the header
+BODY_ROW_HEIGHT = 18
+HEADER_ROW_HEIGHT = 27
+
+@functools.lru_cache(maxsize=None)
+def styles():
+    """The sample stylesheet with the report's 'ReportTitle' and 'Note' styles, built once."""
+    sheet = getSampleStyleSheet()
+    sheet.add(ParagraphStyle('ReportTitle', parent=sheet['Heading1'], fontSize=16, alignment=1, spaceAfter=12))
+    sheet.add(ParagraphStyle('Note', parent=sheet['Normal'], textColor=colors.red, fontName='Helvetica-Bold'))
+    return sheet
+
+# Style commands of the summary table header, shared by every table
+HEADER_COMMANDS = (
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, 0), 1, colors.black),
+)
+
+def table_commands(rows, chunk=TABLE_CHUNK_ROWS):
+    """The style commands of a summary table with `rows` body rows: the header template and one set per chunk."""
+    commands = list(HEADER_COMMANDS)
+    for start in range(1, rows + 1, chunk):
+        end = min(start + chunk, rows + 1) - 1
+        commands.extend((
+            ('ALIGN', (0, start), (-1, end), 'CENTER'),
+            ('BACKGROUND', (0, start), (-1, end), colors.beige),
+            ('GRID', (0, start), (-1, end), 1, colors.black),
+        ))
+    return commands
+
+def summary_row(pr):
+    """The summary table row of a PR record."""
+    title = " ".join(pr['title'].split())
+    return [
+        pr['repo'].split('/')[1] if '/' in pr['repo'] else pr['repo'],
+        str(pr['number']),
+        title[:SUMMARY_TITLE_LENGTH] + ('...' if len(title) > SUMMARY_TITLE_LENGTH else ''),
+        pr['user'],
+        "merged" if pr.get('merged', False) else pr['state'],
+        pr['created_at'].strftime("%Y-%m-%d"),
+        str(pr['changed_files']),
+        f"{pr['additions']}/{pr['deletions']}",
+    ]
+
+def summary_table(rows, chunk=TABLE_CHUNK_ROWS):
+    """The summary table of the report from its body rows (see summary_row), repeating the header on every page."""
+    return LongTable(
+        [list(SUMMARY_COLUMNS)] + rows,
+        repeatRows=1,
+        rowHeights=[HEADER_ROW_HEIGHT] + [BODY_ROW_HEIGHT] * len(rows),
+        style=table_commands(len(rows), chunk),
+    )
+
+def pr_details(pr, space_before=0):
+    """The details section of a PR record, with its analysis results, as one TextBlock."""
+    sheet = styles()
+    normal = sheet['Normal']
+    lines = [
+        (sheet['Heading3'], f"[{pr['repo']}] PR #{pr['number']}: {pr['title']}"),
+        (normal, f"Author: {pr['user']}"),
+        (normal, f"State: {pr['state']}{' (merged)' if pr.get('merged', False) else ''}"),
+        (normal, f"Created on: {pr['created_at'].strftime('%Y-%m-%d %H:%M:%S')}"),
+        (normal, f"Last updated: {pr['updated_at'].strftime('%Y-%m-%d %H:%M:%S')}"),
+        (normal, f"Comments: {pr['comments']}"),
+        (normal, f"Changed files: {pr['changed_files']}"),
+        (normal, f"Additions/Deletions: +{pr['additions']}/-{pr['deletions']}"),
+        (normal, f"URL: {pr['url']}"),
+    ]
+
+    analysis = pr.get('analysis')
+    if analysis and (analysis.get('issues') or analysis.get('languages')):
+        lines.append((sheet['Heading4'], "Code Analysis:"))
+        if analysis.get('languages'):
+            lang_text = ", ".join(f"{lang}: {count}" for lang, count in analysis['languages'].items())
+            lines.append((normal, f"Languages: {lang_text}"))
+        if 'complexity' in analysis:
+            lines.append((normal, f"Estimated complexity: {analysis['complexity']}/10"))
+        if 'risk_score' in analysis:
+            lines.append((normal, f"Risk score: {analysis['risk_score']}"))
+        if analysis.get('issues'):
+            lines.append((normal, "Identified issues:"))
+            lines.extend((normal, f"• {issue}") for issue in analysis['issues'])
+
+    return TextBlock(lines, space_before)
+
+def break_line(line, font_name, font_size, available):
+    """Breaks a line into pieces no wider than `available`, each the longest prefix that fits (one character at least)."""
+    pieces = []
+    while stringWidth(line, font_name, font_size) > available:
+        low, high = 1, len(line) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if stringWidth(line[:middle], font_name, font_size) <= available:
+                low = middle
+            else:
+                high = middle - 1
+        pieces.append(line[:low])
+        line = line[low:]
+    pieces.append(line)
+    return pieces
+
+class TextBlock(Flowable):
+    """
+    Lines of plain text, each with a paragraph style, laid out and drawn as one
+    flowable. Lines wider than the frame are wrapped at spaces, and words wider
+    than the frame (long URLs or paths) where they overflow; the block splits
+    between lines at page breaks.
+    """
+
+    def __init__(self, lines, space_before=0, _rows=None):
+        super().__init__()
+        self.lines = lines
+        self.space_before = space_before
+        self._rows = _rows
+        self._width = None
+
+    def _layout(self, width):
+        # [(style, text of one line, space above the line)]
+        rows = []
+        previous = None
+        for style, text in self.lines:
+            gap = previous.spaceAfter + style.spaceBefore if previous is not None else 0
+            available = width - style.leftIndent - style.rightIndent
+            if stringWidth(text, style.fontName, style.fontSize) <= available:
+                wrapped = [text]
+            else:
+                wrapped = [
+                    piece
+                    for line in simpleSplit(text, style.fontName, style.fontSize, available) or ['']
+                    for piece in break_line(line, style.fontName, style.fontSize, available)
+                ]
+            for line in wrapped:
+                rows.append((style, line, gap))
+                gap = 0
+            previous = style
+        return rows
+
+    def wrap(self, availWidth, availHeight):
+        if self._rows is None or self._width != availWidth:
+            self._rows = self._layout(availWidth)
+            self._width = availWidth
+        self.width = availWidth
+        self.height = sum(gap + style.leading for style, _, gap in self._rows)
+        return self.width, self.height
+
+    def getSpaceBefore(self):
+        return self.space_before + (self._rows[0][0].spaceBefore if self._rows else self.lines[0][0].spaceBefore)
+
+    def getSpaceAfter(self):
+        return self._rows[-1][0].spaceAfter if self._rows else self.lines[-1][0].spaceAfter
+
+    def split(self, availWidth, availHeight):
+        self.wrap(availWidth, availHeight)
+        height = 0
+        fitting = 0
+        for style, _, gap in self._rows:
+            height += gap + style.leading
+            if height > availHeight:
+                break
+            fitting += 1
+        # A heading is not left alone at the bottom of a page
+        if fitting < 2 or fitting == len(self._rows):
+            return []
+        head, tail = self._rows[:fitting], self._rows[fitting:]
+        tail[0] = tail[0][:2] + (0,)
+        parts = (
+            TextBlock([(style, line) for style, line, _ in head], self.space_before, head),
+            TextBlock([(style, line) for style, line, _ in tail], 0, tail),
+        )
+        for part in parts:
+            part._width = availWidth
+        return list(parts)
+
+    def draw(self):
+        text = self.canv.beginText()
+        y = self.height
+        font = color = None
+        for style, line, gap in self._rows:
+            y -= gap
+            if (style.fontName, style.fontSize) != font:
+                font = (style.fontName, style.fontSize)
+                text.setFont(*font)
+            if style.textColor != color:
+                color = style.textColor
+                text.setFillColor(color)
+            text.setTextOrigin(style.leftIndent, y - style.fontSize)
+            text.textOut(line)
+            y -= style.leading
+        self.canv.drawText(text)
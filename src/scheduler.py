@@ -0,0 +1,266 @@
+"""
+Budget-aware planning of review runs over a repository inventory.
+
+The inventory lists the repositories to review, each with a priority (1 runs
+first) and a size: the number of PRs a run is expected to find. CostModel
+estimates the GitHub requests and Lambda seconds of every run, fitted to the
+metrics of past runs (the EMF lines of the Lambda or --metrics-file). plan()
+then packs the runs into batches and the batches into the hours of the day:
+
+- a batch is one handler invocation ({"reports": [...]}, one report per
+  repository) whose runs fit in the Lambda timeout;
+- batches start in waves of at most `concurrency` invocations, one wave per
+  Lambda timeout, so a 300 second timeout gives an hour 12 waves;
+- the batches of an hour spend at most the GitHub quota of the pool's tokens
+  (GitHub's rate limits reset every hour).
+
+A run too long for one invocation gets a lower PR limit (its report covers
+the newest PRs that fit), and one that cannot fit even a single PR, like
+runs that fit nowhere in the day, is deferred. Nothing here calls GitHub or
+AWS, so plans can be computed and simulated offline.
+"""
+import json
+import math
+from collections import Counter
+
+from deadline import PUBLISH_STAGES, SAFETY_MARGIN, STAGE_BUDGETS
+
+# Primary rate limit of a token, per hour
+REQUESTS_PER_TOKEN = 5000
+
+# Share of the hourly quota the plan may use; the rest is left for retries and other clients
+QUOTA_UTILIZATION = 0.8
+
+LAMBDA_TIMEOUT = 300
+
+# Settings of a run that the inventory does not give, as in the daily cron event
+RUN_DEFAULTS = {'days': 1, 'state': 'all', 'analyze': True, 'limit': 100, 'skip_unchanged': True, 'track_changes': True}
+
+# Inventory keys that are passed on to the handler as they are
+RUN_KEYS = ('repo', 'days', 'state', 'analyze', 'limit', 'engine', 'full_diff', 'notify', 'email', 'skip_unchanged',
+            'track_changes')
+
+class CostModel:
+    """
+    GitHub requests of a run: per_repo (repository, listing) plus per_pr for
+    every PR and per_analyzed_pr more for every analyzed PR. Seconds come
+    from the stage budgets of deadline.Deadline.
+    """
+
+    def __init__(self, per_repo=3.0, per_pr=1.0, per_analyzed_pr=1.0):
+        self.per_repo = per_repo
+        self.per_pr = per_pr
+        self.per_analyzed_pr = per_analyzed_pr
+
+    @classmethod
+    def fit(cls, history):
+        """
+        Fits the model to past runs: metrics dictionaries with GitHubRequests,
+        Repositories, PullRequests and PullRequestsAnalyzed. Falls back to the
+        default model when the runs do not determine it.
+        """
+        rows = [
+            ((run.get('Repositories', 0), run.get('PullRequests', 0), run.get('PullRequestsAnalyzed', 0)),
+             run['GitHubRequests'])
+            for run in history if run.get('GitHubRequests')
+        ]
+        # Least squares through the normal equations
+        normal = [[sum(x[i] * x[j] for x, _ in rows) for j in range(3)] for i in range(3)]
+        target = [sum(x[i] * y for x, y in rows) for i in range(3)]
+        coefficients = _solve(normal, target)
+        if coefficients is None or min(coefficients) < 0:
+            return cls()
+        return cls(*coefficients)
+
+    @classmethod
+    def from_metrics_files(cls, paths):
+        """Fits the model to the metrics lines in the given JSON lines files."""
+        history = []
+        for path in paths:
+            with open(path) as f:
+                history.extend(json.loads(line) for line in f if line.strip())
+        return cls.fit(history)
+
+    def requests(self, prs, analyze):
+        return self.per_repo + prs * (self.per_pr + (self.per_analyzed_pr if analyze else 0))
+
+    def seconds(self, prs, analyze):
+        """Seconds to fetch (and analyze) the PRs of one repository and publish its report."""
+        stages = ('fetch', 'analyze') if analyze else ('fetch',)
+        return sum(STAGE_BUDGETS[stage][0] + STAGE_BUDGETS[stage][1] * prs for stage in stages + PUBLISH_STAGES)
+
+def _solve(matrix, vector):
+    """Solves a small linear system by Gaussian elimination; None if it is singular."""
+    size = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(rows[row][column]))
+        if abs(rows[pivot][column]) < 1e-9:
+            return None
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        for row in range(size):
+            if row != column:
+                factor = rows[row][column] / rows[column][column]
+                rows[row] = [a - factor * b for a, b in zip(rows[row], rows[column])]
+    return [rows[i][size] / rows[i][i] for i in range(size)]
+
+class Run:
+    """The review of one inventory repository, with its estimated cost."""
+
+    def __init__(self, entry, cost_model):
+        self.request = {key: value for key, value in dict(RUN_DEFAULTS, **entry).items() if key in RUN_KEYS}
+        self.repo = self.request['repo']
+        self.priority = entry.get('priority', 1)
+        self.cost_model = cost_model
+        self._estimate(min(entry.get('size', self.request['limit']), self.request['limit']))
+
+    def _estimate(self, prs):
+        self.prs = prs
+        self.requests = math.ceil(self.cost_model.requests(prs, self.request['analyze']))
+        self.seconds = self.cost_model.seconds(prs, self.request['analyze'])
+
+    def shorten(self, seconds):
+        """Lowers the PR limit of the run so that it takes at most `seconds`; False if not even one PR fits."""
+        if self.seconds <= seconds:
+            return True
+        analyze = self.request['analyze']
+        fixed = self.cost_model.seconds(0, analyze)
+        prs = math.floor((seconds - fixed) / (self.cost_model.seconds(1, analyze) - fixed))
+        if prs < 1:
+            return False
+        self.request['limit'] = prs
+        self._estimate(prs)
+        return True
+
+    def __repr__(self):
+        return f"Run({self.repo!r}, priority={self.priority}, requests={self.requests}, seconds={self.seconds:.0f})"
+
+class Batch:
+    """The runs of one handler invocation, started at hour:minute."""
+
+    def __init__(self, hour, minute=0):
+        self.hour = hour
+        self.minute = minute
+        self.runs = []
+
+    @property
+    def requests(self):
+        return sum(run.requests for run in self.runs)
+
+    @property
+    def seconds(self):
+        return sum(run.seconds for run in self.runs)
+
+    def event(self):
+        """The handler event of the batch: one report per repository."""
+        return {'reports': [dict(run.request) for run in self.runs]}
+
+class Plan:
+    """The batches of the day by hour, and the runs that did not fit."""
+
+    def __init__(self, hours, budget, concurrency, timeout):
+        self.budget = budget
+        self.concurrency = concurrency
+        self.seconds = timeout - SAFETY_MARGIN
+        # Minutes between waves of invocations
+        self.wave_minutes = math.ceil(timeout / 60)
+        self.waves = max(1, 60 // self.wave_minutes)
+        self.batches = {hour: [] for hour in hours}
+        self.shortened = []
+        self.deferred = []
+
+    def requests(self, hour):
+        return sum(batch.requests for batch in self.batches[hour])
+
+    def place(self, run):
+        """
+        Adds the run to the earliest hour with quota and a batch (or concurrency for
+        a new one) with time left, first lowering its PR limit if it would not finish
+        within one invocation.
+        """
+        if run.seconds > self.seconds:
+            if not run.shorten(self.seconds):
+                self.deferred.append(run)
+                return None
+            self.shortened.append(run)
+        for hour, batches in self.batches.items():
+            used = self.requests(hour)
+            # A run larger than an hour's quota gets an hour of its own
+            if used + run.requests > self.budget and used:
+                continue
+            batch = next((batch for batch in batches if batch.seconds + run.seconds <= self.seconds), None)
+            if batch is None:
+                if len(batches) >= self.concurrency * self.waves:
+                    continue
+                batch = Batch(hour, len(batches) // self.concurrency * self.wave_minutes)
+                batches.append(batch)
+            batch.runs.append(run)
+            return batch
+        self.deferred.append(run)
+        return None
+
+    def events(self):
+        """Returns the handler invocations of the day: [{'hour': hour, 'minute': minute, 'event': event}]."""
+        return [
+            {'hour': hour, 'minute': batch.minute, 'event': batch.event()}
+            for hour, batches in self.batches.items() for batch in batches
+        ]
+
+    def summary(self):
+        lines = []
+        for hour, batches in self.batches.items():
+            if batches:
+                runs = sum(len(batch.runs) for batch in batches)
+                lines.append(f"{hour:02d}:00  {len(batches)} invocations, {runs} repositories, "
+                             f"{self.requests(hour)}/{self.budget} requests")
+        if self.shortened:
+            lines.append(f"Limited to fit the timeout: {', '.join(f'{run.repo} ({run.prs} PRs)' for run in self.shortened)}")
+        if self.deferred:
+            lines.append(f"Deferred: {', '.join(run.repo for run in self.deferred)}")
+        return "\n".join(lines)
+
+def load_inventory(path):
+    """Reads an inventory: a JSON list of {"repo", "priority", "size", ...} entries."""
+    with open(path) as f:
+        inventory = json.load(f)
+    return inventory['repositories'] if isinstance(inventory, dict) else inventory
+
+def plan(inventory, cost_model=None, tokens=1, concurrency=10, timeout=LAMBDA_TIMEOUT, hours=range(24),
+         utilization=QUOTA_UTILIZATION):
+    """
+    Plans the runs of the inventory over the given hours of the day.
+
+    Runs are placed by priority and, within a priority, largest first, so the
+    most important repositories get the earliest hours and the batches pack
+    well. Every hour may spend `utilization` of the tokens' hourly quota and
+    start waves of `concurrency` invocations of at most `timeout` seconds each.
+    """
+    cost_model = cost_model or CostModel()
+    runs = sorted((Run(entry, cost_model) for entry in inventory), key=lambda run: (run.priority, -run.requests))
+    budget = int(tokens * REQUESTS_PER_TOKEN * utilization)
+    day = Plan(list(hours), budget, concurrency, timeout)
+    for run in runs:
+        day.place(run)
+    return day
+
+def simulate(day, actual_requests=None):
+    """
+    Replays a plan hour by hour: the batches of a wave run concurrently and
+    spend the requests of their runs, the estimated ones or actual_requests(run).
+    Returns one {'hour', 'invocations', 'concurrency', 'requests', 'longest'}
+    entry per hour with work: concurrency is the most invocations started in
+    one wave and longest the estimated seconds of the longest batch.
+    """
+    actual_requests = actual_requests or (lambda run: run.requests)
+    hours = []
+    for hour, batches in day.batches.items():
+        if batches:
+            waves = Counter(batch.minute for batch in batches)
+            hours.append({
+                'hour': hour,
+                'invocations': len(batches),
+                'concurrency': max(waves.values()),
+                'requests': sum(actual_requests(run) for batch in batches for run in batch.runs),
+                'longest': max(batch.seconds for batch in batches),
+            })
+    return hours
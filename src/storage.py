@@ -0,0 +1,141 @@
+"""
+JSON documents kept on local disk or in S3: run checkpoints, report
+fingerprints and change indexes, named after the repositories and state of
+their runs (store_name).
+"""
+import hashlib
+import io
+import json
+import os
+
+import telemetry
+from records import read_ndjson, write_ndjson
+
+def store_name(repositories, state):
+    """Returns a stable file name for what is kept about the runs over the given repositories and state."""
+    if len(repositories) == 1:
+        repo_short = repositories[0].split('/')[1] if '/' in repositories[0] else repositories[0]
+    else:
+        repo_short = "multi-repos"
+    digest = hashlib.sha1(",".join(sorted(repositories)).encode('utf-8')).hexdigest()[:8]
+    return f"{repo_short}_{state}_{digest}.json"
+
+class LocalStore:
+    """Keeps a JSON document (and NDJSON records) in a file on local disk."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __str__(self):
+        return self.path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, data):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a truncated document
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def sibling(self, suffix):
+        """Returns the store of the file whose path is this one's plus suffix."""
+        return LocalStore(f"{self.path}{suffix}")
+
+    def save_records(self, records):
+        """Writes PR records as NDJSON; returns how many were written."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            count = write_ndjson(records, f)
+        os.replace(tmp_path, self.path)
+        return count
+
+    def load_records(self):
+        """Yields the PR records written by save_records."""
+        with open(self.path) as f:
+            yield from read_ndjson(f)
+
+class S3Store:
+    """Keeps a JSON document (and NDJSON records) as an object in S3."""
+
+    def __init__(self, bucket_name, key):
+        self.bucket_name = bucket_name
+        self.key = key
+
+    def __str__(self):
+        return f"s3://{self.bucket_name}/{self.key}"
+
+    def load(self):
+        import boto3
+        s3_client = boto3.client('s3')
+        telemetry.count('S3Calls')
+        try:
+            response = s3_client.get_object(Bucket=self.bucket_name, Key=self.key)
+        except s3_client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def save(self, data):
+        import boto3
+        body = json.dumps(data).encode('utf-8')
+        boto3.client('s3').put_object(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            Body=body,
+            ContentType='application/json'
+        )
+        telemetry.count('S3Calls')
+        telemetry.count('BytesUploaded', len(body))
+
+    def delete(self):
+        import boto3
+        boto3.client('s3').delete_object(Bucket=self.bucket_name, Key=self.key)
+        telemetry.count('S3Calls')
+
+    def sibling(self, suffix):
+        """Returns the store of the object whose key is this one's plus suffix."""
+        return S3Store(self.bucket_name, f"{self.key}{suffix}")
+
+    def save_records(self, records):
+        """Writes PR records as an NDJSON object; returns how many were written."""
+        import boto3
+        buffer = io.StringIO()
+        count = write_ndjson(records, buffer)
+        body = buffer.getvalue().encode('utf-8')
+        boto3.client('s3').put_object(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            Body=body,
+            ContentType='application/x-ndjson'
+        )
+        telemetry.count('S3Calls')
+        telemetry.count('BytesUploaded', len(body))
+        return count
+
+    def load_records(self):
+        """Yields the PR records written by save_records."""
+        import boto3
+        response = boto3.client('s3').get_object(Bucket=self.bucket_name, Key=self.key)
+        telemetry.count('S3Calls')
+        yield from read_ndjson(response['Body'].iter_lines())
+
+def store_at(location):
+    """Returns the store for a local path or an s3://bucket/key location."""
+    if location.startswith('s3://'):
+        bucket_name, _, key = location[len('s3://'):].partition('/')
+        return S3Store(bucket_name, key)
+    return LocalStore(location)
@@ -0,0 +1,128 @@
+"""
+Run telemetry: stage durations and API call counters.
+
+The pipeline records into the current Telemetry through the module functions
+(stage, count, gauge). At the end of a run the metrics are emitted as one
+CloudWatch Embedded Metric Format (EMF) document: printed as a JSON line in
+Lambda, where CloudWatch Logs turns it into metrics, or appended to a local
+JSON lines file from the CLI (--metrics-file).
+
+Stages nest the way the pipeline does: fetch includes the analyze time of the
+PRs it collected and upload includes the index (web interface) update.
+
+With a profiler attached (review-code --profile), every stage is also run
+under it; see profiling.StageProfiler.
+"""
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+NAMESPACE = 'GitHubReviewer'
+
+# Units of the known metrics; stage durations are reported as <Stage>Duration in milliseconds
+UNITS = {
+    'GitHubRequests': 'Count',
+    'GitHubRateLimitRemaining': 'Count',
+    'GitHubTokenFailovers': 'Count',
+    'S3Calls': 'Count',
+    'SNSCalls': 'Count',
+    'BytesUploaded': 'Bytes',
+    'Repositories': 'Count',
+    'PullRequests': 'Count',
+    'PullRequestsAnalyzed': 'Count',
+    'ReportBytes': 'Bytes',
+    'ReportsUnchanged': 'Count',
+}
+
+def default_dimensions():
+    return {'Function': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'review-code')}
+
+class Telemetry:
+    """Accumulates stage durations, counters and gauges of one run."""
+
+    def __init__(self, dimensions=None, clock=time.perf_counter):
+        self.dimensions = dict(dimensions or default_dimensions())
+        self.clock = clock
+        self.durations = Counter()
+        self.counters = Counter()
+        self.gauges = {}
+        self.profiler = None
+
+    @contextmanager
+    def stage(self, name):
+        """Adds the time spent in the block to the duration of stage `name`."""
+        start = self.clock()
+        try:
+            with self.profiler.stage(name) if self.profiler else nullcontext():
+                yield
+        finally:
+            self.durations[name] += self.clock() - start
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def gauge(self, name, value):
+        """Records the latest value of a metric, e.g. the remaining rate limit."""
+        self.gauges[name] = value
+
+    def metrics(self):
+        """Returns {metric name: (value, unit)}."""
+        metrics = {
+            f"{name.capitalize()}Duration": (round(seconds * 1000, 3), 'Milliseconds')
+            for name, seconds in self.durations.items()
+        }
+        for name, value in list(self.counters.items()) + list(self.gauges.items()):
+            metrics[name] = (value, UNITS.get(name, 'Count'))
+        return metrics
+
+    def to_emf(self, timestamp=None):
+        """Builds the EMF document of the metrics recorded so far."""
+        metrics = self.metrics()
+        document = {
+            '_aws': {
+                'Timestamp': int((timestamp or time.time()) * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': NAMESPACE,
+                    'Dimensions': [sorted(self.dimensions)],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in sorted(metrics.items())]
+                }]
+            }
+        }
+        document.update(self.dimensions)
+        document.update({name: value for name, (value, _) in metrics.items()})
+        return document
+
+    def emit(self, path=None):
+        """Prints the EMF document as one JSON line, or appends it to the file at `path`."""
+        line = json.dumps(self.to_emf())
+        if path:
+            with open(path, 'a') as f:
+                f.write(line + "\n")
+        else:
+            print(line, flush=True)
+        return line
+
+_current = Telemetry()
+
+def start(dimensions=None):
+    """Starts recording a new run and returns its Telemetry."""
+    global _current
+    _current = Telemetry(dimensions)
+    return _current
+
+def current():
+    return _current
+
+def stage(name):
+    return _current.stage(name)
+
+def count(name, value=1):
+    _current.count(name, value)
+
+def gauge(name, value):
+    _current.gauge(name, value)
+
+def emit(path=None):
+    return _current.emit(path)
@@ -0,0 +1,177 @@
+"""
+GitHub token pool (several comma-separated tokens in --token / GITHUB_TOKEN).
+
+Every token, a personal access token or a GitHub App installation token, has
+its own primary rate limit (5000 requests an hour for a user token). The pool
+tracks the quota of each token from the X-RateLimit-* headers of its responses
+and hands out the token with the most quota left, so a run can spend the
+combined quota of all its tokens. A token answered with a rate limit 403/429
+is set aside until its limit resets (or for its Retry-After) and the request
+is sent again with another token.
+
+PyGithub is not imported here: github_auth plugs the pool into PyGithub, and
+diffs and async_engine use it directly.
+"""
+import click
+import threading
+import time
+
+import telemetry
+
+# Quota assumed for a token before its first response tells the real one
+DEFAULT_LIMIT = 5000
+
+# Set-aside time of a rate limited token whose response had no reset time
+DEFAULT_BLOCK_SECONDS = 60
+
+def header(headers, name):
+    """Reads a response header from PyGithub's lower-cased dict as well as from requests/aiohttp headers."""
+    value = headers.get(name)
+    return headers.get(name.lower()) if value is None else value
+
+class TokenState:
+    """The quota and usage of one token of the pool."""
+
+    def __init__(self, token, index):
+        self.token = token
+        # Never print the token itself
+        self.label = f"token {index} (...{token[-4:]})"
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.blocked_until = 0
+        self.pending = 0
+        self.requests = 0
+        self.rate_limited = 0
+
+    def quota(self, now):
+        """Requests left to the token, counting those in flight as spent."""
+        if self.remaining is None or (self.reset is not None and self.reset <= now):
+            remaining = self.limit or DEFAULT_LIMIT
+        else:
+            remaining = self.remaining
+        return remaining - self.pending
+
+class TokenPool:
+    """Routes requests to the token with the most quota left, failing over when one gets rate limited."""
+
+    def __init__(self, tokens, clock=time.time):
+        if not tokens:
+            raise ValueError("A token pool needs at least one token")
+        self.tokens = [TokenState(token, index) for index, token in enumerate(tokens, 1)]
+        self.clock = clock
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def of(cls, tokens):
+        """Returns the pool of a comma-separated token string (a pool is returned as is), or None without tokens."""
+        if tokens is None or isinstance(tokens, TokenPool):
+            return tokens
+        tokens = [token.strip() for token in tokens.split(',') if token.strip()]
+        return cls(tokens) if tokens else None
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def _available(self, now):
+        return [state for state in self.tokens if state.blocked_until <= now]
+
+    def acquire(self):
+        """
+        Returns the token for the next request: the one with the most quota left
+        among the tokens that are not set aside or, if all of them are, the one
+        set aside for the shortest time. Ties go to the first token.
+        """
+        with self._lock:
+            now = self.clock()
+            available = self._available(now)
+            if available:
+                state = max(available, key=lambda state: state.quota(now))
+            else:
+                state = min(self.tokens, key=lambda state: state.blocked_until)
+            state.pending += 1
+            state.requests += 1
+            return state
+
+    def can_fail_over(self):
+        """Tells whether more than one token is available, so a rate limited request can be sent again."""
+        with self._lock:
+            return len(self._available(self.clock())) > 1
+
+    def reset_in(self):
+        """Returns the seconds until a token of the pool is available again, 0 if one is available now."""
+        with self._lock:
+            now = self.clock()
+            return max(0.0, min(state.blocked_until for state in self.tokens) - now)
+
+    def release(self, state, status=None, headers=None, message=''):
+        """
+        Records the response to a request sent with `state`'s token (no status
+        if the request failed). Returns True if the token was rate limited and
+        another token is available to send the request again.
+        """
+        with self._lock:
+            state.pending -= 1
+            if headers is None:
+                return False
+            remaining = header(headers, 'X-RateLimit-Remaining')
+            limit = header(headers, 'X-RateLimit-Limit')
+            reset = header(headers, 'X-RateLimit-Reset')
+            if remaining is not None:
+                state.remaining = int(float(remaining))
+            if limit is not None:
+                state.limit = int(float(limit))
+            if reset is not None:
+                state.reset = int(float(reset))
+
+            retry_after = header(headers, 'Retry-After')
+            rate_limited = status in (403, 429) and (
+                state.remaining == 0 or retry_after is not None or 'rate limit' in (message or '').lower()
+            )
+            if not rate_limited:
+                return False
+
+            now = self.clock()
+            state.rate_limited += 1
+            if retry_after is not None:
+                state.blocked_until = now + float(retry_after)
+            elif state.remaining == 0 and state.reset is not None:
+                state.blocked_until = state.reset
+            else:
+                state.blocked_until = now + DEFAULT_BLOCK_SECONDS
+            if not [other for other in self._available(now) if other is not state]:
+                return False
+            self.failovers += 1
+            telemetry.count('GitHubTokenFailovers')
+            return True
+
+    def usage(self):
+        """Returns the requests, remaining quota and rate limit responses of every token."""
+        with self._lock:
+            return [
+                {
+                    'token': state.label,
+                    'requests': state.requests,
+                    'remaining': state.remaining,
+                    'limit': state.limit,
+                    'rate_limited': state.rate_limited,
+                }
+                for state in self.tokens
+            ]
+
+    def report(self):
+        """Records the quota left to the whole pool and, with several tokens, prints the usage of each one."""
+        usage = self.usage()
+        known = [token['remaining'] for token in usage if token['remaining'] is not None]
+        if known:
+            telemetry.gauge('GitHubRateLimitRemaining', sum(known))
+        if len(usage) < 2:
+            return usage
+        for token in usage:
+            remaining = '?' if token['remaining'] is None else f"{token['remaining']}/{token['limit']}"
+            click.echo(f"GitHub {token['token']}: {token['requests']} requests, {remaining} remaining, "
+                       f"{token['rate_limited']} rate limited")
+        if self.failovers:
+            click.echo(f"{self.failovers} requests failed over to another token")
+        return usage
@@ -3,6 +3,8 @@ import json
 import boto3
 from datetime import datetime, timedelta
 
+import telemetry
+
 def generate_index_html(bucket_name):
     """
     Generates the HTML page for the web interface listing available reports.
@@ -25,6 +27,7 @@ def generate_index_html(bucket_name):
                 Bucket=bucket_name,
                 Prefix=f"reports/{date_str}/"
             )
+            telemetry.count('S3Calls')
             
             if 'Contents' in response:
                 for obj in response['Contents']:
@@ -187,6 +190,8 @@ def generate_index_html(bucket_name):
             Key="index.html",
             ContentType="text/html"
         )
+        telemetry.count('S3Calls')
+        telemetry.count('BytesUploaded', len(html.encode('utf-8')))
         
         # Create error page
         error_html = """
@@ -214,6 +219,8 @@ def generate_index_html(bucket_name):
             Key="error.html",
             ContentType="text/html"
         )
+        telemetry.count('S3Calls')
+        telemetry.count('BytesUploaded', len(error_html.encode('utf-8')))
         
         return f"https://{bucket_name}.s3-website-{os.environ.get('AWS_REGION', 'us-east-1')}.amazonaws.com"
     except Exception as e:
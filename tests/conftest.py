@@ -1,11 +1,24 @@
 import os
 import pytest
 from unittest.mock import MagicMock, patch
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+class FakeClock:
+    """A clock that only moves when the test sets `now`."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
 
 @pytest.fixture
 def mock_github():
-    with patch('src.cli.Github') as mock:
+    with patch('src.cli._github') as mock:
         yield mock
 
 @pytest.fixture
@@ -21,6 +34,7 @@ def mock_pull_request():
     mock.user.login = "testuser"
     mock.created_at = datetime.now(timezone.utc)
     mock.updated_at = datetime.now(timezone.utc)
+    mock.head.sha = "0" * 40
     mock.comments = 5
     mock.additions = 100
     mock.deletions = 50
@@ -57,6 +71,7 @@ def sample_pr_data():
         'user': 'testuser',
         'created_at': datetime.now(timezone.utc),
         'updated_at': datetime.now(timezone.utc),
+        'head_sha': '0' * 40,
         'comments': 5,
         'additions': 100,
         'deletions': 50,
@@ -67,6 +82,47 @@ def sample_pr_data():
         'analysis': {}
     }]
 
+@pytest.fixture
+def make_record():
+    """
+    Builds PR records: make_record(number, repo=..., issues=[...], **fields). With
+    issues, the record carries an analysis reporting them; other fields override
+    the defaults. Records are last updated on 2026-03-01.
+    """
+    def make(number, repo='test/repo', issues=None, **fields):
+        updated = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        record = {
+            'repo': repo, 'number': number, 'title': f"PR {number}", 'user': 'testuser',
+            'created_at': updated - timedelta(days=1), 'updated_at': updated, 'head_sha': f"{number:040x}",
+            'comments': 0, 'additions': 1, 'deletions': 1, 'changed_files': 1,
+            'url': f"https://github.com/{repo}/pull/{number}", 'state': 'open', 'merged': False,
+            'analysis': {} if issues is None else {
+                'issues': list(issues), 'risk_score': len(issues), 'languages': {}, 'complexity': 0
+            }
+        }
+        record.update(fields)
+        return record
+    return make
+
+@pytest.fixture
+def make_pull(make_record):
+    """
+    Builds PyGithub-like pull requests with the fields of make_record's records,
+    created and updated now so that the --days filter keeps them.
+    """
+    def make(number, **fields):
+        now = datetime.now(timezone.utc)
+        record = make_record(number, **dict({'created_at': now, 'updated_at': now}, **fields))
+        pull = MagicMock()
+        for name in ('number', 'title', 'created_at', 'updated_at', 'comments', 'additions', 'deletions',
+                     'changed_files', 'state', 'merged'):
+            setattr(pull, name, record[name])
+        pull.user.login = record['user']
+        pull.head.sha = record['head_sha']
+        pull.html_url = record['url']
+        return pull
+    return make
+
 @pytest.fixture
 def mock_s3_client():
     with patch('boto3.client') as mock:
@@ -80,4 +136,11 @@ def mock_sns_client():
         mock_client = MagicMock()
         mock_client.create_topic.return_value = {'TopicArn': 'arn:aws:sns:us-east-1:123456789012:test-topic'}
         mock.return_value = mock_client
-        yield mock
\ No newline at end of file
+        yield mock
+
+@pytest.fixture(autouse=True)
+def reset_notification_cache():
+    import notifications
+    notifications.reset_cache()
+    yield
+    notifications.reset_cache()
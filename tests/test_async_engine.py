@@ -0,0 +1,153 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import async_engine
+from benchmarks.fake_github import FakeGitHubServer
+
+@pytest.fixture
+def no_sleep():
+    # The sync engine pauses between PRs and PyGithub throttles its requests
+    with patch('time.sleep'):
+        yield
+
+@pytest.fixture
+def no_backoff():
+    # Retries of server errors back off for seconds
+    sleep = asyncio.sleep
+
+    async def no_delay(delay):
+        await sleep(0)
+
+    with patch('async_engine.asyncio.sleep', side_effect=no_delay):
+        yield
+
+def since(days=30):
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+class TestAsyncEngine:
+    def test_same_records_as_sync_engine(self, no_sleep):
+        # Arrange
+        import cli
+        with FakeGitHubServer(repos=2, prs_per_repo=12, files_per_pr=3, max_per_page=5) as server:
+            repositories = server.data.repository_names()
+
+            # Act
+            sync_records = cli.collect_repositories(repositories, 'test', 30, 'open', 8, True, base_url=server.base_url)
+            async_records = cli.collect_repositories(
+                repositories, 'test', 30, 'open', 8, True, base_url=server.base_url, engine='async'
+            )
+
+        # Assert
+        assert len(async_records) == 16
+        assert async_records == sync_records
+
+    def test_listing_stops_at_limit(self):
+        # Arrange
+        with FakeGitHubServer(repos=1, prs_per_repo=50, max_per_page=10) as server:
+            # Act
+            records = async_engine.collect_repositories(
+                ['synthetic/repo0'], 'test', since(), limit=25, base_url=server.base_url
+            )
+            stats = server.stats
+
+        # Assert
+        assert [record['number'] for record in records] == list(range(50, 25, -1))
+        assert stats['GET pulls'] == 3
+        assert stats['GET pull'] == 25
+        assert stats['GET files'] == 0
+
+    def test_listing_stops_at_date_cutoff(self):
+        # Arrange
+        with FakeGitHubServer(repos=1, prs_per_repo=50, max_per_page=10) as server:
+            # PRs are created 10 minutes apart, so 45 minutes reach back 5 PRs
+            cutoff = server.data.now - timedelta(minutes=45)
+
+            # Act
+            records = async_engine.collect_repositories(['synthetic/repo0'], 'test', cutoff, base_url=server.base_url)
+            stats = server.stats
+
+        # Assert
+        assert len(records) == 5
+        assert stats['GET pulls'] == 1
+
+    def test_secondary_rate_limits_retried(self):
+        # Arrange
+        with FakeGitHubServer(repos=1, prs_per_repo=10, files_per_pr=2, secondary_limit_every=4, retry_after=0) as server:
+            # Act
+            records = async_engine.collect_repositories(
+                ['synthetic/repo0'], 'test', since(), analyzer=lambda repository, pr, files: {'files': len(files)},
+                base_url=server.base_url
+            )
+            stats = server.stats
+
+        # Assert
+        assert stats['secondary_limited'] > 0
+        assert len(records) == 10
+        assert all(record['analysis'] == {'files': 2} for record in records)
+
+    def test_html_server_errors_retried(self, no_backoff):
+        # Arrange
+        with FakeGitHubServer(repos=1, prs_per_repo=10, files_per_pr=2, server_error_every=4) as server:
+            # Act
+            records = async_engine.collect_repositories(
+                ['synthetic/repo0'], 'test', since(), analyzer=lambda repository, pr, files: {'files': len(files)},
+                base_url=server.base_url
+            )
+            stats = server.stats
+
+        # Assert
+        assert stats['server_errors'] > 0
+        assert len(records) == 10
+        assert all(record['analysis'] == {'files': 2} for record in records)
+
+    def test_pull_error_skips_only_that_pull(self, capsys):
+        # Arrange
+        with FakeGitHubServer(repos=1, prs_per_repo=5, missing_pulls=[3]) as server:
+            # Act
+            records = async_engine.collect_repositories(['synthetic/repo0'], 'test', since(), base_url=server.base_url)
+
+        # Assert
+        assert [record['number'] for record in records] == [5, 4, 2, 1]
+        assert "Error processing PR #3 of synthetic/repo0: 404 Not Found" in capsys.readouterr().err
+
+    def test_repository_error_returns_no_records(self, capsys):
+        # Arrange
+        with FakeGitHubServer(repos=1, prs_per_repo=3) as server:
+            # Act
+            records = async_engine.collect_repositories(
+                ['synthetic/missing', 'synthetic/repo0'], 'test', since(), base_url=server.base_url
+            )
+
+        # Assert
+        assert [record['repo'] for record in records] == ['synthetic/repo0'] * 3
+        assert "Error processing repository synthetic/missing: 404" in capsys.readouterr().err
+
+    def test_deadline_truncates(self):
+        # Arrange
+        from deadline import Deadline
+        deadline = Deadline(0)
+        with FakeGitHubServer(repos=1, prs_per_repo=5) as server:
+            # Act
+            records = async_engine.collect_repositories(
+                ['synthetic/repo0'], 'test', since(), deadline=deadline, base_url=server.base_url
+            )
+
+        # Assert
+        assert records == []
+        assert deadline.truncated
+
+    def test_checkpoint_not_supported(self):
+        # Arrange
+        from src.cli import review_code
+        from click.testing import CliRunner
+
+        # Act
+        result = CliRunner().invoke(review_code, [
+            '--repo', 'test/repo', '--token', 'test', '--engine', 'async', '--checkpoint', 'run.json'
+        ])
+
+        # Assert
+        assert result.exit_code == 2
+        assert "--checkpoint cannot be combined with --engine async" in result.output
@@ -0,0 +1,111 @@
+import pytest
+
+from benchmarks.render import run_render_benchmark
+from benchmarks.run import StageRecorder, best_of, compare, reset_peak_rss, run_benchmark
+from benchmarks.startup import compare as compare_startup
+from benchmarks.synthetic import SyntheticGitHub
+
+class TestSyntheticGitHub:
+    def test_generates_requested_shape(self):
+        # Arrange
+        github = SyntheticGitHub(repos=2, prs_per_repo=35, files_per_pr=3, seed=1)
+
+        # Act
+        repository = github.get_repo(github.repository_names()[0])
+        prs = list(repository.get_pulls(state='open'))
+        files = prs[0].get_files()
+
+        # Assert
+        assert len(prs) == 35
+        assert [pr.number for pr in prs[:2]] == [35, 34]
+        assert len(files) == 3
+        assert prs[0].additions == sum(f.additions for f in files)
+        assert github.calls == {'repo': 1, 'pulls_page': 2, 'pull': 1, 'files': 1}
+
+    def test_deterministic_for_a_seed(self):
+        # Act
+        first = list(SyntheticGitHub(seed=7).get_repo('synthetic/repo0').get_pulls())[0].get_files()
+        second = list(SyntheticGitHub(seed=7).get_repo('synthetic/repo0').get_pulls())[0].get_files()
+
+        # Assert
+        assert [f.patch for f in first] == [f.patch for f in second]
+
+@pytest.mark.benchmark
+class TestBenchmark:
+    def test_run_benchmark_smallest_scale(self, tmp_path):
+        # Act
+        result = run_benchmark('10', output_dir=str(tmp_path))
+
+        # Assert
+        assert result['prs'] == 10
+        assert set(result['stages']) == {'fetch', 'analyze', 'render', 'upload'}
+        assert result['github_requests'] == 1 + 1 + 1 + 10 + 10
+        assert result['s3_calls']['upload_file'] == 1
+        assert result['bytes_uploaded'] >= result['report_size']
+
+    @pytest.mark.skipif(not reset_peak_rss(), reason="the peak resident memory cannot be reset here")
+    def test_stage_peak_memory_is_its_own(self):
+        # Arrange
+        recorder = StageRecorder()
+
+        # Act
+        with recorder.stage('large', 1):
+            buffer = b'x' * (256 * 1024 * 1024)
+            del buffer
+        with recorder.stage('small', 1):
+            pass
+
+        # Assert
+        assert recorder.stages['small']['peak_memory'] < recorder.stages['large']['peak_memory'] - 128 * 1024 * 1024
+
+    def test_best_of_keeps_fastest_stage_times(self):
+        # Arrange
+        def result(fetch, render):
+            return {'prs': 10, 'peak_memory': 100, 'stages': {
+                'fetch': {'wall_time': fetch, 'peak_memory': 90, 'items': 10},
+                'render': {'wall_time': render, 'peak_memory': 100, 'items': 10},
+            }}
+
+        # Act
+        best = best_of([result(0.5, 2.0), result(1.0, 1.0)])
+
+        # Assert
+        assert [stage['wall_time'] for stage in best['stages'].values()] == [0.5, 1.0]
+        assert best['wall_time'] == 1.5
+        assert best['repeat'] == 2
+
+    def test_compare_flags_regressions(self):
+        # Arrange
+        baseline = {'wall_time': 1.0, 'peak_memory': 100, 'github_requests': 10, 's3_requests': 5,
+                    'stages': {'render': {'wall_time': 1.0, 'peak_memory': 100}}}
+        result = {'wall_time': 1.1, 'peak_memory': 100, 'github_requests': 11, 's3_requests': 5,
+                  'stages': {'render': {'wall_time': 2.0, 'peak_memory': 100}}}
+
+        # Act
+        regressions = compare(result, baseline, tolerance=0.25)
+
+        # Assert
+        assert [r.split(':')[0] for r in regressions] == ['render.wall_time', 'github_requests']
+
+@pytest.mark.benchmark
+class TestRenderBenchmark:
+    def test_render_benchmark_smallest_scale(self, tmp_path):
+        # Act
+        result = run_render_benchmark(50, output_dir=str(tmp_path))
+
+        # Assert
+        assert result['prs'] == 50
+        assert result['per_pr_ms'] > 0
+        assert result['report_size'] > 0
+
+class TestStartupBenchmark:
+    def test_compare_flags_heavier_import(self):
+        # Arrange
+        baseline = {'import_ms': 40.0, 'modules': 140}
+        result = {'import_ms': 55.0, 'modules': 400}
+
+        # Act
+        regressions = compare_startup(result, baseline, tolerance=0.5)
+
+        # Assert
+        assert [r.split(':')[0] for r in regressions] == ['modules']
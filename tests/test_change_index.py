@@ -0,0 +1,160 @@
+import json
+import os
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from click.testing import CliRunner
+
+import cli
+from change_index import ChangeIndex, build_index, changed_keys, compute_delta, delta_counts
+
+UPDATED = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+class TestComputeDelta:
+    def test_classifies_changes(self, make_record):
+        # Arrange
+        before = build_index([
+            make_record(1), make_record(2), make_record(3, state='closed'), make_record(4), make_record(5),
+            make_record(6), make_record(7, issues=["TODOs found in a.py"])
+        ])
+        after = build_index([
+            make_record(1), make_record(2, state='closed', merged=True), make_record(3), make_record(4, state='closed'),
+            make_record(5, updated_at=UPDATED + timedelta(hours=1)), make_record(8),
+            make_record(7, issues=["TODOs found in a.py", "FIXMEs found in b.py"])
+        ])
+
+        # Act
+        delta = compute_delta(before, after, changed_keys(before, after))
+
+        # Assert
+        numbers = {category: [pr['number'] for pr in prs] for category, prs in delta.items()}
+        assert numbers == {'new': [8], 'merged': [2], 'closed': [4], 'reopened': [3], 'updated': [5, 7],
+                           'removed': [6], 'new_issues': [7]}
+        assert delta['new_issues'][0]['issues'] == ["FIXMEs found in b.py"]
+        assert delta['merged'][0]['state'] == 'merged'
+
+    def test_unchanged_keys_left_out(self, make_record):
+        # Arrange
+        index = build_index([make_record(1)])
+
+        # Act
+        delta = compute_delta(index, index, ['test/repo#1'])
+
+        # Assert
+        assert not any(delta_counts(delta).values())
+
+class TestChangeIndex:
+    def test_first_run_has_no_delta(self, tmp_path, make_record):
+        # Arrange
+        index = ChangeIndex(str(tmp_path))
+
+        # Act
+        entries, delta = index.compare([make_record(1)])
+        index.save(entries)
+
+        # Assert
+        assert delta is None
+        assert index.runs()[0]['changed'] == 1
+        with pytest.raises(ValueError, match="Fewer than two runs"):
+            index.delta()
+
+    def test_delta_between_any_two_runs_reads_changelogs_only(self, tmp_path, make_record):
+        # Arrange
+        index = ChangeIndex(str(tmp_path))
+        runs = [
+            [make_record(number) for number in range(1, 1001)],
+            [make_record(1, state='closed', merged=True)] + [make_record(number) for number in range(2, 1001)],
+            [make_record(1, state='closed', merged=True)] + [make_record(number) for number in range(3, 1002)],
+        ]
+        ids = []
+        for number, records in enumerate(runs):
+            entries, delta = index.compare(records)
+            ids.append(index.save(entries, run_id=f"run{number}"))
+
+        # Act
+        reader = ChangeIndex(str(tmp_path))
+        with patch.object(reader, 'load', side_effect=AssertionError("run index read")):
+            delta = reader.delta(ids[0], ids[2])
+
+        # Assert
+        changelogs = [reader.changelog(run_id) for run_id in ids[1:]]
+        assert [sorted(changes['after']) for changes in changelogs] == [
+            ['test/repo#1'], ['test/repo#1001', 'test/repo#2']
+        ]
+        assert delta_counts(delta) == {'new': 1, 'merged': 1, 'closed': 0, 'reopened': 0, 'updated': 0,
+                                       'removed': 1, 'new_issues': 0}
+        assert (delta['from'], delta['to']) == ('run0', 'run2')
+        assert [run['prs'] for run in index.runs()] == [1000, 1000, 1000]
+
+    def test_unknown_or_reversed_runs_rejected(self, tmp_path, make_record):
+        # Arrange
+        index = ChangeIndex(str(tmp_path))
+        for number in range(2):
+            entries, delta = index.compare([make_record(1, updated_at=UPDATED + timedelta(hours=number))])
+            index.save(entries, run_id=f"run{number}")
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="not indexed"):
+            index.delta('run7')
+        with pytest.raises(ValueError, match="not older"):
+            index.delta('run1', 'run0')
+
+class TestTrackChanges:
+    def publish(self, tmp_path, records, output='report.pdf'):
+        return cli.publish_report(['test/repo'], records, str(tmp_path / output), 7, 'open', track_changes=True)
+
+    def test_second_run_writes_delta_next_to_report(self, tmp_path, make_record):
+        # Arrange
+        self.publish(tmp_path, [make_record(1), make_record(2)], 'first.pdf')
+
+        # Act
+        with patch.object(cli, 'generate_pdf_report', wraps=cli.generate_pdf_report) as render:
+            self.publish(tmp_path, [make_record(1, state='closed', merged=True), make_record(3)], 'second.pdf')
+
+        # Assert
+        assert not os.path.exists(tmp_path / 'first.delta.json')
+        delta = json.loads((tmp_path / 'second.delta.json').read_text())
+        assert [pr['number'] for pr in delta['merged']] == [1]
+        assert [pr['number'] for pr in delta['new']] == [3]
+        assert [pr['number'] for pr in delta['removed']] == [2]
+        assert render.call_args.args[6]['merged'][0]['number'] == 1
+
+    def test_partial_report_not_indexed(self, tmp_path, make_record):
+        # Arrange
+        from unittest.mock import MagicMock
+        deadline = MagicMock()
+        deadline.summary.return_value = "Partial report: stopped after 1 PRs because the time limit was reached."
+
+        # Act
+        cli.publish_report(['test/repo'], [make_record(1)], str(tmp_path / 'r.pdf'), 7, 'open', deadline=deadline,
+                           track_changes=True)
+
+        # Assert
+        assert not os.path.exists(tmp_path / '.change-index')
+
+    def test_diff_command(self, tmp_path, make_record):
+        # Arrange
+        self.publish(tmp_path, [make_record(1), make_record(2)], 'first.pdf')
+        self.publish(tmp_path, [make_record(1), make_record(2, issues=["FIXMEs found in b.py"])], 'second.pdf')
+        output = tmp_path / 'delta.json'
+
+        # Act
+        result = CliRunner().invoke(cli.diff, [
+            '--repo', 'test/repo', '--directory', str(tmp_path), '--output', str(output)
+        ])
+        listing = CliRunner().invoke(cli.diff, ['--repo', 'test/repo', '--directory', str(tmp_path), '--list'])
+
+        # Assert
+        assert result.exit_code == 0
+        assert "Updated: 1" in result.output
+        assert "New issue in [test/repo] PR #2: FIXMEs found in b.py" in result.output
+        assert json.loads(output.read_text())['updated'][0]['number'] == 2
+        assert len(listing.output.splitlines()) == 2
+
+    def test_diff_without_runs(self, tmp_path):
+        # Act
+        result = CliRunner().invoke(cli.diff, ['--repo', 'test/repo', '--directory', str(tmp_path)])
+
+        # Assert
+        assert result.exit_code == 1
+        assert "Fewer than two runs" in result.output
@@ -0,0 +1,143 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from click.testing import CliRunner
+
+from checkpoint import RunCheckpoint
+from storage import LocalStore
+from src.cli import cli
+
+OPTIONS = {'repositories': ['test/repo'], 'state': 'open', 'days': 7, 'analyze': False, 'limit': 100}
+
+def failing_listing(prs, fail_after):
+    """Yields the PRs, raising after fail_after of them like a rate-limited pagination."""
+    for index, pr in enumerate(prs):
+        if index == fail_after:
+            raise RuntimeError("API rate limit exceeded")
+        yield pr
+
+class TestRunCheckpoint:
+    def test_saves_every_n_records(self, tmp_path, sample_pr_data):
+        # Arrange
+        store = LocalStore(str(tmp_path / "run.json"))
+        checkpoint = RunCheckpoint.open(store, OPTIONS, every=2)
+
+        # Act
+        checkpoint.record('test/repo', dict(sample_pr_data[0], number=5))
+        after_first = store.load()
+        checkpoint.record('test/repo', dict(sample_pr_data[0], number=4))
+
+        # Assert
+        assert after_first is None
+        assert store.load()['cursors'] == {'test/repo': 4}
+
+    def test_resume_restores_records(self, tmp_path, sample_pr_data):
+        # Arrange
+        store = LocalStore(str(tmp_path / "run.json"))
+        checkpoint = RunCheckpoint.open(store, OPTIONS)
+        checkpoint.record('test/repo', sample_pr_data[0])
+        checkpoint.save()
+
+        # Act
+        resumed = RunCheckpoint.open(store, OPTIONS, resume=True)
+
+        # Assert
+        assert list(resumed.records_for('test/repo')) == sample_pr_data
+        assert resumed.last_number('test/repo') == 1
+        assert not resumed.is_completed('test/repo')
+
+    def test_saves_append_only_new_records(self, tmp_path, sample_pr_data):
+        # Arrange
+        store = LocalStore(str(tmp_path / "run.json"))
+        checkpoint = RunCheckpoint.open(store, OPTIONS, every=2)
+
+        # Act
+        for number in range(6, 0, -1):
+            repo_name = 'test/repo' if number % 2 else 'test/other'
+            checkpoint.record(repo_name, dict(sample_pr_data[0], repo=repo_name, number=number))
+        resumed = RunCheckpoint.open(store, OPTIONS, resume=True)
+
+        # Assert
+        parts = [list(store.sibling(part['suffix']).load_records()) for part in store.load()['parts']]
+        assert [[r['number'] for r in records] for records in parts] == [[6, 5], [4, 3], [2, 1]]
+        assert 'records' not in store.load()
+        assert [r['number'] for r in resumed.records_for('test/repo')] == [5, 3, 1]
+        assert resumed.count('test/other') == 3
+
+    def test_finish_deletes_parts(self, tmp_path, sample_pr_data):
+        # Arrange
+        store = LocalStore(str(tmp_path / "run.json"))
+        checkpoint = RunCheckpoint.open(store, OPTIONS, every=1)
+        checkpoint.record('test/repo', sample_pr_data[0])
+        checkpoint.complete('test/repo')
+
+        # Act
+        checkpoint.finish(['test/repo'])
+
+        # Assert
+        assert list(tmp_path.iterdir()) == []
+
+    def test_resume_ignores_checkpoint_with_other_options(self, tmp_path, sample_pr_data):
+        # Arrange
+        store = LocalStore(str(tmp_path / "run.json"))
+        checkpoint = RunCheckpoint.open(store, OPTIONS)
+        checkpoint.record('test/repo', sample_pr_data[0])
+        checkpoint.save()
+
+        # Act
+        resumed = RunCheckpoint.open(store, dict(OPTIONS, state='closed'), resume=True)
+
+        # Assert
+        assert resumed.record_count() == 0
+
+    def test_finish_deletes_only_when_complete(self, tmp_path):
+        # Arrange
+        store = LocalStore(str(tmp_path / "run.json"))
+        checkpoint = RunCheckpoint.open(store, OPTIONS)
+
+        # Act & Assert
+        checkpoint.finish(['test/repo'])
+        assert store.load() is not None
+        checkpoint.complete('test/repo')
+        checkpoint.finish(['test/repo'])
+        assert store.load() is None
+
+@pytest.mark.integration
+class TestResume:
+    def test_review_code_resumes_after_failure(self, mock_github, mock_repository, tmp_path, make_pull):
+        # Arrange
+        runner = CliRunner()
+        prs = [make_pull(3), make_pull(2), make_pull(1)]
+        pulls = MagicMock()
+        pulls.totalCount = 3
+        mock_github.return_value.get_repo.return_value = mock_repository
+        mock_repository.get_pulls.return_value = pulls
+        location = str(tmp_path / "run.json")
+        args = ['review-code', '--repo', 'test/repo', '--token', 'test_token',
+                '--output', str(tmp_path / "report.pdf"), '--checkpoint', location, '--checkpoint-every', '1']
+
+        # Act
+        pulls.__iter__.side_effect = lambda: failing_listing(prs, fail_after=2)
+        first = runner.invoke(cli, args)
+        saved = json.load(open(location))
+
+        pulls.__iter__.side_effect = lambda: iter(prs)
+        second = runner.invoke(cli, args + ['--resume'])
+
+        # Assert
+        assert first.exit_code == 0
+        assert saved['cursors'] == {'test/repo': 2}
+        assert second.exit_code == 0
+        assert "Resuming after PR #2 (2 already collected)" in second.output
+        assert "Processing PR #1 (3/3)" in second.output
+        assert "Processing PR #3" not in second.output
+        assert "PDF report generated" in second.output
+        assert not (tmp_path / "run.json").exists()
+
+    def test_resume_requires_checkpoint(self):
+        # Act
+        result = CliRunner().invoke(cli, ['review-code', '--repo', 'test/repo', '--token', 't', '--resume'])
+
+        # Assert
+        assert result.exit_code != 0
+        assert "--resume requires --checkpoint" in result.output
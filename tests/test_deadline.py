@@ -0,0 +1,172 @@
+import json
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+from click.testing import CliRunner
+
+from deadline import Deadline
+from src.cli import cli
+
+class TestDeadline:
+    def test_from_context_keeps_safety_margin(self):
+        # Arrange
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 60000
+
+        # Act
+        deadline = Deadline.from_context(context, safety_margin=10)
+
+        # Assert
+        assert 49 < deadline.remaining() <= 50
+
+    def test_degrades_analysis_before_fetching(self, clock):
+        # Arrange
+        deadline = Deadline(100, clock=clock)
+
+        # Act & Assert
+        assert deadline.can_analyze() and deadline.can_fetch()
+        clock.now = 89.5  # 10.5 s left: enough to fetch and publish, not to analyze
+        assert deadline.can_fetch() and not deadline.can_analyze()
+        clock.now = 95
+        assert not deadline.can_fetch()
+
+    def test_reserve_grows_with_report_size(self, clock):
+        # Arrange
+        deadline = Deadline(100, clock=clock)
+
+        # Act
+        small = deadline.publish_reserve(10)
+        large = deadline.publish_reserve(5000)
+
+        # Assert
+        assert large > small
+
+    def test_can_run_records_skipped_stages(self, clock):
+        # Arrange
+        deadline = Deadline(5, clock=clock)
+
+        # Act & Assert
+        assert deadline.can_run('notify')
+        assert not deadline.can_run('index')
+        assert deadline.skipped_stages == ['index']
+
+    def test_summary(self, clock):
+        # Arrange
+        deadline = Deadline(100, clock=clock)
+
+        # Act & Assert
+        assert deadline.summary() is None
+        deadline.collected(analyzed=False)
+        deadline.truncate()
+        assert deadline.summary() == (
+            "Partial report: stopped after 1 PRs because the time limit was reached; "
+            "code analysis skipped for 1 PRs."
+        )
+
+    def test_can_wait_keeps_time_to_fetch_and_publish(self, clock):
+        # Arrange
+        deadline = Deadline(60, clock)
+
+        # Act / Assert
+        # Fetching one more PR and publishing it takes 1 + 3.02 + 5 seconds
+        assert deadline.can_wait(50)
+        assert not deadline.can_wait(51)
+
+    def test_report_deadline_shares_time_limit_only(self, clock):
+        # Arrange
+        run_deadline = Deadline(100, clock=clock)
+        first = run_deadline.for_report()
+        first.collected(analyzed=False)
+        first.truncate()
+
+        # Act
+        second = run_deadline.for_report()
+        clock.now = 40
+
+        # Assert
+        assert second.remaining() == first.remaining() == 60
+        assert (second.pr_count, second.truncated, second.analysis_skipped) == (0, False, 0)
+        assert second.summary() is None
+
+@pytest.mark.integration
+class TestTimeBudget:
+    def test_review_code_skips_analysis_when_short_on_time(self, mock_github, mock_repository, mock_pulls_paginated, tmp_path):
+        # Arrange
+        runner = CliRunner()
+        mock_github.return_value.get_repo.return_value = mock_repository
+        mock_repository.get_pulls.return_value = mock_pulls_paginated
+
+        # Act
+        result = runner.invoke(cli, [
+            'review-code', '--repo', 'test/repo', '--token', 'test_token', '--analyze',
+            '--output', str(tmp_path / "report.pdf"), '--time-budget', '10'
+        ])
+
+        # Assert
+        assert result.exit_code == 0
+        assert "skipping code analysis" in result.output
+        assert "Partial report: code analysis skipped for 1 PRs." in result.output
+        assert (tmp_path / "report.pdf").exists()
+
+    def test_review_code_publishes_truncated_report_when_out_of_time(self, mock_github, mock_repository, mock_pulls_paginated, tmp_path):
+        # Arrange
+        runner = CliRunner()
+        mock_github.return_value.get_repo.return_value = mock_repository
+        mock_repository.get_pulls.return_value = mock_pulls_paginated
+
+        # Act
+        result = runner.invoke(cli, [
+            'review-code', '--repo', 'test/repo', '--token', 'test_token',
+            '--output', str(tmp_path / "report.pdf"), '--time-budget', '0'
+        ])
+
+        # Assert
+        assert result.exit_code == 0
+        assert "stopping before PR #1" in result.output
+        assert "Partial report: stopped after 0 PRs" in result.output
+        assert (tmp_path / "report.pdf").exists()
+
+    def test_handler_budgets_from_lambda_context(self, mock_repository, mock_pulls_paginated):
+        # Arrange
+        import handler
+        context = MagicMock()
+        context.aws_request_id = 'deadline-test'
+        context.get_remaining_time_in_millis.return_value = 12000
+        output = "/tmp/report-deadline-test.pdf"
+
+        with patch('cli._github') as mock_github, patch.dict(os.environ, {'GITHUB_TOKEN': 'test_token'}, clear=False):
+            os.environ.pop('BUCKET_NAME', None)
+            mock_github.return_value.get_repo.return_value = mock_repository
+            mock_repository.get_pulls.return_value = mock_pulls_paginated
+
+            # Act
+            response = handler.handler({'repo': 'test/repo'}, context)
+
+        # Assert
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['report'] == output
+        assert os.path.exists(output)
+        os.remove(output)
+
+    def test_handler_batch_counts_each_report_separately(self, mock_repository, mock_pulls_paginated):
+        # Arrange
+        import handler
+        context = MagicMock()
+        context.aws_request_id = 'batch-test'
+        context.get_remaining_time_in_millis.return_value = 600000
+        event = {'reports': [{'repo': 'test/repo1'}, {'repo': 'test/repo2'}]}
+
+        with patch('cli._github') as mock_github, patch.object(handler, 'publish_report') as publish, \
+                patch.dict(os.environ, {'GITHUB_TOKEN': 'test_token'}, clear=False):
+            os.environ.pop('BUCKET_NAME', None)
+            mock_github.return_value.get_repo.return_value = mock_repository
+            mock_repository.get_pulls.return_value = mock_pulls_paginated
+            publish.return_value = {'pdf_path': '/tmp/report.pdf', 's3_url': None, 'unchanged': False}
+
+            # Act
+            handler.handler(event, context)
+
+        # Assert
+        deadlines = [call.args[8] for call in publish.call_args_list]
+        assert [deadline.pr_count for deadline in deadlines] == [1, 1]
+        assert deadlines[0].expires_at == deadlines[1].expires_at
@@ -0,0 +1,118 @@
+import pytest
+from unittest.mock import patch
+
+from diffs import DiffClient, DiffParser, iter_lines, parse_unified_diff
+
+DIFF = b"""diff --git a/src/app.py b/src/app.py
+index 83db48f..bf269f4 100644
+--- a/src/app.py
++++ b/src/app.py
+@@ -1,4 +1,4 @@ def main():
+ import os
+--- removed line that looks like a header
++++ added line that looks like a header
+ # TODO: clean up
+ pass
+@@ -20 +20,2 @@
++    return 1  # FIXME
+ \n\\ No newline at end of file
+diff --git a/docs/old name.md b/docs/new name.md
+similarity index 100%
+rename from docs/old name.md
+rename to docs/new name.md
+diff --git a/assets/logo.png b/assets/logo.png
+deleted file mode 100644
+index 1b2c3d4..0000000
+Binary files a/assets/logo.png and /dev/null differ
+diff --git a/lib/new.js b/lib/new.js
+new file mode 100644
+index 0000000..e69de29
+--- /dev/null
++++ b/lib/new.js
+@@ -0,0 +1,2 @@
++const a = 1;\r
++module.exports = a;\r
+"""
+
+class TestDiffParser:
+    def test_files_hunks_and_counts(self):
+        # Act
+        files = list(parse_unified_diff(iter_lines([DIFF])))
+
+        # Assert
+        assert [file.filename for file in files] == ['src/app.py', 'docs/new name.md', 'assets/logo.png', 'lib/new.js']
+        app, renamed, deleted, added = files
+        assert (app.additions, app.deletions, app.changes, app.hunks) == (2, 1, 3, 2)
+        assert app.markers == {'TODO', 'FIXME'}
+        assert (renamed.status, renamed.previous_filename, renamed.changes) == ('renamed', 'docs/old name.md', 0)
+        assert (deleted.status, deleted.changes) == ('removed', 0)
+        assert (added.status, added.additions, added.markers) == ('added', 2, set())
+
+    @pytest.mark.parametrize('chunk_size', [1, 7, 64])
+    def test_chunk_boundaries_do_not_matter(self, chunk_size):
+        # Arrange
+        chunks = [DIFF[i:i + chunk_size] for i in range(0, len(DIFF), chunk_size)]
+
+        # Act
+        files = list(parse_unified_diff(iter_lines(chunks)))
+
+        # Assert
+        assert [(file.filename, file.additions, file.deletions) for file in files] == [
+            ('src/app.py', 2, 1), ('docs/new name.md', 0, 0), ('assets/logo.png', 0, 0), ('lib/new.js', 2, 0)
+        ]
+
+    def test_files_returned_as_they_complete(self):
+        # Arrange
+        parser = DiffParser()
+        lines = DIFF.decode().split('\n')
+
+        # Act
+        completed = [(index, file.filename) for index, line in enumerate(lines) for file in [parser.feed(line)] if file]
+
+        # Assert
+        assert completed[0] == (14, 'src/app.py')
+        assert parser.close().filename == 'lib/new.js'
+
+@pytest.mark.integration
+class TestFullDiffAnalysis:
+    def test_markers_found_in_patches_omitted_from_file_list(self):
+        # Arrange
+        import cli
+        from benchmarks.fake_github import FakeGitHubServer
+
+        with FakeGitHubServer(repos=1, prs_per_repo=10, files_per_pr=40, max_patch_lines=0) as server, patch('time.sleep'):
+            repositories = server.data.repository_names()
+
+            # Act
+            by_files = cli.collect_repositories(repositories, 'test', 30, 'open', 10, True, base_url=server.base_url)
+            file_requests = server.stats['GET files']
+            by_diff = cli.collect_repositories(
+                repositories, 'test', 30, 'open', 10, True, base_url=server.base_url, full_diff=True
+            )
+            stats = server.stats
+
+        # Assert
+        assert not any('found in' in issue for record in by_files for issue in record['analysis']['issues'])
+        assert any('TODOs found in' in issue for record in by_diff for issue in record['analysis']['issues'])
+        for record_by_files, record_by_diff in zip(by_files, by_diff):
+            assert record_by_diff['analysis']['languages'] == record_by_files['analysis']['languages']
+            assert record_by_diff['analysis']['complexity'] == record_by_files['analysis']['complexity']
+        # 40 files take two pages per PR; the diff is one request
+        assert file_requests == 20
+        assert stats['GET diff'] == 10
+        assert stats['GET files'] == 20
+
+    def test_unavailable_diff_falls_back_to_file_list(self, capsys):
+        # Arrange
+        from benchmarks.fake_github import FakeGitHubServer
+
+        with FakeGitHubServer(repos=1) as server:
+            client = DiffClient('test', server.base_url)
+
+            # Act
+            files = client.files('synthetic/missing', 1)
+            client.close()
+
+        # Assert
+        assert files is None
+        assert "Diff of PR #1 not available" in capsys.readouterr().err
@@ -0,0 +1,151 @@
+import json
+import os
+import pytest
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+from benchmarks.fake_github import FakeGitHubServer, SECONDARY_LIMIT_MESSAGE
+
+@pytest.fixture
+def server():
+    with FakeGitHubServer(repos=2, prs_per_repo=12, files_per_pr=3, max_per_page=5) as server:
+        yield server
+
+def get(url, headers=None, data=None):
+    request = urllib.request.Request(url, data=data, headers=dict({'Authorization': 'token a'}, **(headers or {})))
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+class TestFakeGitHubServer:
+    def test_pulls_paginated_with_capped_page_size(self, server):
+        # Act
+        status, headers, body = get(f"{server.base_url}/repos/synthetic/repo0/pulls?state=open&per_page=30")
+
+        # Assert
+        assert status == 200
+        assert [pr['number'] for pr in json.loads(body)] == [12, 11, 10, 9, 8]
+        assert 'page=2' in headers['Link'] and 'rel="next"' in headers['Link']
+        assert 'page=3' in headers['Link'] and 'rel="last"' in headers['Link']
+
+    def test_rate_limit_headers_per_token(self, server):
+        # Act
+        get(f"{server.base_url}/repos/synthetic/repo0", {'Authorization': 'token a'})
+        _, headers_a, _ = get(f"{server.base_url}/repos/synthetic/repo0", {'Authorization': 'token a'})
+        _, headers_b, _ = get(f"{server.base_url}/repos/synthetic/repo0", {'Authorization': 'token b'})
+
+        # Assert
+        assert headers_a['X-RateLimit-Limit'] == '5000'
+        assert headers_a['X-RateLimit-Remaining'] == '4998'
+        assert headers_b['X-RateLimit-Remaining'] == '4999'
+
+    def test_exhausted_token_gets_403(self):
+        # Arrange
+        with FakeGitHubServer(rate_limit=1) as server:
+            # Act
+            first, _, _ = get(f"{server.base_url}/repos/synthetic/repo0")
+            second, headers, body = get(f"{server.base_url}/repos/synthetic/repo0")
+
+        # Assert
+        assert (first, second) == (200, 403)
+        assert headers['X-RateLimit-Remaining'] == '0'
+        assert 'rate limit exceeded' in json.loads(body)['message']
+
+    def test_secondary_limit_with_retry_after(self):
+        # Arrange
+        with FakeGitHubServer(secondary_limit_every=2, retry_after=3) as server:
+            # Act
+            first, _, _ = get(f"{server.base_url}/repos/synthetic/repo0")
+            second, headers, body = get(f"{server.base_url}/repos/synthetic/repo0")
+
+        # Assert
+        assert (first, second) == (200, 403)
+        assert headers['Retry-After'] == '3'
+        assert json.loads(body)['message'] == SECONDARY_LIMIT_MESSAGE
+
+    def test_etag_revalidation_does_not_use_quota(self, server):
+        # Arrange
+        url = f"{server.base_url}/repos/synthetic/repo0/pulls/3"
+        _, headers, _ = get(url)
+
+        # Act
+        status, revalidated, body = get(url, {'If-None-Match': headers['ETag']})
+
+        # Assert
+        assert status == 304
+        assert body == b''
+        assert revalidated['X-RateLimit-Remaining'] == headers['X-RateLimit-Remaining']
+
+    def test_large_patches_omitted(self):
+        # Arrange
+        with FakeGitHubServer(files_per_pr=5, max_patch_lines=0) as server:
+            # Act
+            _, _, body = get(f"{server.base_url}/repos/synthetic/repo0/pulls/1/files")
+
+        # Assert
+        assert len(json.loads(body)) == 5
+        assert all('patch' not in file for file in json.loads(body))
+
+    def test_graphql_pull_requests_connection(self, server):
+        # Arrange
+        query = {'query': 'query { ... }', 'variables': {'owner': 'synthetic', 'name': 'repo1', 'first': 10}}
+
+        # Act
+        _, _, first = get(f"{server.base_url}/graphql", data=json.dumps(query).encode())
+        cursor = json.loads(first)['data']['repository']['pullRequests']['pageInfo']['endCursor']
+        query['variables']['after'] = cursor
+        _, _, second = get(f"{server.base_url}/graphql", data=json.dumps(query).encode())
+
+        # Assert
+        first_page = json.loads(first)['data']['repository']['pullRequests']
+        second_page = json.loads(second)['data']['repository']['pullRequests']
+        assert first_page['totalCount'] == 12
+        assert [node['number'] for node in first_page['nodes']] == list(range(12, 2, -1))
+        assert [node['number'] for node in second_page['nodes']] == [2, 1]
+        assert second_page['pageInfo']['hasNextPage'] is False
+
+    def test_unknown_repository(self, server):
+        # Act
+        status, _, _ = get(f"{server.base_url}/repos/synthetic/missing/pulls")
+
+        # Assert
+        assert status == 404
+
+@pytest.mark.integration
+class TestReviewAgainstFakeServer:
+    def test_review_code_with_github_base_url(self, server, tmp_path):
+        # Arrange
+        import cli
+        from click.testing import CliRunner
+        output = tmp_path / 'report.pdf'
+
+        with patch.object(cli.time, 'sleep', lambda seconds: None):
+            # Act
+            result = CliRunner().invoke(cli.review_code, [
+                '--repo', 'synthetic/repo0,synthetic/repo1', '--token', 'test', '--days', '30',
+                '--analyze', '--limit', '7', '--output', str(output), '--github-base-url', server.base_url
+            ])
+
+        # Assert
+        assert result.exit_code == 0
+        assert "Processing PR #6 (7/7)" in result.output
+        assert output.exists()
+        # Listing pages of 5 PRs, one request per PR and one per files listing
+        assert server.stats['GET pull'] == 14
+        assert server.stats['GET files'] == 14
+
+    def test_github_base_url_from_environment(self, server):
+        # Arrange
+        import cli
+
+        with patch.dict(os.environ, {'GITHUB_BASE_URL': server.base_url}), \
+                patch.object(cli.time, 'sleep', lambda seconds: None):
+            # Act
+            records = cli.collect_repositories(['synthetic/repo1'], 'test', 30, 'open', 3)
+
+        # Assert
+        assert [record['number'] for record in records] == [12, 11, 10]
+        assert server.stats['GET repository'] == 1
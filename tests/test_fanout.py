@@ -0,0 +1,223 @@
+import io
+import json
+import pytest
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from click.testing import CliRunner
+from datetime import datetime, timezone
+
+from deadline import Deadline
+from fanout import INVOKE_MARGIN, split_shards, LocalShardStore, S3ShardStore, run_local, run_lambda, merge_shards
+from records import write_ndjson, read_ndjson
+from src.cli import cli
+
+def collect_stub(repositories):
+    """Top-level collect function so the process pool can pickle it."""
+    if 'test/broken' in repositories:
+        raise RuntimeError("Worker crashed")
+    return [{
+        'repo': repo_name,
+        'number': 1,
+        'title': 'Test PR',
+        'created_at': datetime(2024, 1, 1, tzinfo=timezone.utc),
+        'updated_at': datetime(2024, 1, 2, tzinfo=timezone.utc),
+        'analysis': {}
+    } for repo_name in repositories]
+
+class TestSplitShards:
+    def test_split_shards_balanced_and_ordered(self):
+        # Act
+        shards = split_shards(['a/1', 'a/2', 'a/3', 'a/4', 'a/5'], 2)
+
+        # Assert
+        assert shards == [['a/1', 'a/2', 'a/3'], ['a/4', 'a/5']]
+
+    def test_split_shards_never_empty(self):
+        # Act & Assert
+        assert split_shards(['a/1', 'a/2'], 10) == [['a/1'], ['a/2']]
+        assert split_shards(['a/1'], 0) == [['a/1']]
+
+class TestShardStores:
+    def test_ndjson_roundtrip_keeps_datetimes(self, sample_pr_data):
+        # Arrange
+        buffer = io.StringIO()
+
+        # Act
+        write_ndjson(sample_pr_data, buffer)
+        buffer.seek(0)
+        records = list(read_ndjson(buffer))
+
+        # Assert
+        assert records == sample_pr_data
+
+    def test_local_shard_store(self, sample_pr_data, tmp_path):
+        # Arrange
+        store = LocalShardStore(str(tmp_path / "shards"))
+
+        # Act
+        count = store.put(0, sample_pr_data)
+
+        # Assert
+        assert count == 1
+        assert store.get(0) == sample_pr_data
+
+    def test_s3_shard_store(self, mock_s3_client, sample_pr_data):
+        # Arrange
+        store = S3ShardStore("test-bucket", "run-1")
+        client = mock_s3_client.return_value
+
+        # Act
+        store.put(3, sample_pr_data)
+        body = client.put_object.call_args.kwargs['Body']
+        client.get_object.return_value = {'Body': MagicMock(iter_lines=lambda: iter(body.splitlines()))}
+        records = store.get(3)
+
+        # Assert
+        assert client.put_object.call_args.kwargs['Key'] == "runs/run-1/shard-3.ndjson"
+        assert records == sample_pr_data
+
+class TestRunShards:
+    def test_run_local_merges_in_shard_order(self, tmp_path):
+        # Arrange
+        store = LocalShardStore(str(tmp_path))
+        shards = split_shards(['test/a', 'test/b', 'test/c'], 2)
+
+        # Act
+        records = run_local(shards, collect_stub, store)
+
+        # Assert
+        assert [r['repo'] for r in records] == ['test/a', 'test/b', 'test/c']
+
+    def test_run_local_skips_failed_shard(self, tmp_path):
+        # Arrange
+        store = LocalShardStore(str(tmp_path))
+
+        # Act
+        records = run_local([['test/a'], ['test/broken']], collect_stub, store)
+
+        # Assert
+        assert [r['repo'] for r in records] == ['test/a']
+
+    def test_run_local_failed_shard_marks_report_partial(self, tmp_path):
+        # Arrange
+        store = LocalShardStore(str(tmp_path))
+        deadline = Deadline(float('inf'))
+
+        # Act
+        run_local([['test/a'], ['test/broken']], collect_stub, store, deadline=deadline)
+
+        # Assert
+        assert deadline.failed_shards == [1]
+        assert "failed shards (1)" in deadline.summary()
+
+    def test_run_lambda_invokes_each_worker_once_and_deletes_shards(self, tmp_path):
+        # Arrange
+        store = LocalShardStore(str(tmp_path))
+        store.run_id = 'run-1'
+        store.put(0, collect_stub(['test/a']))
+        deadline = Deadline(600)
+
+        def invoke(**kwargs):
+            if json.loads(kwargs['Payload'])['shard'] == 1:
+                raise TimeoutError("Read timeout on endpoint URL")
+            return {'StatusCode': 200, 'Payload': io.BytesIO(json.dumps({'body': json.dumps({'records': 1})}).encode())}
+
+        with patch('boto3.client') as mock_client:
+            mock_client.return_value.invoke.side_effect = invoke
+
+            # Act
+            records = run_lambda([['test/a'], ['test/b']], 'review-fn', {'days': 7}, store, deadline, timeout=300)
+
+        # Assert
+        config = mock_client.call_args.kwargs['config']
+        assert config.read_timeout == 300 + INVOKE_MARGIN
+        assert config.retries == {'max_attempts': 0}
+        assert [r['repo'] for r in records] == ['test/a']
+        assert deadline.summary().startswith("Partial report")
+        assert not any(tmp_path.iterdir())
+
+    def test_run_lambda_stops_waiting_for_hung_worker_in_time_to_publish(self, tmp_path):
+        # Arrange
+        store = LocalShardStore(str(tmp_path))
+        store.run_id = 'run-1'
+        store.put(0, collect_stub(['test/a']))
+        # Publishing 200 PRs is reserved 12 seconds, so the workers get half a second
+        deadline = Deadline(12.5)
+        hung = threading.Event()
+
+        def invoke(**kwargs):
+            if json.loads(kwargs['Payload'])['shard'] == 1:
+                hung.wait(10)
+            return {'StatusCode': 200, 'Payload': io.BytesIO(json.dumps({'body': json.dumps({'records': 1})}).encode())}
+
+        with patch('boto3.client') as mock_client:
+            mock_client.return_value.invoke.side_effect = invoke
+
+            # Act
+            started = time.monotonic()
+            records = run_lambda([['test/a'], ['test/b']], 'review-fn', {'days': 7}, store, deadline, timeout=300)
+            waited = time.monotonic() - started
+        hung.set()
+
+        # Assert
+        assert waited < 5
+        assert mock_client.call_args.kwargs['config'].read_timeout == 1
+        assert [r['repo'] for r in records] == ['test/a']
+        assert deadline.failed_shards == [1]
+
+    def test_s3_shard_store_deletes_run_objects(self, mock_s3_client):
+        # Act
+        S3ShardStore("test-bucket", "run-1").delete(range(2))
+
+        # Assert
+        kwargs = mock_s3_client.return_value.delete_objects.call_args.kwargs
+        assert [o['Key'] for o in kwargs['Delete']['Objects']] == ["runs/run-1/shard-0.ndjson",
+                                                                    "runs/run-1/shard-1.ndjson"]
+
+    def test_run_lambda_invokes_one_worker_per_shard(self, tmp_path):
+        # Arrange
+        store = LocalShardStore(str(tmp_path))
+        store.run_id = 'run-1'
+        for shard_id, repositories in enumerate([['test/a'], ['test/b']]):
+            store.put(shard_id, collect_stub(repositories))
+
+        with patch('boto3.client') as mock_client:
+            mock_client.return_value.invoke.side_effect = lambda **kwargs: {
+                'StatusCode': 200,
+                'Payload': io.BytesIO(json.dumps({'statusCode': 200, 'body': json.dumps({'records': 1})}).encode())
+            }
+
+            # Act
+            records = run_lambda([['test/a'], ['test/b']], 'review-fn', {'days': 7}, store)
+
+        # Assert
+        calls = mock_client.return_value.invoke.call_args_list
+        events = sorted((json.loads(c.kwargs['Payload']) for c in calls), key=lambda e: e['shard'])
+        assert [e['repo'] for e in events] == ['test/a', 'test/b']
+        assert all(e['mode'] == 'worker' and e['run_id'] == 'run-1' and e['days'] == 7 for e in events)
+        assert [r['repo'] for r in records] == ['test/a', 'test/b']
+
+@pytest.mark.integration
+class TestWorkersOption:
+    def test_review_code_with_workers(self, mock_github, mock_repository, mock_pulls_paginated, tmp_path):
+        # Arrange
+        runner = CliRunner()
+        mock_github.return_value.get_repo.return_value = mock_repository
+        mock_repository.get_pulls.return_value = mock_pulls_paginated
+        output = tmp_path / "report.pdf"
+
+        # Act
+        result = runner.invoke(cli, [
+            'review-code',
+            '--repo', 'test/repo1,test/repo2',
+            '--token', 'test_token',
+            '--output', str(output),
+            '--workers', '2'
+        ])
+
+        # Assert
+        assert result.exit_code == 0
+        assert "into 2 shards" in result.output
+        assert "PDF report generated" in result.output
+        assert output.exists()
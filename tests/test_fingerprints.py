@@ -0,0 +1,197 @@
+import json
+import os
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import cli
+from fingerprints import PublishedReport, fingerprint_location, report_fingerprint
+
+OPTIONS = {'repositories': ['test/repo'], 'days': 7, 'state': 'open'}
+UPDATED = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+class FakeS3Client:
+    """Keeps put objects in memory, raising NoSuchKey for the others like boto3."""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        body = MagicMock()
+        body.read.return_value = self.objects[(Bucket, Key)]
+        return {'Body': body}
+
+class TestReportFingerprint:
+    def test_independent_of_record_order(self, make_record):
+        # Arrange
+        records = [make_record(number) for number in (1, 2, 3)]
+
+        # Act / Assert
+        assert report_fingerprint(records, OPTIONS, 1) == report_fingerprint(records[::-1], OPTIONS, 1)
+
+    @pytest.mark.parametrize('change', [
+        lambda records, options: records[0].update(updated_at=UPDATED + timedelta(minutes=1)),
+        lambda records, options: records[0].update(head_sha='f' * 40),
+        lambda records, options: records[0].update(analysis={'issues': []}),
+        lambda records, options: records[0].update(analysis={'issues': ["TODOs found in a.py"]}),
+        lambda records, options: records.pop(),
+        lambda records, options: options.update(days=30),
+        lambda records, options: options.update(full_diff=True),
+    ])
+    def test_changes_with_inputs(self, change, make_record):
+        # Arrange
+        records, options = [make_record(1), make_record(2)], dict(OPTIONS)
+        before = report_fingerprint(records, options, 1)
+
+        # Act
+        change(records, options)
+
+        # Assert
+        assert report_fingerprint(records, options, 1) != before
+
+    def test_changes_with_rules_version(self, make_record):
+        assert report_fingerprint([make_record(1)], OPTIONS, 1) != report_fingerprint([make_record(1)], OPTIONS, 2)
+
+    def test_location_keyed_by_repositories_and_state(self):
+        # Act
+        in_bucket = fingerprint_location(['test/repo'], 'open', 'bucket')
+        on_disk = fingerprint_location(['test/repo'], 'closed', directory='/tmp/reports')
+
+        # Assert
+        assert in_bucket.startswith('s3://bucket/fingerprints/repo_open_')
+        assert on_disk.startswith('/tmp/reports/.fingerprints/repo_closed_')
+
+class TestPublishUnchanged:
+    def publish(self, tmp_path, records, **kwargs):
+        output = str(tmp_path / 'report.pdf')
+        return cli.publish_report(['test/repo'], records, output, 7, 'open', skip_unchanged=True, **kwargs)
+
+    def test_unchanged_report_not_rendered_again(self, tmp_path, capsys, make_record):
+        # Arrange
+        records = [make_record(1), make_record(2)]
+        first = self.publish(tmp_path, records)
+
+        # Act
+        with patch.object(cli, 'generate_pdf_report') as render:
+            second = self.publish(tmp_path, [dict(record) for record in records])
+
+        # Assert
+        render.assert_not_called()
+        assert second == {'pdf_path': os.path.abspath(first['pdf_path']), 's3_url': None, 'unchanged': True}
+        assert "Report unchanged since" in capsys.readouterr().out
+
+    def test_changed_pr_rendered_again(self, tmp_path, make_record):
+        # Arrange
+        self.publish(tmp_path, [make_record(1), make_record(2)])
+
+        # Act
+        result = self.publish(tmp_path, [make_record(1), make_record(2, head_sha='a' * 40)])
+
+        # Assert
+        assert not result['unchanged']
+
+    def test_removed_report_rendered_again(self, tmp_path, make_record):
+        # Arrange
+        first = self.publish(tmp_path, [make_record(1)])
+        os.remove(first['pdf_path'])
+
+        # Act
+        result = self.publish(tmp_path, [make_record(1)])
+
+        # Assert
+        assert not result['unchanged']
+        assert os.path.exists(result['pdf_path'])
+
+    def test_partial_report_not_remembered(self, tmp_path, make_record):
+        # Arrange
+        deadline = MagicMock()
+        deadline.summary.return_value = "Partial report: stopped after 1 PRs because the time limit was reached."
+
+        # Act
+        self.publish(tmp_path, [make_record(1)], deadline=deadline)
+
+        # Assert
+        assert not os.path.exists(tmp_path / '.fingerprints')
+
+    def test_upload_and_notification_skipped_in_bucket(self, tmp_path, make_record):
+        # Arrange
+        s3_client = FakeS3Client()
+        records = [make_record(1)]
+        with patch('boto3.client', return_value=s3_client), \
+                patch.object(cli, 'upload_to_s3', return_value='https://bucket.s3.amazonaws.com/reports/r.pdf') as upload, \
+                patch.object(cli, 'send_notification') as notify:
+            self.publish(tmp_path, records, bucket='bucket', notify=True, email='dev@example.com')
+
+            # Act
+            result = self.publish(tmp_path, records, bucket='bucket', notify=True, email='dev@example.com')
+
+        # Assert
+        assert result['unchanged'] and result['s3_url'] == 'https://bucket.s3.amazonaws.com/reports/r.pdf'
+        assert upload.call_count == 1 and notify.call_count == 1
+        [(bucket, key)] = s3_client.objects
+        assert key.startswith('fingerprints/repo_open_')
+        assert json.loads(s3_client.objects[(bucket, key)])['s3_url'] == result['s3_url']
+
+    def test_failed_upload_not_remembered(self, tmp_path, make_record):
+        # Arrange
+        store = MagicMock()
+        store.load.return_value = None
+
+        # Act
+        with patch.object(cli, 'upload_to_s3', return_value=None), \
+                patch('fingerprints.store_at', return_value=store):
+            self.publish(tmp_path, [make_record(1)], bucket='bucket')
+
+        # Assert
+        store.save.assert_not_called()
+
+@pytest.mark.integration
+class TestUnchangedRuns:
+    def test_second_run_on_same_prs_skips_publishing(self, tmp_path):
+        # Arrange
+        from click.testing import CliRunner
+        from benchmarks.fake_github import FakeGitHubServer
+        output = str(tmp_path / 'repo0.pdf')
+
+        with FakeGitHubServer(repos=1, prs_per_repo=5, files_per_pr=2) as server, patch('time.sleep'):
+            args = ['--repo', 'synthetic/repo0', '--token', 'test', '--days', '30', '--output', output, '--analyze',
+                    '--github-base-url', server.base_url, '--skip-unchanged']
+            CliRunner().invoke(cli.review_code, args)
+            os.utime(output, (0, 0))
+
+            # Act
+            result = CliRunner().invoke(cli.review_code, args)
+
+        # Assert
+        assert result.exit_code == 0
+        assert "Report unchanged since" in result.output
+        assert os.stat(output).st_mtime == 0
+
+    def test_full_diff_run_on_same_prs_rendered_again(self, tmp_path):
+        # Arrange
+        from click.testing import CliRunner
+        from benchmarks.fake_github import FakeGitHubServer
+        output = str(tmp_path / 'repo0.pdf')
+
+        with FakeGitHubServer(repos=1, prs_per_repo=5, files_per_pr=2) as server, patch('time.sleep'):
+            args = ['--repo', 'synthetic/repo0', '--token', 'test', '--days', '30', '--output', output, '--analyze',
+                    '--github-base-url', server.base_url, '--skip-unchanged']
+            CliRunner().invoke(cli.review_code, args)
+            os.utime(output, (0, 0))
+
+            # Act
+            result = CliRunner().invoke(cli.review_code, args + ['--full-diff'])
+
+        # Assert
+        assert result.exit_code == 0
+        assert "Report unchanged since" not in result.output
+        assert os.stat(output).st_mtime != 0
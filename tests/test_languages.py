@@ -0,0 +1,100 @@
+import pytest
+from unittest.mock import MagicMock
+
+import languages
+from languages import GENERATED, LANGUAGES, OTHER, VENDORED, classify, language_of_extension
+
+class TestClassify:
+    @pytest.mark.parametrize('path, expected', [
+        ('src/app.py', 'Python'),
+        ('web/index.d.ts', 'TypeScript'),
+        ('web/App.tsx', 'TSX'),
+        ('Dockerfile', 'Dockerfile'),
+        ('deploy/Dockerfile.dev', 'Dockerfile'),
+        ('Makefile', 'Makefile'),
+        ('build.gradle.kts', 'Gradle'),
+        ('dist/release.tar.gz', 'Archive'),
+        ('README.MD', 'Markdown'),
+        ('notes.xyz', OTHER),
+        ('LICENSE', 'Text'),
+        ('bin/run', OTHER),
+    ])
+    def test_languages(self, path, expected):
+        assert classify(path) == expected
+
+    @pytest.mark.parametrize('path', [
+        'vendor/github.com/pkg/errors/errors.go',
+        'web/node_modules/react/index.js',
+        'third_party/zlib/inflate.c',
+    ])
+    def test_vendored_directories(self, path):
+        assert classify(path) == VENDORED
+
+    @pytest.mark.parametrize('path', [
+        'package-lock.json',
+        'go.sum',
+        'static/app.min.js',
+        'api/service.pb.go',
+        'api/service_pb2.py',
+        'src/__generated__/schema.ts',
+    ])
+    def test_generated_files(self, path):
+        assert classify(path) == GENERATED
+
+    def test_language_of_extension(self):
+        assert language_of_extension('.py') == 'Python'
+        assert language_of_extension('.JS') == 'JavaScript'
+        assert language_of_extension('') == OTHER
+
+    def test_suffixes_belong_to_one_language(self):
+        # Act
+        suffixes = [suffix for suffix_list in LANGUAGES.values() for suffix in suffix_list]
+
+        # Assert
+        assert len(suffixes) == len(set(suffixes))
+        assert len(LANGUAGES) > 250
+
+    def test_lookups_memoized(self):
+        # Arrange
+        classify.cache_clear()
+
+        # Act
+        for _ in range(3):
+            classify('src/memo/module.py')
+
+        # Assert
+        info = classify.cache_info()
+        assert (info.misses, info.hits) == (1, 2)
+
+class TestAnalyzeLanguages:
+    def test_vendored_and_generated_lines_counted_apart(self):
+        # Arrange
+        from cli import analyze_pull_request
+        changes = {'src/app.py': 10, 'src/util.py': 5, 'web/index.d.ts': 3,
+                   'vendor/lib/lib.go': 400, 'package-lock.json': 300}
+        files = []
+        for filename, count in changes.items():
+            file = MagicMock(filename=filename, changes=count, patch='')
+            files.append(file)
+
+        # Act
+        analysis = analyze_pull_request(MagicMock(), MagicMock(), files)
+
+        # Assert
+        assert analysis['languages'] == {'Python': 15, 'TypeScript': 3, VENDORED: 400, GENERATED: 300}
+
+    def test_vendored_and_generated_files_raise_no_issues(self):
+        # Arrange
+        from cli import analyze_pull_request
+        files = [
+            MagicMock(filename='package-lock.json', changes=4000, patch='+ "fixme": "1.0.0" FIXME'),
+            MagicMock(filename='vendor/lib/lib.go', changes=900, patch='+// TODO upstream'),
+            MagicMock(filename='src/app.py', changes=600, patch='+# FIXME'),
+        ]
+
+        # Act
+        analysis = analyze_pull_request(MagicMock(), MagicMock(), files)
+
+        # Assert
+        assert analysis['issues'] == ["File src/app.py has too many changes (600)", "FIXMEs found in src/app.py"]
+        assert analysis['risk_score'] == 2
@@ -0,0 +1,134 @@
+import os
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+
+from notifications import NotificationDispatcher
+
+TOPIC_ARN = 'arn:aws:sns:us-east-1:123456789012:github-report-notifications'
+
+@pytest.fixture
+def sns_client():
+    client = MagicMock()
+    client.create_topic.return_value = {'TopicArn': TOPIC_ARN}
+    client.get_paginator.return_value.paginate.return_value = [{
+        'Subscriptions': [{'Protocol': 'email', 'Endpoint': 'Known@example.com'}]
+    }]
+    return client
+
+class TestNotificationDispatcher:
+    def test_topic_arn_from_environment(self, sns_client):
+        # Arrange
+        dispatcher = NotificationDispatcher(sns_client)
+
+        # Act
+        with patch.dict(os.environ, {'SNS_TOPIC_ARN': TOPIC_ARN}):
+            arn = dispatcher.topic_arn()
+
+        # Assert
+        assert arn == TOPIC_ARN
+        sns_client.create_topic.assert_not_called()
+
+    def test_topic_arn_cached_across_dispatchers(self, sns_client):
+        # Act
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('SNS_TOPIC_ARN', None)
+            NotificationDispatcher(sns_client).topic_arn()
+            NotificationDispatcher(sns_client).topic_arn()
+
+        # Assert
+        sns_client.create_topic.assert_called_once()
+
+    def test_subscribe_only_unknown_emails(self, sns_client):
+        # Arrange
+        dispatcher = NotificationDispatcher(sns_client)
+
+        # Act
+        known = dispatcher.subscribe('known@example.com')
+        new = dispatcher.subscribe('new@example.com')
+        again = NotificationDispatcher(sns_client).subscribe('new@example.com')
+
+        # Assert
+        assert (known, new, again) == (False, True, False)
+        sns_client.subscribe.assert_called_once_with(TopicArn=TOPIC_ARN, Protocol='email', Endpoint='new@example.com')
+        sns_client.get_paginator.return_value.paginate.assert_called_once()
+
+    def test_digest_merges_and_deduplicates_reports(self, sns_client):
+        # Arrange
+        dispatcher = NotificationDispatcher(sns_client)
+
+        # Act
+        dispatcher.add('team@example.com', ['test/repo1'], '/tmp/a.pdf', 'https://bucket/a.pdf')
+        dispatcher.add('team@example.com', ['test/repo2'], '/tmp/b.pdf', 'https://bucket/b.pdf', 'Partial report.')
+        duplicate = dispatcher.add('team@example.com', ['test/repo1'], '/tmp/a.pdf', 'https://bucket/a.pdf')
+        result = dispatcher.flush()
+
+        # Assert
+        assert duplicate is False
+        assert result is True
+        sns_client.subscribe.assert_called_once()
+        sns_client.publish.assert_called_once()
+        kwargs = sns_client.publish.call_args.kwargs
+        assert kwargs['Subject'] == "Pull Request Reports - 2 reports ready"
+        assert kwargs['Message'].count("https://bucket/a.pdf") == 1
+        assert "test/repo2: You can access it at: https://bucket/b.pdf" in kwargs['Message']
+        assert "Partial report." in kwargs['Message']
+
+    def test_single_report_message(self, sns_client):
+        # Arrange
+        dispatcher = NotificationDispatcher(sns_client)
+        dispatcher.add('team@example.com', ['test/repo'], '/tmp/report.pdf')
+
+        # Act
+        subject, message = dispatcher.build_message()
+
+        # Assert
+        assert subject == "Pull Request Report - test/repo"
+        assert "The report was generated as report.pdf." in message
+
+    def test_subject_truncated_for_sns(self, sns_client):
+        # Arrange
+        dispatcher = NotificationDispatcher(sns_client)
+        dispatcher.add('team@example.com', ['org/' + 'x' * 60, 'org/' + 'y' * 60], '/tmp/report.pdf')
+
+        # Act
+        subject, _ = dispatcher.build_message()
+
+        # Assert
+        assert len(subject) == 100
+
+    def test_flush_without_reports_publishes_nothing(self, sns_client):
+        # Act
+        result = NotificationDispatcher(sns_client).flush()
+
+        # Assert
+        assert result is True
+        sns_client.publish.assert_not_called()
+
+@pytest.mark.integration
+class TestBatchDigest:
+    def test_handler_batch_sends_one_digest(self, mock_repository, mock_pulls_paginated):
+        # Arrange
+        import handler
+        event = {
+            'notify': True,
+            'email': 'team@example.com',
+            'reports': [{'repo': 'test/repo1'}, {'repo': 'test/repo2', 'state': 'closed'}]
+        }
+
+        with patch('cli._github') as mock_github, patch('boto3.client') as mock_client, \
+                patch.dict(os.environ, {'GITHUB_TOKEN': 'test_token', 'SNS_TOPIC_ARN': TOPIC_ARN}):
+            os.environ.pop('BUCKET_NAME', None)
+            mock_github.return_value.get_repo.return_value = mock_repository
+            mock_repository.get_pulls.return_value = mock_pulls_paginated
+
+            # Act
+            response = handler.handler(event, None)
+
+        # Assert
+        body = json.loads(response['body'])
+        assert body['reports'] == ['/tmp/report-local-0.pdf', '/tmp/report-local-1.pdf']
+        mock_client.return_value.publish.assert_called_once()
+        assert "2 reports ready" in mock_client.return_value.publish.call_args.kwargs['Subject']
+        for path in body['reports']:
+            os.remove(path)
@@ -0,0 +1,159 @@
+import os
+import threading
+import pytest
+
+from pipeline import RecordSpool, StreamedList, bounded
+
+class TestBounded:
+    def test_yields_items_in_order(self):
+        assert list(bounded(iter(range(100)), maxsize=4)) == list(range(100))
+
+    def test_producer_stays_within_queue_size(self):
+        # Arrange
+        produced = []
+
+        def producer():
+            for item in range(50):
+                produced.append(item)
+                yield item
+
+        # Act
+        ahead = []
+        for consumed, item in enumerate(bounded(producer(), maxsize=5), 1):
+            threading.Event().wait(0.002)
+            ahead.append(len(produced) - consumed)
+
+        # Assert
+        # The queue holds 5 items and the producer one more while it waits to put it
+        assert max(ahead) <= 6
+
+    def test_producer_error_raised_in_consumer(self):
+        # Arrange
+        def producer():
+            yield 1
+            raise RuntimeError("API rate limit exceeded")
+
+        # Act
+        items = bounded(producer())
+
+        # Assert
+        assert next(items) == 1
+        with pytest.raises(RuntimeError, match="rate limit"):
+            next(items)
+
+    def test_closing_consumer_stops_producer(self):
+        # Arrange
+        produced = []
+
+        def producer():
+            for item in range(1000):
+                produced.append(item)
+                yield item
+
+        items = bounded(producer(), maxsize=2)
+
+        # Act
+        next(items)
+        items.close()
+
+        # Assert
+        assert len(produced) < 10
+
+class TestRecordSpool:
+    def test_records_read_back_in_order(self, make_record):
+        # Arrange
+        records = [make_record(number, repo) for repo in ('test/a', 'test/b') for number in range(1, 4)]
+
+        # Act
+        with RecordSpool() as spool:
+            count = spool.extend(iter(records))
+            first, second = list(spool), list(spool)
+
+        # Assert
+        assert count == len(spool) == 6
+        assert first == second == records
+        assert spool.repo_counts == {'test/a': 3, 'test/b': 3}
+
+    def test_spool_file_removed_on_close(self, make_record):
+        # Arrange
+        with RecordSpool() as spool:
+            spool.write(make_record(1))
+            path = spool.path
+
+            # Assert
+            assert os.path.exists(path)
+        assert not os.path.exists(path)
+
+    def test_empty_spool_is_falsy(self):
+        with RecordSpool() as spool:
+            assert not spool
+
+class TestStreamedList:
+    def test_items_pulled_a_window_ahead(self):
+        # Arrange
+        pulled = []
+
+        def items():
+            for item in range(100):
+                pulled.append(item)
+                yield item
+
+        streamed = StreamedList(items(), window=8)
+
+        # Act
+        consumed = []
+        while len(streamed):
+            consumed.append(streamed[0])
+            del streamed[0]
+            assert len(pulled) - len(consumed) <= 8
+
+        # Assert
+        assert consumed == list(range(100))
+
+    def test_reportlab_builds_from_stream(self, tmp_path):
+        # Arrange
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Paragraph, SimpleDocTemplate
+        styles = getSampleStyleSheet()
+        built = []
+
+        def flowables():
+            for number in range(500):
+                built.append(number)
+                yield Paragraph(f"PR #{number}", styles['Heading3'] if number % 10 == 0 else styles['Normal'])
+
+        # Act
+        SimpleDocTemplate(str(tmp_path / 'stream.pdf')).build(StreamedList(flowables()))
+
+        # Assert
+        assert len(built) == 500
+        assert os.path.getsize(tmp_path / 'stream.pdf') > 0
+
+@pytest.mark.integration
+class TestStreamingRun:
+    def test_report_rendered_from_spooled_records(self, tmp_path):
+        # Arrange
+        import cli
+        from unittest.mock import patch
+        from click.testing import CliRunner
+        from benchmarks.fake_github import FakeGitHubServer
+        output = str(tmp_path / 'report.pdf')
+        spooled = []
+        write = RecordSpool.write
+
+        def spy(spool, record):
+            spooled.append(record['number'])
+            write(spool, record)
+
+        with FakeGitHubServer(repos=2, prs_per_repo=6, files_per_pr=2) as server, patch('time.sleep'), \
+                patch.object(RecordSpool, 'write', spy):
+            # Act
+            result = CliRunner().invoke(cli.review_code, [
+                '--repo', 'synthetic/repo0,synthetic/repo1', '--token', 'test', '--days', '30', '--output', output,
+                '--analyze', '--github-base-url', server.base_url
+            ])
+
+        # Assert
+        assert result.exit_code == 0
+        assert len(spooled) == 12
+        assert f"PDF report generated: {output}" in result.output
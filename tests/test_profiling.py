@@ -0,0 +1,107 @@
+import os
+import pstats
+import pytest
+from unittest.mock import patch
+
+from profiling import StageProfiler
+
+def busy_fetch():
+    return sum(range(20000))
+
+def busy_analyze():
+    return [str(i) for i in range(20000)]
+
+def function_names(profile):
+    return {function for _, _, function in pstats.Stats(profile).stats}
+
+class TestStageProfiler:
+    def test_nested_stage_profiled_separately(self):
+        # Arrange
+        profiler = StageProfiler()
+
+        # Act
+        with profiler.stage('fetch'):
+            busy_fetch()
+            for _ in range(3):
+                with profiler.stage('analyze'):
+                    busy_analyze()
+        profiler.close()
+
+        # Assert
+        assert profiler.stages['analyze']['calls'] == 3
+        assert 'busy_fetch' in function_names(profiler.stages['fetch']['profile'])
+        assert 'busy_analyze' not in function_names(profiler.stages['fetch']['profile'])
+        assert 'busy_analyze' in function_names(profiler.stages['analyze']['profile'])
+        # The list built during analyze counts towards the enclosing stage's peak
+        assert profiler.stages['fetch']['peak_memory'] >= profiler.stages['analyze']['peak_memory'] > 0
+
+    def test_allocations_of_outermost_stage(self):
+        # Arrange
+        profiler = StageProfiler()
+        kept = []
+
+        # Act
+        with profiler.stage('render'):
+            kept.append(bytearray(2 * 1024 * 1024))
+        profiler.close()
+
+        # Assert
+        (filename, _), size = profiler.stages['render']['allocations'].most_common(1)[0]
+        assert filename == __file__
+        assert size >= 2 * 1024 * 1024
+
+    def test_write_dumps_and_summary(self, tmp_path):
+        # Arrange
+        profiler = StageProfiler(top=5)
+        with profiler.stage('render'):
+            busy_fetch()
+
+        # Act
+        paths = profiler.write(str(tmp_path), 'report')
+
+        # Assert
+        assert paths == [str(tmp_path / 'report.profile.txt'), str(tmp_path / 'report.render.prof')]
+        summary = (tmp_path / 'report.profile.txt').read_text()
+        assert "=== render: top 5 functions by cumulative time ===" in summary
+        assert "busy_fetch" in summary
+        assert pstats.Stats(paths[1]).total_calls > 0
+
+@pytest.mark.integration
+class TestProfileRun:
+    def test_review_code_profile_next_to_report(self, tmp_path, mock_github, mock_repository, mock_pulls_paginated):
+        # Arrange
+        from src.cli import review_code
+        from click.testing import CliRunner
+        mock_github.return_value.get_repo.return_value = mock_repository
+        mock_repository.get_pulls.return_value = mock_pulls_paginated
+        output = tmp_path / 'report-test.pdf'
+
+        with patch('src.cli.time.sleep'):
+            # Act
+            result = CliRunner().invoke(review_code, [
+                '--repo', 'test/repo', '--token', 'test_token', '--analyze', '--profile', '--output', str(output)
+            ])
+
+        # Assert
+        assert result.exit_code == 0
+        assert f"Profile summary written to {tmp_path / 'report-test.profile.txt'}" in result.output
+        for stage in ('fetch', 'analyze', 'render'):
+            assert (tmp_path / f"report-test.{stage}.prof").exists()
+
+    def test_handler_profile_flag(self, mock_repository, mock_pulls_paginated):
+        # Arrange
+        import handler
+
+        with patch('cli._github') as mock_github, patch.dict(os.environ, {'GITHUB_TOKEN': 'test_token'}):
+            os.environ.pop('BUCKET_NAME', None)
+            mock_github.return_value.get_repo.return_value = mock_repository
+            mock_repository.get_pulls.return_value = mock_pulls_paginated
+
+            # Act
+            handler.handler({'repo': 'test/repo', 'profile': True}, None)
+
+        # Assert
+        assert os.path.exists('/tmp/report-local.profile.txt')
+        assert os.path.exists('/tmp/report-local.render.prof')
+        for name in ('report-local.profile.txt', 'report-local.fetch.prof', 'report-local.render.prof'):
+            os.remove(os.path.join('/tmp', name))
@@ -0,0 +1,189 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+
+from scheduler import CostModel, plan, simulate
+
+def inventory(count, priority=lambda i: 1 + i % 3, size=lambda i: 5 + (i * 7) % 60):
+    return [{'repo': f"org/repo{i}", 'priority': priority(i), 'size': size(i)} for i in range(count)]
+
+class TestCostModel:
+    def test_fit_recovers_costs_of_past_runs(self):
+        # Arrange
+        history = [
+            {'Repositories': repos, 'PullRequests': prs, 'PullRequestsAnalyzed': analyzed,
+             'GitHubRequests': 3 * repos + 1.5 * prs + 2 * analyzed}
+            for repos, prs, analyzed in [(1, 10, 10), (4, 80, 0), (2, 30, 12), (10, 200, 200)]
+        ]
+
+        # Act
+        model = CostModel.fit(history)
+
+        # Assert
+        assert (model.per_repo, model.per_pr, model.per_analyzed_pr) == pytest.approx((3, 1.5, 2))
+        assert model.requests(20, analyze=True) == pytest.approx(73)
+
+    def test_fit_without_history_uses_defaults(self):
+        # Act
+        model = CostModel.fit([{'GitHubRequests': 40, 'PullRequests': 20}])
+
+        # Assert
+        assert (model.per_repo, model.per_pr, model.per_analyzed_pr) == (3.0, 1.0, 1.0)
+
+    def test_from_metrics_files(self, tmp_path):
+        # Arrange
+        path = tmp_path / 'metrics.jsonl'
+        lines = [
+            {'_aws': {}, 'Repositories': repos, 'PullRequests': prs, 'PullRequestsAnalyzed': analyzed,
+             'GitHubRequests': 2 * repos + prs + analyzed}
+            for repos, prs, analyzed in [(1, 6, 6), (2, 40, 20), (3, 10, 0)]
+        ]
+        path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+        # Act
+        model = CostModel.from_metrics_files([str(path)])
+
+        # Assert
+        assert model.requests(10, analyze=True) == pytest.approx(22)
+
+class TestPlan:
+    def test_hundreds_of_repositories_within_budgets(self):
+        # Act
+        day = plan(inventory(400), tokens=2, concurrency=5)
+        hours = simulate(day)
+
+        # Assert
+        assert not day.deferred
+        assert sum(len(event['event']['reports']) for event in day.events()) == 400
+        assert all(hour['requests'] <= 8000 for hour in hours)
+        assert all(hour['concurrency'] <= 5 for hour in hours)
+        assert all(hour['longest'] <= 300 - 10 for hour in hours)
+
+    def test_higher_priority_runs_earlier(self):
+        # Act
+        day = plan(inventory(300), tokens=1, concurrency=3)
+
+        # Assert
+        hour_of = {
+            report['repo']: event['hour'] for event in day.events() for report in event['event']['reports']
+        }
+        priority_of = {entry['repo']: entry['priority'] for entry in inventory(300)}
+        latest_first = max(hour for repo, hour in hour_of.items() if priority_of[repo] == 1)
+        earliest_third = min(hour for repo, hour in hour_of.items() if priority_of[repo] == 3)
+        assert latest_first <= earliest_third
+
+    def test_runs_beyond_the_day_deferred_by_priority(self):
+        # Arrange
+        entries = inventory(50, priority=lambda i: 1 if i < 10 else 2, size=lambda i: 100)
+
+        # Act
+        day = plan(entries, tokens=1, concurrency=1, hours=range(8, 10))
+
+        # Assert
+        planned = [report['repo'] for event in day.events() for report in event['event']['reports']]
+        assert set(planned) >= {f"org/repo{i}" for i in range(10)}
+        assert day.deferred and all(run.priority == 2 for run in day.deferred)
+        assert len(planned) + len(day.deferred) == 50
+
+    def test_run_longer_than_timeout_gets_lower_limit(self):
+        # Arrange
+        entries = [{'repo': 'org/big', 'priority': 1, 'size': 500}, {'repo': 'org/small', 'priority': 1, 'size': 5}]
+
+        # Act
+        day = plan(entries)
+
+        # Assert
+        # 21 seconds to publish plus 3.02 per analyzed PR: 89 PRs fit in 290 seconds, 100 take 323
+        reports = {report['repo']: report for event in day.events() for report in event['event']['reports']}
+        assert reports['org/big']['limit'] == 89
+        assert reports['org/small']['limit'] == 100
+        assert all(hour['longest'] <= 300 - 10 for hour in simulate(day))
+        assert [run.repo for run in day.shortened] == ['org/big']
+        assert "Limited to fit the timeout: org/big (89 PRs)" in day.summary()
+
+    def test_run_that_cannot_fit_timeout_deferred(self):
+        # Act
+        day = plan([{'repo': 'org/app', 'priority': 1, 'size': 10}], timeout=30)
+
+        # Assert
+        assert day.events() == []
+        assert [run.repo for run in day.deferred] == ['org/app']
+
+    def test_quota_scales_with_tokens(self):
+        # Arrange
+        entries = inventory(200, size=lambda i: 100)
+
+        # Act
+        one_token = plan(entries, tokens=1, concurrency=50)
+        three_tokens = plan(entries, tokens=3, concurrency=50)
+
+        # Assert
+        assert len(simulate(three_tokens)) < len(simulate(one_token))
+
+    def test_events_carry_run_settings(self):
+        # Arrange
+        entries = [{'repo': 'org/app', 'priority': 1, 'size': 3, 'state': 'open', 'full_diff': True, 'owner': 'x'}]
+
+        # Act
+        events = plan(entries).events()
+
+        # Assert
+        assert events == [{'hour': 0, 'minute': 0, 'event': {'reports': [
+            {'repo': 'org/app', 'days': 1, 'state': 'open', 'analyze': True, 'limit': 100, 'skip_unchanged': True,
+             'track_changes': True, 'full_diff': True}
+        ]}}]
+
+    def test_overrun_shows_in_simulation(self):
+        # Arrange
+        day = plan(inventory(100, size=lambda i: 50), tokens=1)
+
+        # Act
+        hours = simulate(day, actual_requests=lambda run: run.requests * 2)
+
+        # Assert
+        assert max(hour['requests'] for hour in hours) > day.budget
+
+@pytest.mark.integration
+class TestScheduledInvocations:
+    def test_planned_event_runs_in_handler(self, tmp_path):
+        # Arrange
+        import handler
+        from benchmarks.fake_github import FakeGitHubServer
+
+        with FakeGitHubServer(repos=3, prs_per_repo=4, files_per_pr=2) as server, patch('time.sleep'), \
+                patch.dict(os.environ, {'GITHUB_TOKEN': 'test', 'GITHUB_BASE_URL': server.base_url}):
+            os.environ.pop('BUCKET_NAME', None)
+            entries = [{'repo': name, 'size': 4, 'days': 30, 'state': 'open'} for name in server.data.repository_names()]
+            day = plan(entries)
+            [scheduled] = day.events()
+
+            # Act
+            response = handler.handler(scheduled['event'], None)
+            requests = server.stats['requests']
+
+        # Assert
+        reports = json.loads(response['body'])['reports']
+        assert len(reports) == 3
+        for path in reports:
+            os.remove(path)
+        assert requests <= sum(batch.requests for batch in day.batches[0])
+
+    def test_plan_schedule_command(self, tmp_path):
+        # Arrange
+        from src.cli import plan_schedule
+        from click.testing import CliRunner
+        inventory_file = tmp_path / 'inventory.json'
+        inventory_file.write_text(json.dumps(inventory(30)))
+        output = tmp_path / 'schedule.json'
+
+        # Act
+        result = CliRunner().invoke(plan_schedule, [
+            '--inventory', str(inventory_file), '--tokens', '2', '--output', str(output)
+        ])
+
+        # Assert
+        assert result.exit_code == 0
+        assert "00:00  " in result.output
+        events = json.loads(output.read_text())
+        assert sum(len(event['event']['reports']) for event in events) == 30
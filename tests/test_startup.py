@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.startup import compare, run_startup_benchmark
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Dependencies that must only be loaded by the stage that needs them
+HEAVY_MODULES = ['boto3', 'botocore', 'github', 'reportlab', 'aiohttp']
+
+STARTUP_BASELINE = os.path.join(os.path.dirname(SRC_DIR), 'benchmarks', 'baselines', 'startup.json')
+
+# The suite shares the machine with other work, so the import may take up to twice the baseline
+STARTUP_TOLERANCE = 1.0
+
+def loaded_heavy_modules(statement):
+    """Runs a statement in a fresh interpreter and returns the heavy modules in its sys.modules."""
+    script = (
+        f"import json, sys\n{statement}\n"
+        f"print(json.dumps(sorted(name for name in sys.modules if name.split('.')[0] in {HEAVY_MODULES!r})))"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+class TestStartup:
+    def test_handler_import_skips_heavy_dependencies(self):
+        # Act
+        loaded = loaded_heavy_modules('import handler')
+
+        # Assert
+        assert loaded == []
+
+    def test_cli_import_skips_heavy_dependencies(self):
+        # Act
+        loaded = loaded_heavy_modules('import cli')
+
+        # Assert
+        assert loaded == []
+
+    def test_handler_import_time_within_baseline(self):
+        # Arrange
+        with open(STARTUP_BASELINE) as f:
+            baseline = json.load(f)
+
+        # Act
+        result = run_startup_benchmark('handler')
+
+        # Assert
+        print(f"import handler: {result['import_ms']} ms, {result['modules']} modules")
+        assert compare(result, baseline, STARTUP_TOLERANCE) == []
+
+    def test_pdf_stage_loads_reportlab(self):
+        # Act
+        loaded = loaded_heavy_modules(
+            'import cli, tempfile, os; '
+            'cli.generate_pdf_report(["test/repo"], [], os.path.join(tempfile.mkdtemp(), "r.pdf"), 7, "open")'
+        )
+
+        # Assert
+        assert 'reportlab.platypus' in loaded
+        assert 'boto3' not in loaded
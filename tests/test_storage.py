@@ -0,0 +1,31 @@
+from storage import LocalStore, S3Store, store_at, store_name
+
+class TestStorage:
+    def test_store_at_location(self):
+        # Act
+        s3_store = store_at("s3://test-bucket/checkpoints/run.json")
+        local_store = store_at("checkpoints/run.json")
+
+        # Assert
+        assert isinstance(s3_store, S3Store)
+        assert (s3_store.bucket_name, s3_store.key) == ("test-bucket", "checkpoints/run.json")
+        assert isinstance(local_store, LocalStore)
+
+    def test_store_name_depends_on_repositories(self):
+        # Act & Assert
+        assert store_name(['test/repo'], 'open').startswith('repo_open_')
+        assert store_name(['a/1', 'a/2'], 'all') == store_name(['a/2', 'a/1'], 'all')
+        assert store_name(['a/1', 'a/2'], 'all') != store_name(['a/1', 'a/3'], 'all')
+
+    def test_local_store_roundtrip(self, tmp_path):
+        # Arrange
+        store = LocalStore(str(tmp_path / "nested" / "run.json"))
+
+        # Act
+        store.save({'value': 1})
+        loaded = store.load()
+        store.delete()
+
+        # Assert
+        assert loaded == {'value': 1}
+        assert store.load() is None
@@ -0,0 +1,117 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+
+import telemetry
+from telemetry import Telemetry
+
+class TestTelemetry:
+    def test_stage_durations_accumulate(self, clock):
+        # Arrange
+        recorder = Telemetry({'Function': 'test'}, clock)
+
+        # Act
+        for seconds in (0.25, 0.5):
+            with recorder.stage('analyze'):
+                clock.now += seconds
+
+        # Assert
+        assert recorder.metrics()['AnalyzeDuration'] == (750.0, 'Milliseconds')
+
+    def test_emf_document(self):
+        # Arrange
+        recorder = Telemetry({'Function': 'reviewer', 'Mode': 'single'})
+        recorder.count('S3Calls', 2)
+        recorder.count('BytesUploaded', 1024)
+        recorder.gauge('GitHubRateLimitRemaining', 4990)
+
+        # Act
+        document = recorder.to_emf(timestamp=1700000000)
+
+        # Assert
+        directive = document['_aws']['CloudWatchMetrics'][0]
+        assert document['_aws']['Timestamp'] == 1700000000000
+        assert directive['Namespace'] == telemetry.NAMESPACE
+        assert directive['Dimensions'] == [['Function', 'Mode']]
+        assert {'Name': 'BytesUploaded', 'Unit': 'Bytes'} in directive['Metrics']
+        assert document['Function'] == 'reviewer'
+        assert (document['S3Calls'], document['BytesUploaded'], document['GitHubRateLimitRemaining']) == (2, 1024, 4990)
+
+    def test_emit_appends_json_lines(self, tmp_path):
+        # Arrange
+        path = tmp_path / 'metrics.jsonl'
+        recorder = Telemetry()
+        recorder.count('PullRequests', 3)
+
+        # Act
+        recorder.emit(str(path))
+        recorder.emit(str(path))
+
+        # Assert
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])['PullRequests'] == 3
+
+    def test_start_resets_current_run(self):
+        # Arrange
+        telemetry.count('S3Calls')
+
+        # Act
+        recorder = telemetry.start({'Function': 'test'})
+
+        # Assert
+        assert telemetry.current() is recorder
+        assert recorder.metrics() == {}
+
+@pytest.mark.integration
+class TestRunTelemetry:
+    def test_review_code_metrics_file(self, tmp_path, mock_s3_client):
+        # Arrange
+        import cli
+        from click.testing import CliRunner
+        from benchmarks.fake_github import FakeGitHubServer
+        metrics_file = tmp_path / 'metrics.jsonl'
+
+        with FakeGitHubServer(repos=1, prs_per_repo=6, files_per_pr=2) as server, \
+                patch.object(cli.time, 'sleep', lambda seconds: None):
+            # Act
+            result = CliRunner().invoke(cli.review_code, [
+                '--repo', 'synthetic/repo0', '--token', 'test', '--days', '30', '--analyze', '--bucket', 'bucket',
+                '--output', str(tmp_path / 'report.pdf'), '--github-base-url', server.base_url,
+                '--metrics-file', str(metrics_file)
+            ])
+            requests = server.stats['requests']
+
+        # Assert
+        assert result.exit_code == 0
+        metrics = json.loads(metrics_file.read_text())
+        assert metrics['GitHubRequests'] == requests
+        assert metrics['GitHubRateLimitRemaining'] == 5000 - requests
+        assert metrics['PullRequests'] == 6
+        assert metrics['PullRequestsAnalyzed'] == 6
+        # Report upload, 30 daily listings and the two web interface pages
+        assert metrics['S3Calls'] == 33
+        assert metrics['BytesUploaded'] > metrics['ReportBytes'] > 0
+        for stage in ('Fetch', 'Analyze', 'Render', 'Upload', 'Index'):
+            assert metrics[f"{stage}Duration"] >= 0
+
+    def test_handler_prints_emf_line(self, capsys, mock_repository, mock_pulls_paginated):
+        # Arrange
+        import handler
+
+        with patch('cli._github') as mock_github, patch.dict(os.environ, {'GITHUB_TOKEN': 'test_token'}):
+            os.environ.pop('BUCKET_NAME', None)
+            mock_github.return_value.get_repo.return_value = mock_repository
+            mock_repository.get_pulls.return_value = mock_pulls_paginated
+
+            # Act
+            handler.handler({'repo': 'test/repo'}, None)
+
+        # Assert
+        lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert len(lines) == 1
+        metrics = json.loads(lines[0])
+        assert metrics['Mode'] == 'single'
+        assert metrics['PullRequests'] == 1
+        assert 'RenderDuration' in metrics
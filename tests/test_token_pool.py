@@ -0,0 +1,231 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+
+import telemetry
+from token_pool import TokenPool
+
+@pytest.fixture
+def clock(clock):
+    # The rate limit resets in these tests lie after t=1000
+    clock.now = 1000.0
+    return clock
+
+def rate_headers(remaining, limit=5000, reset=4600):
+    return {'X-RateLimit-Remaining': str(remaining), 'X-RateLimit-Limit': str(limit), 'X-RateLimit-Reset': str(reset)}
+
+class TestTokenPool:
+    def test_tokens_parsed_from_comma_separated_string(self):
+        # Act
+        pool = TokenPool.of(' ghp_aaaa1111 , ghs_bbbb2222,')
+
+        # Assert
+        assert [state.token for state in pool.tokens] == ['ghp_aaaa1111', 'ghs_bbbb2222']
+        assert [state.label for state in pool.tokens] == ['token 1 (...1111)', 'token 2 (...2222)']
+        assert TokenPool.of('') is None
+        assert TokenPool.of(pool) is pool
+
+    def test_routes_to_token_with_most_quota(self, clock):
+        # Arrange
+        pool = TokenPool(['a', 'b', 'c'], clock)
+        for state, remaining in zip([pool.acquire() for _ in range(3)], (100, 4000, 2500)):
+            pool.release(state, 200, rate_headers(remaining))
+
+        # Act
+        state = pool.acquire()
+
+        # Assert
+        assert state.token == 'b'
+
+    def test_requests_in_flight_spread_over_tokens(self):
+        # Arrange
+        pool = TokenPool(['a', 'b', 'c'])
+
+        # Act
+        tokens = [pool.acquire().token for _ in range(6)]
+
+        # Assert
+        assert tokens == ['a', 'b', 'c', 'a', 'b', 'c']
+
+    def test_rate_limited_token_set_aside_until_reset(self, clock):
+        # Arrange
+        pool = TokenPool(['a', 'b'], clock)
+        a = pool.acquire()
+
+        # Act
+        failover = pool.release(a, 403, rate_headers(0, reset=1100), 'API rate limit exceeded for user.')
+        while_limited = [pool.acquire().token for _ in range(3)]
+        clock.now = 1100
+        after_reset = pool.acquire().token
+
+        # Assert
+        assert failover
+        assert while_limited == ['b', 'b', 'b']
+        assert after_reset == 'a'
+        assert pool.usage()[0]['rate_limited'] == 1
+
+    def test_secondary_limit_set_aside_for_retry_after(self, clock):
+        # Arrange
+        pool = TokenPool(['a', 'b'], clock)
+        a = pool.acquire()
+
+        # Act
+        failover = pool.release(a, 403, dict(rate_headers(4000), **{'Retry-After': '30'}))
+
+        # Assert
+        assert failover
+        assert a.blocked_until == 1030
+
+    def test_no_failover_without_another_token(self):
+        # Arrange
+        pool = TokenPool(['a'])
+        state = pool.acquire()
+
+        # Act
+        failover = pool.release(state, 403, rate_headers(0))
+
+        # Assert
+        assert not failover
+        assert not pool.can_fail_over()
+
+    def test_forbidden_is_not_a_rate_limit(self):
+        # Arrange
+        pool = TokenPool(['a', 'b'])
+        state = pool.acquire()
+
+        # Act
+        failover = pool.release(state, 403, rate_headers(4000), 'Resource not accessible by integration')
+
+        # Assert
+        assert not failover
+        assert pool.can_fail_over()
+
+    def test_report_prints_usage_per_token(self, capsys):
+        # Arrange
+        recorder = telemetry.start({'Function': 'test'})
+        pool = TokenPool(['ghp_aaaa1111', 'ghp_bbbb2222'])
+        pool.release(pool.acquire(), 200, rate_headers(4990))
+
+        # Act
+        pool.report()
+
+        # Assert
+        output = capsys.readouterr().out
+        assert "GitHub token 1 (...1111): 1 requests, 4990/5000 remaining, 0 rate limited" in output
+        assert "GitHub token 2 (...2222): 0 requests, ? remaining" in output
+        assert 'ghp_aaaa1111' not in output
+        assert recorder.gauges['GitHubRateLimitRemaining'] == 4990
+
+@pytest.mark.integration
+class TestPoolRetry:
+    def test_leaves_rate_limit_to_failover(self, clock):
+        # Arrange
+        from github_auth import PoolRetry
+        # The limited token is only set aside once PooledToken gets the response
+        pool = TokenPool(['a', 'b'], clock)
+
+        # Act / Assert
+        assert not PoolRetry(pool).is_retry('GET', 403)
+
+    def test_waits_for_reset_within_deadline(self, clock):
+        # Arrange
+        from deadline import Deadline
+        from github_auth import PoolRetry
+        pool = TokenPool(['a'], clock)
+        pool.release(pool.acquire(), 403, rate_headers(0, reset=1030))
+
+        # Act / Assert
+        assert PoolRetry(pool, Deadline(60, clock), total=3, status_forcelist=[403]).is_retry('GET', 403)
+
+    def test_does_not_wait_for_reset_past_deadline(self, clock):
+        # Arrange
+        from deadline import Deadline
+        from github_auth import PoolRetry
+        pool = TokenPool(['a'], clock)
+        pool.release(pool.acquire(), 403, rate_headers(0, reset=1100))
+        retry = PoolRetry(pool, Deadline(60, clock), total=3, status_forcelist=[403])
+
+        # Act / Assert
+        assert not retry.is_retry('GET', 403)
+        assert not retry.new(total=2).is_retry('GET', 403)
+
+class TestTokenPoolRuns:
+    @pytest.mark.parametrize('engine', ['sync', 'async'])
+    def test_run_spends_quota_of_all_tokens(self, engine):
+        # Arrange
+        import cli
+        from benchmarks.fake_github import FakeGitHubServer
+
+        with FakeGitHubServer(repos=1, prs_per_repo=10, files_per_pr=2, rate_limit=10) as server, patch('time.sleep'):
+            # Act
+            records = cli.collect_repositories(
+                ['synthetic/repo0'], 'a,b,c', 30, 'open', 10, True, base_url=server.base_url, engine=engine
+            )
+            used = dict(server.used)
+
+        # Assert
+        # About 22 requests, more than one token's quota of 10
+        assert len(records) == 10
+        assert sum(used.values()) > 10
+        assert set(used) == {'token a', 'token b', 'token c'}
+
+    @pytest.mark.parametrize('engine', ['sync', 'async'])
+    def test_exhausted_token_fails_over(self, engine, capsys):
+        # Arrange
+        import cli
+        from benchmarks.fake_github import FakeGitHubServer
+
+        with FakeGitHubServer(repos=1, prs_per_repo=5, files_per_pr=2, rate_limit=100) as server, patch('time.sleep'):
+            server.used['token a'] = 100
+
+            # Act
+            records = cli.collect_repositories(
+                ['synthetic/repo0'], 'a,b', 30, 'open', 5, True, base_url=server.base_url, engine=engine
+            )
+            stats = server.stats
+
+        # Assert
+        assert len(records) == 5
+        assert stats['rate_limited'] == 1
+        output = capsys.readouterr().out
+        assert "GitHub token 1 (...a): 1 requests, 0/100 remaining, 1 rate limited" in output
+        assert "1 requests failed over to another token" in output
+
+    def test_async_engine_waits_for_reset_when_every_token_exhausted(self, capsys):
+        # Arrange
+        import async_engine
+        from benchmarks.fake_github import FakeGitHubServer
+
+        # The quota resets at least a second after the server starts
+        with FakeGitHubServer(repos=1, prs_per_repo=20, rate_limit=30, reset_after=2) as server:
+            server.used.update({'token a': 30, 'token b': 30, 'token c': 30})
+
+            # Act
+            records = async_engine.collect_repositories(
+                ['synthetic/repo0'], 'a,b,c', server.data.now - timedelta(days=30), base_url=server.base_url
+            )
+            stats = server.stats
+
+        # Assert
+        assert len(records) == 20
+        assert stats['rate_limited'] > 0
+        assert "GitHub rate limit reached on every token, waiting" in capsys.readouterr().out
+
+    def test_async_engine_does_not_wait_past_deadline(self, capsys):
+        # Arrange
+        import async_engine
+        from benchmarks.fake_github import FakeGitHubServer
+        from deadline import Deadline
+
+        with FakeGitHubServer(repos=1, prs_per_repo=100, rate_limit=30) as server:
+            # Act
+            records = async_engine.collect_repositories(
+                ['synthetic/repo0'], 'a,b,c', server.data.now - timedelta(days=30), deadline=Deadline(60),
+                base_url=server.base_url
+            )
+
+        # Assert
+        assert 0 < len(records) < 100
+        output = capsys.readouterr()
+        assert "waiting" not in output.out
+        assert "403 API rate limit exceeded for token." in output.err